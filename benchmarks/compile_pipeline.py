@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""Benchmark for compiling large pipeline definitions locally
+
+Builds pipelines made of a chain of transform steps and reports the time
+spent creating the steps, the teardown step and the AWS formatted objects.
+No calls are made to AWS.
+
+Usage:
+    python benchmarks/compile_pipeline.py [num_steps ...]
+"""
+import sys
+import time
+
+from dataduct.config import Config
+
+DEFAULT_SIZES = [1000, 5000, 10000]
+
+
+def step_definitions(num_steps):
+    """Definitions of a chain of transform steps
+    """
+    return [{
+        'step_type': 'transform',
+        'command': 'echo step %d' % index,
+    } for index in range(num_steps)]
+
+
+def compile_pipeline(num_steps):
+    """Compile a pipeline with num_steps steps and return the timings
+    """
+    from dataduct.etl.etl_pipeline import ETLPipeline
+
+    timings = []
+    start = time.time()
+    etl = ETLPipeline('benchmark_%d' % num_steps)
+    etl.create_steps(step_definitions(num_steps))
+    timings.append(('steps', time.time() - start))
+
+    start = time.time()
+    etl.create_teardown_step()
+    timings.append(('teardown', time.time() - start))
+
+    start = time.time()
+    objects = [o.aws_format() for o in etl.pipeline_objects()]
+    timings.append(('aws_format', time.time() - start))
+    return len(objects), timings
+
+
+def main():
+    """Run the benchmark for each of the requested pipeline sizes
+    """
+    Config()
+    sizes = [int(x) for x in sys.argv[1:]] or DEFAULT_SIZES
+    for num_steps in sizes:
+        num_objects, timings = compile_pipeline(num_steps)
+        total = sum(t for _, t in timings)
+        details = ', '.join('%s: %.2fs' % timing for timing in timings)
+        print '%6d steps, %6d objects: %.2fs (%s)' % (
+            num_steps, num_objects, total, details)
+
+
+if __name__ == '__main__':
+    main()
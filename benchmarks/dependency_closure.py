@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Benchmark for dependency pruning on wide fan-in / fan-out DAGs
+
+Builds pipelines made of layers of transform steps where every step depends
+on all the steps of the previous layer. A bootstrap step is configured so
+that the dependencies of every step are pruned after it is created, and the
+teardown step prunes the dependencies on all the steps.
+No calls are made to AWS.
+
+Usage:
+    python benchmarks/dependency_closure.py [layers x width ...]
+
+    e.g. python benchmarks/dependency_closure.py 10x10 20x50
+"""
+import sys
+import time
+
+from dataduct.config import Config
+
+DEFAULT_SHAPES = [(10, 10), (20, 20), (10, 100)]
+
+BOOTSTRAP = {
+    'ec2': [{
+        'step_type': 'transform',
+        'command': 'echo bootstrap',
+        'no_output': True,
+    }]
+}
+
+
+def step_definitions(layers, width):
+    """Definitions of layers of steps each depending on the previous layer
+    """
+    steps = []
+    previous = []
+    for layer in range(layers):
+        current = ['layer%d_step%d' % (layer, index) for index in range(width)]
+        for name in current:
+            definition = {
+                'step_type': 'transform',
+                'command': 'echo %s' % name,
+                'name': name,
+            }
+            if previous:
+                definition['depends_on'] = previous
+            steps.append(definition)
+        previous = current
+    return steps
+
+
+def compile_pipeline(layers, width):
+    """Compile the layered pipeline and return the timings
+    """
+    from dataduct.etl.etl_pipeline import ETLPipeline
+
+    timings = []
+    start = time.time()
+    etl = ETLPipeline('benchmark_%dx%d' % (layers, width), bootstrap=BOOTSTRAP)
+    etl.create_steps(step_definitions(layers, width))
+    timings.append(('steps', time.time() - start))
+
+    start = time.time()
+    etl.create_teardown_step()
+    timings.append(('teardown', time.time() - start))
+    return timings
+
+
+def main():
+    """Run the benchmark for each of the requested DAG shapes
+    """
+    Config()
+    shapes = [tuple(int(x) for x in arg.split('x')) for arg in sys.argv[1:]]
+    for layers, width in shapes or DEFAULT_SHAPES:
+        timings = compile_pipeline(layers, width)
+        total = sum(t for _, t in timings)
+        details = ', '.join('%s: %.2fs' % timing for timing in timings)
+        print '%4d layers x %4d steps: %.2fs (%s)' % (
+            layers, width, total, details)
+
+
+if __name__ == '__main__':
+    main()
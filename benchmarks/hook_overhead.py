@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Benchmark for the overhead of the hook decorator
+
+Reports the time needed to decorate a function and the time per call of a
+plain function, of a hooked function without a hook file and of a hooked
+function whose hook file defines before and after hooks. No calls are made
+to AWS.
+
+Usage:
+    python benchmarks/hook_overhead.py [num_calls]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from dataduct.config import Config
+from dataduct.utils.hook import hook
+
+DEFAULT_CALLS = 1000000
+HOOK_FILE = '\n'.join([
+    'def before_hook(number):',
+    '    return [number], {}',
+    'def after_hook(result):',
+    '    return result',
+])
+
+
+def per_call(func, num_calls):
+    """Microseconds spent per call of a function
+    """
+    start = time.time()
+    for number in xrange(num_calls):
+        func(number)
+    return (time.time() - start) / num_calls * 1e6
+
+
+def main():
+    """Run the benchmark with the requested number of calls
+    """
+    num_calls = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CALLS
+    config = Config()
+    hooks_dir = tempfile.mkdtemp()
+    config.etl['HOOKS_BASE_PATH'] = hooks_dir
+    with open(os.path.join(hooks_dir, 'benchmark_hook.py'), 'w') as f:
+        f.write(HOOK_FILE)
+
+    def plain(number):
+        return number
+
+    try:
+        start = time.time()
+        decorated = [hook('benchmark_hook')(plain) for _ in range(1000)]
+        print 'decorate:      %.2f us per function' % (
+            (time.time() - start) * 1e3)
+        decorated[0](0)
+
+        print 'plain:         %.2f us per call' % per_call(plain, num_calls)
+        print 'no hook file:  %.2f us per call' % per_call(
+            hook('missing_hook')(plain), num_calls)
+        print 'hook file:     %.2f us per call' % per_call(
+            decorated[0], num_calls)
+    finally:
+        shutil.rmtree(hooks_dir)
+
+
+if __name__ == '__main__':
+    main()
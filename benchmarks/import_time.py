@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Benchmark for the import time of the CLI and the executor entry points
+
+Every entry point is imported in a fresh interpreter with the builtin import
+wrapped to time each module, similar to `python -X importtime` on Python 3.
+Reports the total time, the number of modules loaded and the slowest
+imports. Entry points whose dependencies are not installed are reported as
+failed.
+
+Usage:
+    python benchmarks/import_time.py [module ...]
+"""
+import json
+import subprocess
+import sys
+
+ENTRY_POINTS = [
+    # Imports of `dataduct pipeline create`
+    'dataduct.etl',
+    'dataduct.steps.executors.column_check',
+    'dataduct.steps.executors.count_check',
+    'dataduct.steps.executors.create_load_redshift',
+    'dataduct.steps.executors.dependency_check',
+    'dataduct.steps.executors.primary_key_check',
+    'dataduct.steps.executors.runner',
+]
+SLOWEST_IMPORTS = 5
+
+MEASURE = r'''
+import __builtin__
+import json
+import sys
+import time
+
+timings = {}
+original_import = __builtin__.__import__
+
+def timed_import(name, *args, **kwargs):
+    if name in sys.modules:
+        return original_import(name, *args, **kwargs)
+    start = time.time()
+    try:
+        return original_import(name, *args, **kwargs)
+    finally:
+        timings[name] = max(timings.get(name, 0), time.time() - start)
+
+__builtin__.__import__ = timed_import
+start = time.time()
+error = None
+try:
+    __import__(sys.argv[1])
+except Exception as e:
+    error = '%s: %s' % (type(e).__name__, e)
+total = time.time() - start
+__builtin__.__import__ = original_import
+slowest = sorted(timings.items(), key=lambda t: -t[1])
+print json.dumps({
+    'total': total,
+    'modules': len([m for m in sys.modules.values() if m is not None]),
+    'error': error,
+    'slowest': slowest[:int(sys.argv[2])],
+})
+'''
+
+
+def measure(module):
+    """Import a module in a fresh interpreter and return the timings
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-W', 'ignore', '-c', MEASURE, module,
+         str(SLOWEST_IMPORTS)])
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    """Run the benchmark for each of the requested entry points
+    """
+    modules = sys.argv[1:] or ENTRY_POINTS
+    for module in modules:
+        result = measure(module)
+        status = 'failed (%s)' % result['error'] if result['error'] else ''
+        print '%-45s %.3fs, %4d modules %s' % (
+            module, result['total'], result['modules'], status)
+        for name, seconds in result['slowest']:
+            print '    %.3fs %s' % (seconds, name)
+
+
+if __name__ == '__main__':
+    main()
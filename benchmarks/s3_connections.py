@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""Benchmark for the S3 connections cached per thread
+
+Uploads small files with upload_to_s3 to a local HTTP stand-in of S3, once
+with the cached connection and once opening a new connection per upload as
+before the cache existed. No calls are made to AWS.
+
+Usage:
+    python benchmarks/s3_connections.py [num_uploads]
+"""
+import hashlib
+import httplib
+import socket
+import sys
+import threading
+import time
+
+from BaseHTTPServer import BaseHTTPRequestHandler
+from BaseHTTPServer import HTTPServer
+from SocketServer import ThreadingMixIn
+
+import boto
+from boto.s3.connection import OrdinaryCallingFormat
+from boto.s3.connection import S3Connection
+
+from dataduct.s3 import S3Path
+from dataduct.s3.utils import clear_s3_connections
+from dataduct.s3.utils import upload_to_s3
+
+DEFAULT_UPLOADS = 1000
+HTTPConnection = httplib.HTTPConnection
+
+
+class S3Handler(BaseHTTPRequestHandler):
+    """Accepts PUT requests of objects with keep-alive connections
+    """
+    protocol_version = 'HTTP/1.1'
+    # Responses are written line by line, which stalls keep-alive
+    # connections on delayed ACKs unless Nagle's algorithm is off
+    disable_nagle_algorithm = True
+    # Idle keep-alive connections are closed so that the benchmark can exit
+    timeout = 0.5
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.connections.add(self.client_address)
+        self.send_response(200)
+        self.send_header('ETag', '"%s"' % hashlib.md5(body).hexdigest())
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class S3Server(ThreadingMixIn, HTTPServer):
+    """Local S3 stand-in counting the client connections
+    """
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), S3Handler)
+        self.connections = set()
+
+
+class NoDelayHTTPConnection(HTTPConnection):
+    """HTTP connection that sends small writes right away
+
+    Note:
+        boto writes the headers and the body of a request separately, so on
+        a reused loopback connection every upload would wait for the
+        delayed ACK of the stand-in
+    """
+    def connect(self):
+        HTTPConnection.connect(self)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def run(server, num_uploads, pooled):
+    """Upload small files and return the seconds and connections used
+    """
+    server.connections.clear()
+    clear_s3_connections()
+    start = time.time()
+    for index in xrange(num_uploads):
+        if not pooled:
+            clear_s3_connections()
+        upload_to_s3(S3Path(uri='s3://bucket/file_%d' % index),
+                     file_text='file %d' % index)
+    return time.time() - start, len(server.connections)
+
+
+def main():
+    """Run the benchmark with the requested number of uploads
+    """
+    num_uploads = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_UPLOADS
+    server = S3Server()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    boto.connect_s3 = lambda: S3Connection(
+        'access_key', 'secret_key', host='127.0.0.1',
+        port=server.server_address[1], is_secure=False,
+        calling_format=OrdinaryCallingFormat())
+    httplib.HTTPConnection = NoDelayHTTPConnection
+    try:
+        for name, pooled in [('unpooled', False), ('pooled', True)]:
+            seconds, connections = run(server, num_uploads, pooled)
+            print '%-9s %.2fs, %.2f ms per upload, %d connections' % (
+                name, seconds, seconds / num_uploads * 1e3, connections)
+    finally:
+        httplib.HTTPConnection = HTTPConnection
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
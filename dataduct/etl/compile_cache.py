@@ -0,0 +1,243 @@
+"""
+On-disk cache of compiled pipeline definitions
+"""
+import hashlib
+import json
+import os
+
+from tempfile import NamedTemporaryFile
+
+from .. import __version__
+from ..config import Config
+from ..pipeline import PipelineObject
+from ..s3 import S3Directory
+from ..s3 import S3File
+from ..s3 import S3Path
+from ..utils.constants import VERSION_NAME_PLACEHOLDER
+from ..utils.helpers import CUSTOM_STEPS_PATH
+from ..utils.helpers import parse_path
+from .etl_pipeline import ETLPipeline
+
+import logging
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(path):
+    """Hash of the contents of a local file or directory
+
+    Args:
+        path(str): path of the file or directory
+
+    Returns:
+        result(str): hex digest of the contents, None if the path is missing
+    """
+    digest = hashlib.sha1()
+    if os.path.isdir(path):
+        for root, directories, file_names in os.walk(path, followlinks=True):
+            directories.sort()
+            for file_name in sorted(file_names):
+                file_path = os.path.join(root, file_name)
+                digest.update(os.path.relpath(file_path, path))
+                digest.update(str(file_fingerprint(file_path)))
+    elif os.path.isfile(path):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+                digest.update(chunk)
+    else:
+        return None
+    return digest.hexdigest()
+
+
+def _byte_strings(value):
+    """Convert the unicode strings loaded from json back to str
+    """
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [_byte_strings(v) for v in value]
+    if isinstance(value, dict):
+        return dict((_byte_strings(k), _byte_strings(v))
+                    for k, v in value.iteritems())
+    return value
+
+
+class CompiledObject(PipelineObject):
+    """Pipeline object restored from its AWS format
+    """
+    def __init__(self, aws_format):
+        """Constructor for the CompiledObject class
+
+        Args:
+            aws_format(dict): AWS format of the compiled object
+        """
+        super(CompiledObject, self).__init__(aws_format['id'])
+        self._aws_format = aws_format
+
+    def aws_format(self):
+        """The AWS format the object was compiled to
+
+        Returns:
+            result: The AWS-readable dict format of the object
+        """
+        return self._aws_format
+
+
+class CompileCache(object):
+    """Local cache of the AWS objects and S3 files of compiled pipelines
+
+    Entries are keyed by a hash of the pipeline definition, the effective
+    config after the mode overlay, the custom steps and the dataduct version.
+    Each entry also stores the hashes of all the local files resolved through
+    parse_path while compiling, and is only used if none of them changed.
+
+    Note:
+        The version name of the pipeline is stored as a placeholder and all
+        the base objects of the pipeline, such as the Schedule whose start
+        time depends on the current time, are created again when an entry is
+        loaded. A loaded pipeline only has compiled objects and no steps.
+    """
+    def __init__(self, directory):
+        """Constructor for the CompileCache class
+
+        Args:
+            directory(str): local directory where the entries are stored
+        """
+        self.directory = os.path.expanduser(directory)
+
+    def key(self, definition):
+        """Key of the cache entry of a pipeline definition
+
+        Args:
+            definition(dict): YAML definition parsed from the datapipeline
+
+        Returns:
+            result(str): hex digest identifying the compiled pipeline
+        """
+        config = Config()
+        parts = [
+            __version__,
+            str(config.mode),
+            config.raw_config(),
+            os.getcwd(),
+            json.dumps(definition, sort_keys=True, default=repr),
+        ]
+        for step_def in getattr(config, 'custom_steps', None) or []:
+            path = parse_path(step_def.get('file_path'), CUSTOM_STEPS_PATH)
+            if path is not None:
+                parts.append(str(file_fingerprint(path)))
+
+        digest = hashlib.sha1()
+        for part in parts:
+            digest.update(part)
+            digest.update('\0')
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        """Local path of the cache entry with the given key
+        """
+        return os.path.join(self.directory, key + '.json')
+
+    def load(self, key, definition):
+        """Restore a pipeline from the cache if none of its inputs changed
+
+        Args:
+            key(str): key of the cache entry
+            definition(dict): pipeline definition without the steps
+
+        Returns:
+            etl(ETLPipeline): restored pipeline, None if there is no valid
+            entry
+        """
+        try:
+            with open(self._entry_path(key)) as f:
+                entry = json.load(f)
+        except (IOError, ValueError):
+            return None
+
+        for path, fingerprint in entry['dependencies']:
+            if file_fingerprint(path) != fingerprint:
+                logger.debug('Compile cache entry is stale due to %s', path)
+                return None
+
+        etl = ETLPipeline(**definition)
+        compiled = _byte_strings(json.loads(entry['pipeline'].replace(
+            VERSION_NAME_PLACEHOLDER, etl.version_name)))
+
+        # Base objects are created again as they depend on the current time
+        base_ids = set(o.id for o in etl.pipeline_objects())
+        pipeline_objects = [CompiledObject(o) for o in compiled['objects']
+                            if o['id'] not in base_ids]
+        s3_files = [self._restore_s3_file(f) for f in compiled['s3_files']]
+        etl.add_compiled_objects(pipeline_objects, s3_files)
+        return etl
+
+    def store(self, key, etl, dependencies):
+        """Store a compiled pipeline in the cache
+
+        Args:
+            key(str): key of the cache entry
+            etl(ETLPipeline): pipeline that was compiled
+            dependencies(set of str): local paths read while compiling
+        """
+        compiled = {
+            'objects': [o.aws_format() for o in etl.pipeline_objects()],
+            's3_files': [self._s3_file_manifest(f) for f in etl.s3_files()],
+        }
+        entry = {
+            'dependencies': [[path, file_fingerprint(path)]
+                             for path in sorted(dependencies)],
+            'pipeline': json.dumps(compiled).replace(
+                etl.version_name, VERSION_NAME_PLACEHOLDER),
+        }
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        # Write to a temporary file first so that readers never see a
+        # partially written entry
+        with NamedTemporaryFile(dir=self.directory, delete=False) as f:
+            json.dump(entry, f)
+        os.rename(f.name, self._entry_path(key))
+
+    @staticmethod
+    def _s3_file_manifest(s3_file):
+        """Serializable description of an S3 file or directory
+        """
+        s3_path = s3_file.s3_path
+        manifest = {
+            's3_uri': s3_path.uri if s3_path else None,
+            'is_directory': s3_path.is_directory if s3_path else False,
+        }
+        if isinstance(s3_file, S3Directory):
+            manifest['directory'] = s3_file.path
+        else:
+            manifest['path'] = s3_file.path
+            manifest['text'] = s3_file.local_text
+        return manifest
+
+    @staticmethod
+    def _restore_s3_file(manifest):
+        """Create the S3 file or directory from its manifest
+        """
+        s3_path = None
+        if manifest['s3_uri'] is not None:
+            s3_path = S3Path(uri=manifest['s3_uri'],
+                             is_directory=manifest['is_directory'])
+        if 'directory' in manifest:
+            return S3Directory(path=manifest['directory'], s3_path=s3_path)
+        return S3File(path=manifest['path'], text=manifest['text'],
+                      s3_path=s3_path)
+
+
+def get_compile_cache():
+    """Get the compile cache configured with COMPILE_CACHE_DIR
+
+    Returns:
+        compile_cache(CompileCache): the cache, None if it is not configured
+    """
+    directory = Config().etl.get('COMPILE_CACHE_DIR', None)
+    if directory is None:
+        return None
+    return CompileCache(directory)
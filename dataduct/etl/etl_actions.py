@@ -8,7 +8,9 @@ from ..pipeline import RedshiftNode
 from ..pipeline import S3Node
 from ..utils.exceptions import ETLInputError
 from ..utils.helpers import make_pipeline_url
+from ..utils.helpers import record_parsed_paths
 from ..utils.hook import hook
+from .compile_cache import get_compile_cache
 from .etl_pipeline import ETLPipeline
 
 import logging
@@ -42,33 +44,57 @@ def read_pipeline_definition(file_path):
     return definition
 
 
-def create_pipeline(definition):
+def create_pipeline(definition, use_cache=True):
     """Creates the pipeline and add the steps specified to the pipeline
 
+    Note:
+        If COMPILE_CACHE_DIR is set in the etl config, the compiled pipeline
+        is loaded from the cache when neither the definition nor any of the
+        files it references changed. Pipelines loaded from the cache have no
+        steps, so use_cache should be False when the steps are needed.
+
     Args:
         definition(dict): YAML definition parsed from the datapipeline
+        use_cache(bool): load and store the pipeline in the compile cache
     """
-    steps = definition.pop('steps')
-    etl = ETLPipeline(**definition)
+    compile_cache = get_compile_cache() if use_cache else None
+    if compile_cache is not None:
+        cache_key = compile_cache.key(definition)
 
-    # Add the steps to the pipeline object
-    etl.create_steps(steps)
-    etl.create_teardown_step()
+    steps = definition.pop('steps')
+    if compile_cache is not None:
+        etl = compile_cache.load(cache_key, definition)
+        if etl is not None:
+            logger.info('Loaded pipeline from compile cache. Name: %s',
+                        etl.name)
+            return etl
+
+    with record_parsed_paths() as dependencies:
+        etl = ETLPipeline(**definition)
+
+        # Add the steps to the pipeline object
+        etl.create_steps(steps)
+        etl.create_teardown_step()
+
+    if compile_cache is not None:
+        compile_cache.store(cache_key, etl, dependencies)
     logger.info('Created pipeline. Name: %s', etl.name)
     return etl
 
 
-def validate_pipeline(etl, force=False):
+def validate_pipeline(etl, force=False, update=False):
     """Validates the pipeline that was created
 
     Args:
         etl(EtlPipeline): pipeline object that needs to be validated
         force(bool): delete if a pipeline of same name exists
+        update(bool): skip the update if the deployed pipeline is the same,
+            ignored if force is set
     """
     if force:
         etl.delete_if_exists()
-    etl.validate()
-    logger.debug(yaml.dump(etl.pipeline.aws_format))
+    etl.validate(update=update and not force)
+    logger.debug(etl.pipeline.definition_yaml)
     logger.info('Validated pipeline. Id: %s', etl.pipeline.id)
 
 
@@ -80,6 +106,10 @@ def activate_pipeline(etl):
         etl(EtlPipeline): pipeline object that needs to be activated
     """
     etl.activate()
+    if etl.unchanged:
+        logger.info('Skipped activation of unchanged pipeline. Id: %s',
+                    etl.pipeline.id)
+        return
     logger.info('Activated pipeline. Id: %s', etl.pipeline.id)
     logger.info('Monitor pipeline here: %s',
                 make_pipeline_url(etl.pipeline.id))
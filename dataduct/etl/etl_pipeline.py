@@ -3,10 +3,8 @@ Class definition for DataPipeline
 """
 import csv
 import os
-import yaml
 
 from StringIO import StringIO
-from copy import deepcopy
 from datetime import datetime
 from datetime import timedelta
 
@@ -15,6 +13,8 @@ from .utils import process_steps
 
 from ..pipeline import DataPipeline
 from ..pipeline import DefaultObject
+from ..pipeline import DefinitionDiff
+from ..pipeline import DependencyClosure
 from ..pipeline import Ec2Resource
 from ..pipeline import EmrResource
 from ..pipeline import RedshiftDatabase
@@ -23,15 +23,19 @@ from ..pipeline import S3Node
 from ..pipeline import SNSAlarm
 from ..pipeline import Schedule
 from ..pipeline.utils import list_formatted_instance_details
-from ..pipeline.utils import list_pipelines
+from ..pipeline.pipeline_catalog import get_pipeline_catalog
 
 from ..s3 import S3File
 from ..s3 import S3LogPath
 from ..s3 import S3Path
+from ..s3 import UploadPlanner
 
 from ..utils import constants as const
+from ..utils.exceptions import ETLConfigError
 from ..utils.exceptions import ETLInputError
+from ..utils.helpers import get_completion_marker_dir
 from ..utils.helpers import get_s3_base_path
+from ..utils.object_registry import ObjectRegistry
 
 import logging
 logger = logging.getLogger(__name__)
@@ -45,6 +49,7 @@ NAME_PREFIX = config.etl.get('NAME_PREFIX', const.EMPTY_STR)
 QA_LOG_PATH = config.etl.get('QA_LOG_PATH', const.QA_STR)
 DP_INSTANCE_LOG_PATH = config.etl.get('DP_INSTANCE_LOG_PATH', const.NONE)
 DP_PIPELINE_LOG_PATH = config.etl.get('DP_PIPELINE_LOG_PATH', const.NONE)
+S3_UPLOAD_WORKERS = config.etl.get('S3_UPLOAD_WORKERS', 8)
 
 DEFAULT_TEARDOWN = {
     'step_type': 'transform',
@@ -52,6 +57,8 @@ DEFAULT_TEARDOWN = {
     'no_output': True
 }
 
+COMPLETION_MARKER_STEP = 'CompletionMarker'
+
 
 class ETLPipeline(object):
     """DataPipeline class with steps and metadata.
@@ -125,11 +132,17 @@ class ETLPipeline(object):
             self.version_ts.strftime('%Y%m%d%H%M%S')
         self.pipeline = None
         self.errors = None
+        self.diff = None
+        self.unchanged = False
 
-        self._base_objects = dict()
+        self._base_objects = ObjectRegistry()
         self.intermediate_nodes = dict()
-        self._steps = dict()
+        self._steps = ObjectRegistry()
+        self._node_producers = dict()
+        self.dependency_closure = DependencyClosure()
         self._bootstrap_steps = list()
+        self._compiled_objects = list()
+        self._compiled_s3_files = list()
 
         # Base objects
         self.schedule = None
@@ -162,8 +175,7 @@ class ETLPipeline(object):
             new_object(PipelineObject): Creates object based on class. Name of
             object is created on its type and index if not provided
         """
-        instance_count = sum([1 for o in self._base_objects.values()
-                              if isinstance(o, object_class)])
+        instance_count = self._base_objects.count(object_class)
 
         # Object name/ids are given by [object_class][index]
         object_id = object_class.__name__ + str(instance_count)
@@ -387,6 +399,18 @@ class ETLPipeline(object):
         """
         return self._steps.get(step_id, None)
 
+    def producing_step(self, node):
+        """Fetch the step that created a pipeline object such as an S3Node
+
+        Args:
+            node(PipelineObject): object whose producer should be fetched
+
+        Returns:
+            step(ETLStep): Step owning the node.
+            If no step owns the node, None will be returned
+        """
+        return self._node_producers.get(node, None)
+
     def translate_input_nodes(self, input_node):
         """Translate names from YAML to input_nodes
 
@@ -435,13 +459,18 @@ class ETLPipeline(object):
             raise ETLInputError('Step name %s already taken' % step.id)
         self._steps[step.id] = step
 
+        # Index the objects of the step for input node lookups
+        for pipeline_object in step.pipeline_objects:
+            self._node_producers[pipeline_object] = step
+
         if self.bootstrap_steps and not is_bootstrap and not is_teardown:
             step.add_required_steps(self.bootstrap_steps)
 
         if is_teardown:
-            teardown_dependencies = deepcopy(self._steps)
-            teardown_dependencies.pop(step.id)
-            step.add_required_steps(teardown_dependencies.values())
+            # The teardown depends on every step, pruning the required
+            # activities leaves it depending only on the sink activities
+            step.add_required_steps(
+                [s for s in self._steps.itervalues() if s is not step])
 
         # Update intermediate_nodes dict
         if isinstance(step.output, dict):
@@ -501,8 +530,28 @@ class ETLPipeline(object):
 
     def create_teardown_step(self):
         """Create teardown steps for the pipeline
+
+        Note:
+            If COMPLETION_MARKER_PATH is set, a completion marker for the
+            scheduled date is written to S3 after the teardown step
         """
-        return self.create_steps([self.teardown_definition], is_teardown=True)
+        steps = self.create_steps([self.teardown_definition],
+                                  is_teardown=True)
+
+        marker_dir = get_completion_marker_dir(self.name)
+        if marker_dir:
+            if COMPLETION_MARKER_STEP in self._steps:
+                raise ETLConfigError(
+                    'Step name %s is reserved for the completion marker' %
+                    COMPLETION_MARKER_STEP)
+            steps.extend(self.create_steps([{
+                'step_type': 'transform',
+                'name': COMPLETION_MARKER_STEP,
+                'command': 'touch ${OUTPUT1_STAGING_DIR}/%s' %
+                           const.COMPLETION_MARKER_FILE,
+                'output_path': marker_dir,
+            }], is_teardown=True))
+        return steps
 
     def create_bootstrap_steps(self, resource_type):
         """Create the boostrap steps for installation on all machines
@@ -524,11 +573,22 @@ class ETLPipeline(object):
             i.e. all base objects as well as ones owned by steps
         """
         result = self._base_objects.values()
+        result.extend(self._compiled_objects)
         # Add all steps owned by the ETL steps
         for step in self._steps.values():
             result.extend(step.pipeline_objects)
         return result
 
+    def add_compiled_objects(self, pipeline_objects, s3_files):
+        """Add objects that were compiled earlier, e.g. by the compile cache
+
+        Args:
+            pipeline_objects(list of PipelineObject): compiled pipeline objects
+            s3_files(list of S3File): files required by the compiled objects
+        """
+        self._compiled_objects.extend(pipeline_objects)
+        self._compiled_s3_files.extend(s3_files)
+
     @staticmethod
     def log_uploader(uri, filename, string):
         """Utility function to upload log files to S3
@@ -586,13 +646,12 @@ class ETLPipeline(object):
         """
 
         # This will delete all pipelines with the same name
-        for p_iter in list_pipelines():
-            if p_iter['name'] == self.name:
-                pipeline_instance = DataPipeline(pipeline_id=p_iter['id'])
+        for pipeline_id in get_pipeline_catalog().ids(self.name):
+            pipeline_instance = DataPipeline(pipeline_id=pipeline_id)
 
-                if DP_INSTANCE_LOG_PATH:
-                    self.log_s3_dp_instance_data(pipeline_instance)
-                pipeline_instance.delete()
+            if DP_INSTANCE_LOG_PATH:
+                self.log_s3_dp_instance_data(pipeline_instance)
+            pipeline_instance.delete()
 
     def s3_files(self):
         """Get all s3 files associated with the ETL
@@ -600,7 +659,7 @@ class ETLPipeline(object):
         Returns:
             result(list of s3files): All s3files related to the ETL
         """
-        result = list()
+        result = list(self._compiled_s3_files)
         for pipeline_object in self.pipeline_objects():
             result.extend(pipeline_object.s3_files)
         return result
@@ -624,9 +683,49 @@ class ETLPipeline(object):
                 tags.append({'key': key, 'value': variable})
         return tags
 
-    def validate(self):
+    def matches_deployed(self):
+        """Check if the deployed pipeline has the same definition and files
+
+        Note:
+            The object level differences with the deployed definition are
+            stored in diff and logged.
+
+        Returns:
+            result(bool): True if updating the pipeline would not change it
+        """
+        deployed_objects = self.pipeline.deployed_definition()
+        if deployed_objects is None:
+            return False
+
+        self.diff = DefinitionDiff(deployed_objects, self.pipeline.aws_format)
+        if self.diff:
+            logger.info('Changes to the deployed pipeline %s:\n%s',
+                        self.name, self.diff)
+            return False
+
+        # The files of the deployed version are stored under its version name
+        version_name = self.diff.deployed_version_name or self.version_name
+        for s3_file in self.s3_files():
+            if s3_file.s3_path is None:
+                continue
+            deployed_path = S3Path(
+                uri=s3_file.s3_path.uri.replace(
+                    self.version_name, version_name),
+                is_directory=s3_file.s3_path.is_directory,
+            )
+            if not s3_file.matches_s3(deployed_path):
+                logger.info('File %s of the deployed pipeline %s changed',
+                            deployed_path.uri, self.name)
+                return False
+        return True
+
+    def validate(self, update=False):
         """Validate the given pipeline definition by creating a pipeline
 
+        Args:
+            update(bool): Compare with the deployed definition and skip the
+                update and activation if the pipeline did not change
+
         Returns:
             errors(list): list of errors in the pipeline, empty if no errors
         """
@@ -638,6 +737,13 @@ class ETLPipeline(object):
         for pipeline_object in self.pipeline_objects():
             self.pipeline.add_object(pipeline_object)
 
+        if update and self.matches_deployed():
+            logger.info('Pipeline %s is unchanged, skipping the update',
+                        self.name)
+            self.unchanged = True
+            self.errors = []
+            return self.errors
+
         # Check for errors
         self.errors = self.pipeline.validate_pipeline_definition()
         if len(self.errors) > 0:
@@ -659,9 +765,12 @@ class ETLPipeline(object):
         elif len(self.errors) > 0:
             raise ETLInputError('Pipeline has errors %s' % self.errors)
 
+        if self.unchanged:
+            return
+
         # Upload any files that need to be uploaded
-        for s3_file in self.s3_files():
-            s3_file.upload_to_s3()
+        planner = UploadPlanner()
+        planner.add_files(self.s3_files())
 
         # Upload pipeline definition
         pipeline_definition_path = S3Path(
@@ -670,10 +779,11 @@ class ETLPipeline(object):
         )
 
         pipeline_definition = S3File(
-            text=yaml.dump(self.pipeline.aws_format),
+            text=self.pipeline.definition_yaml,
             s3_path=pipeline_definition_path
         )
-        pipeline_definition.upload_to_s3()
+        planner.add_file(pipeline_definition)
+        planner.upload(S3_UPLOAD_WORKERS)
 
         # Upload pipeline instance metadata to S3
         if DP_PIPELINE_LOG_PATH:
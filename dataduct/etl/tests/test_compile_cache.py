@@ -0,0 +1,91 @@
+"""Tests for the compile cache
+"""
+import os
+
+import unittest
+from testfixtures import TempDirectory
+from nose.tools import eq_
+
+from ..compile_cache import CompiledObject
+from ..etl_actions import create_pipeline
+from ...config import Config
+from ...utils.constants import VERSION_NAME_PLACEHOLDER
+
+
+class CompileCacheTests(unittest.TestCase):
+    """Tests for the compile cache
+    """
+
+    def setUp(self):
+        """Setup text fixtures
+        """
+        self.directory = TempDirectory()
+        self.script = self.directory.write('script.sh', 'echo hello')
+        self.config = Config()
+        self.config.etl['COMPILE_CACHE_DIR'] = os.path.join(
+            self.directory.path, 'cache')
+
+    def tearDown(self):
+        """Remove the cache from the config
+        """
+        self.config.etl.pop('COMPILE_CACHE_DIR', None)
+        self.directory.cleanup()
+
+    def definition(self):
+        """Definition of a pipeline referencing a local script
+        """
+        return {
+            'name': 'example_compile_cache',
+            'frequency': 'one-time',
+            'steps': [{
+                'step_type': 'transform',
+                'script': self.script,
+                'no_output': True,
+            }],
+        }
+
+    @staticmethod
+    def compiled(etl):
+        """AWS format of the objects of a pipeline keyed by id
+        """
+        return dict((o.id, o.aws_format()) for o in etl.pipeline_objects())
+
+    def test_unchanged_definition_is_loaded(self):
+        """Test that the cached objects match the compiled objects
+        """
+        etl = create_pipeline(self.definition())
+        cached_etl = create_pipeline(self.definition())
+
+        eq_(len(cached_etl.steps), 0)
+        assert any(isinstance(o, CompiledObject)
+                   for o in cached_etl.pipeline_objects())
+        eq_(sorted(self.compiled(etl)), sorted(self.compiled(cached_etl)))
+
+        # Version names are replaced with the one of the loaded pipeline
+        text = str(self.compiled(cached_etl))
+        assert VERSION_NAME_PLACEHOLDER not in text
+        assert cached_etl.version_name in text
+        eq_(text.replace(cached_etl.version_name, etl.version_name),
+            str(self.compiled(etl)))
+
+        eq_(set((f.path, f.s3_path.uri) for f in etl.s3_files()),
+            set((f.path, f.s3_path.uri.replace(cached_etl.version_name,
+                                               etl.version_name))
+                for f in cached_etl.s3_files()))
+
+    def test_changed_file_is_recompiled(self):
+        """Test that changing a referenced file invalidates the entry
+        """
+        create_pipeline(self.definition())
+        self.directory.write('script.sh', 'echo changed')
+        etl = create_pipeline(self.definition())
+        eq_(len(etl.steps), 2)
+
+    def test_changed_definition_is_recompiled(self):
+        """Test that changing the definition invalidates the entry
+        """
+        create_pipeline(self.definition())
+        definition = self.definition()
+        definition['steps'][0]['name'] = 'renamed'
+        etl = create_pipeline(definition)
+        assert 'renamed' in etl.steps
@@ -1,11 +1,15 @@
 """Tests for the ETL Pipeline object
 """
 import unittest
+from mock import patch
 from nose.tools import raises
 from nose.tools import eq_
 
 from datetime import timedelta
 from ..etl_pipeline import ETLPipeline
+from ...config import Config
+from ...pipeline.tests.fake_datapipeline import FakeDataPipelineConnection
+from ...utils.exceptions import ETLConfigError
 from ...utils.exceptions import ETLInputError
 
 
@@ -59,3 +63,135 @@ class EtlPipelineTests(unittest.TestCase):
         _s3_uri is bad
         """
         self.default_pipeline._s3_uri('TEST_DATA_TYPE')
+
+    def test_input_node_producing_step(self):
+        """Test that steps depend on the step producing their input node
+        """
+        first, second = self.default_pipeline.create_steps([
+            {'step_type': 'transform', 'command': 'echo first'},
+            {'step_type': 'transform', 'command': 'echo second'},
+        ])
+        eq_(self.default_pipeline.producing_step(first.output), first)
+        eq_(self.default_pipeline.producing_step(second.output), second)
+        eq_(self.default_pipeline.producing_step(
+            self.default_pipeline.schedule), None)
+        eq_(second.activities[0].depends_on, first.activities[0])
+
+    def test_teardown_depends_on_real_activities(self):
+        """Test that the teardown depends on the sink activities of the
+        pipeline and not on copies of them
+        """
+        first, second = self.default_pipeline.create_steps([
+            {'step_type': 'transform', 'command': 'echo first'},
+            {'step_type': 'transform', 'command': 'echo second'},
+        ])
+        third = self.default_pipeline.create_steps([
+            {'step_type': 'transform', 'command': 'echo third'},
+        ])[0]
+        teardown = self.default_pipeline.create_teardown_step()[0]
+
+        result = teardown.activities[0].depends_on
+        eq_(len(result), 2)
+        eq_(set(id(a) for a in result),
+            set([id(second.activities[0]), id(third.activities[0])]))
+
+    def test_update_skips_unchanged_pipeline(self):
+        """Test that only changed pipelines are put and activated in update
+        mode, using a local fake of the DataPipeline API
+        """
+        conn = FakeDataPipelineConnection()
+
+        def compile_pipeline(command):
+            """Compile a pipeline with a single transform step
+            """
+            etl = ETLPipeline('test_update')
+            etl.create_steps([{
+                'step_type': 'transform',
+                'command': command,
+                'no_output': True,
+            }])
+            etl.create_teardown_step()
+            return etl
+
+        with patch('dataduct.pipeline.data_pipeline.'
+                   'get_datapipeline_connection', return_value=conn):
+            # No deployed definition so the pipeline is put
+            etl = compile_pipeline('echo hello')
+            eq_(etl.validate(update=True), [])
+            assert not etl.unchanged
+            etl.pipeline.activate()
+            eq_(conn.calls['PutPipelineDefinition'], 1)
+
+            # Nothing changed so the put and the activation are skipped
+            etl = compile_pipeline('echo hello')
+            eq_(etl.validate(update=True), [])
+            assert etl.unchanged
+            assert not etl.diff
+            etl.activate()
+            eq_(conn.calls['PutPipelineDefinition'], 1)
+            eq_(conn.calls['ActivatePipeline'], 1)
+
+            # The changed command is reported and the pipeline is put
+            etl = compile_pipeline('echo changed')
+            eq_(etl.validate(update=True), [])
+            assert not etl.unchanged
+            eq_(etl.diff.added, [])
+            eq_(etl.diff.removed, [])
+            eq_(etl.diff.changed.keys(),
+                ['TransformStep0.ShellCommandActivity0'])
+            eq_(conn.calls['PutPipelineDefinition'], 2)
+
+    @staticmethod
+    def test_completion_markers():
+        """Test that the teardown writes a completion marker and that
+        dependencies can wait for the markers with preconditions
+        """
+        with patch.dict(Config().etl, {'COMPLETION_MARKER_PATH': 'markers'}):
+            etl = ETLPipeline('test_markers')
+            etl.create_steps([{
+                'step_type': 'pipeline-dependencies',
+                'dependent_pipelines': ['first', 'second'],
+                'wait_for_markers': True,
+            }])
+            etl.create_teardown_step()
+
+        objects = dict(
+            (o['id'], o) for o in etl.pipeline_objects())
+        activity = objects['PipelineDependenciesStep0.ShellCommandActivity0']
+        eq_([p['type'] for p in activity['precondition']],
+            ['S3KeyExists', 'S3KeyExists'])
+        assert activity['precondition'][0]['s3Key'].endswith(
+            "/markers/first/#{format(@scheduledStartTime,'YYYY-MM-dd')}"
+            "/_SUCCESS")
+
+        marker = objects['CompletionMarker.ShellCommandActivity0']
+        eq_(marker['dependsOn'],
+            objects['TransformStep1.ShellCommandActivity0'])
+        assert marker['output']['directoryPath'].uri.endswith(
+            "/markers/%s/#{format(@scheduledStartTime,'YYYY-MM-dd')}/" %
+            etl.name)
+
+    @staticmethod
+    @raises(ETLConfigError)
+    def test_completion_marker_name_is_reserved():
+        """Test that a step cannot take the name of the completion marker
+        """
+        with patch.dict(Config().etl, {'COMPLETION_MARKER_PATH': 'markers'}):
+            etl = ETLPipeline('test_markers')
+            etl.create_steps([{
+                'step_type': 'transform',
+                'name': 'CompletionMarker',
+                'command': 'echo done',
+                'no_output': True,
+            }])
+            etl.create_teardown_step()
+
+    @raises(ETLInputError)
+    def test_markers_need_a_path(self):
+        """Test that waiting for markers needs the marker path in the config
+        """
+        self.default_pipeline.create_steps([{
+            'step_type': 'pipeline-dependencies',
+            'dependent_pipelines': ['first'],
+            'wait_for_markers': True,
+        }])
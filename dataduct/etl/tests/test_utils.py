@@ -0,0 +1,56 @@
+"""Tests for the step registry
+"""
+import subprocess
+import sys
+import unittest
+from nose.tools import eq_
+from nose.tools import raises
+
+from ..utils import STEP_CLASSES
+from ..utils import StepConfig
+from ...steps import STEP_MODULES
+from ...steps import TransformStep
+
+
+class StepConfigTests(unittest.TestCase):
+    """Tests for the step registry
+    """
+
+    @staticmethod
+    def test_step_classes_are_imported_once():
+        """Test that step types resolve to the step classes
+        """
+        step_config = StepConfig()
+        assert 'transform' in step_config
+        assert step_config['transform'] is TransformStep
+        assert step_config['transform'] is step_config['transform']
+        eq_(step_config.keys(), sorted(STEP_CLASSES))
+
+    @staticmethod
+    def test_step_types_and_package_agree():
+        """Test that every step type maps to a class exported by the package
+        """
+        for step_type, step_class in STEP_CLASSES.iteritems():
+            module_name, class_name = step_class.rsplit('.', 1)
+            eq_(STEP_MODULES.get(class_name), module_name, step_type)
+        eq_(set(STEP_MODULES) - set(step_class.rsplit('.', 1)[1]
+                                    for step_class in STEP_CLASSES.values()),
+            set(['ETLStep']))
+
+    @staticmethod
+    @raises(KeyError)
+    def test_unknown_step_type():
+        """Test that unknown step types are not found
+        """
+        StepConfig()['not-a-step']
+
+    @staticmethod
+    def test_steps_are_not_imported_eagerly():
+        """Test that importing the etl package does not import the steps
+        """
+        output = subprocess.check_output([
+            sys.executable, '-W', 'ignore', '-c',
+            'import sys; import dataduct.etl; '
+            'print sorted(m for m in sys.modules if m.startswith('
+            '"dataduct.steps.") and sys.modules[m])'])
+        eq_(output.strip(), '[]')
@@ -1,64 +1,102 @@
 """Utility functions for processing etl steps
 """
 import imp
+
+from .. import steps as steps_package
 from ..config import Config
-from ..steps import *  # noqa
+from ..steps import STEP_CLASSES
 from ..utils.helpers import parse_path
 from ..utils.exceptions import ETLInputError
 
-STEP_CLASSES = {
-    'column-check': ColumnCheckStep,
-    'count-check': CountCheckStep,
-    'create-load-redshift': CreateAndLoadStep,
-    'create-update-sql': CreateUpdateSqlStep,
-    'delta-load': DeltaLoadStep,
-    'emr-step': EMRJobStep,
-    'emr-streaming': EMRStreamingStep,
-    'extract-local': ExtractLocalStep,
-    'extract-rds': ExtractRdsStep,
-    'extract-redshift': ExtractRedshiftStep,
-    'extract-postgres': ExtractPostgresStep,
-    'extract-s3': ExtractS3Step,
-    'load-redshift': LoadRedshiftStep,
-    'load-postgres': LoadPostgresStep,
-    'load-reload-pk': LoadReloadAndPrimaryKeyStep,
-    'pipeline-dependencies': PipelineDependenciesStep,
-    'primary-key-check': PrimaryKeyCheckStep,
-    'qa-transform': QATransformStep,
-    'reload': ReloadStep,
-    'sql-command': SqlCommandStep,
-    'transform': TransformStep,
-    'upsert': UpsertStep,
-}
-
 
 def get_custom_steps():
-    """Fetch the custom steps specified in config
+    """Fetch the definitions of the custom steps specified in config
+
+    Returns:
+        result(dict): custom step definitions keyed by their step type
     """
     config = Config()
-    custom_steps = dict()
+    return dict((step_def['step_type'], step_def)
+                for step_def in getattr(config, 'custom_steps', list()))
+
+
+def load_custom_step(step_def):
+    """Load the class of a custom step from its source file
+
+    Args:
+        step_def(dict): custom step definition from the config
+
+    Returns:
+        step_class(ETLStep): class of the custom step
+    """
+    from ..steps import ETLStep
+
+    step_type = step_def['step_type']
+    path = parse_path(step_def['file_path'], 'CUSTOM_STEPS_PATH')
+
+    # Load source from the file path provided
+    step_mod = imp.load_source(step_type, path)
+
+    # Get the step class based on class_name provided
+    step_class = getattr(step_mod, step_def['class_name'])
+
+    # Check if step_class is of type ETLStep
+    if not issubclass(step_class, ETLStep):
+        raise ETLInputError('Step type %s is not of type ETLStep' %
+                            step_class.__name__)
+    return step_class
+
+
+class StepConfig(object):
+    """Step classes keyed by step type, imported when a type is first used
+
+    Custom steps from the config take precedence over the dataduct steps
+    with the same step type.
+    """
+    def __init__(self):
+        """Constructor for the StepConfig class
+        """
+        self._custom_steps = None
+        self._classes = dict()
+
+    @property
+    def custom_steps(self):
+        """Definitions of the custom steps, read from the config once
+        """
+        if self._custom_steps is None:
+            self._custom_steps = get_custom_steps()
+        return self._custom_steps
 
-    for step_def in getattr(config, 'custom_steps', list()):
-        step_type = step_def['step_type']
-        path = parse_path(step_def['file_path'], 'CUSTOM_STEPS_PATH')
+    def keys(self):
+        """All the step types that can be used
+        """
+        return sorted(set(STEP_CLASSES) | set(self.custom_steps))
 
-        # Load source from the file path provided
-        step_mod = imp.load_source(step_type, path)
+    def __contains__(self, step_type):
+        return step_type in self.custom_steps or step_type in STEP_CLASSES
 
-        # Get the step class based on class_name provided
-        step_class = getattr(step_mod, step_def['class_name'])
+    def __getitem__(self, step_type):
+        """Get the class of a step type, importing it if needed
 
-        # Check if step_class is of type ETLStep
-        if not issubclass(step_class, ETLStep):
-            raise ETLInputError('Step type %s is not of type ETLStep' %
-                                step_class.__name__)
+        Args:
+            step_type(str): step type used in pipeline definitions
 
-        custom_steps[step_type] = step_class
-    return custom_steps
+        Returns:
+            step_class(ETLStep): class of the step type
+        """
+        if step_type not in self._classes:
+            if step_type in self.custom_steps:
+                step_class = load_custom_step(self.custom_steps[step_type])
+            elif step_type in STEP_CLASSES:
+                step_class = getattr(
+                    steps_package, STEP_CLASSES[step_type].rsplit('.', 1)[1])
+            else:
+                raise KeyError(step_type)
+            self._classes[step_type] = step_class
+        return self._classes[step_type]
 
 
-STEP_CONFIG = STEP_CLASSES.copy()
-STEP_CONFIG.update(get_custom_steps())
+STEP_CONFIG = StepConfig()
 
 
 def process_steps(steps_params):
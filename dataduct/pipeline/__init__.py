@@ -2,12 +2,15 @@ from .activity import Activity
 from .copy_activity import CopyActivity
 from .data_pipeline import DataPipeline
 from .default_object import DefaultObject
+from .definition_diff import DefinitionDiff
+from .dependency_closure import DependencyClosure
 from .ec2_resource import Ec2Resource
 from .emr_resource import EmrResource
 from .emr_activity import EmrActivity
 from .mysql_node import MysqlNode
 from .postgres_node import PostgresNode
 from .postgres_database import PostgresDatabase
+from .pipeline_catalog import PipelineCatalog
 from .pipeline_object import PipelineObject
 from .precondition import Precondition
 from .redshift_copy_activity import RedshiftCopyActivity
@@ -2,11 +2,15 @@
 Base class for data pipeline instance
 """
 import json
+import yaml
+from boto.datapipeline.exceptions import InvalidRequestException
 from collections import defaultdict
 
+from .pipeline_catalog import get_pipeline_catalog
 from .pipeline_object import PipelineObject
 from .utils import list_pipeline_instances
 from .utils import get_datapipeline_connection
+from .utils import get_response_from_boto
 from ..utils.exceptions import ETLInputError
 
 
@@ -32,6 +36,9 @@ class DataPipeline(object):
         """
         self.conn = get_datapipeline_connection()
         self.objects = []
+        self._aws_format = None
+        self._definition_json = None
+        self._definition_yaml = None
 
         if pipeline_id:
             if unique_id or name:
@@ -48,6 +55,7 @@ class DataPipeline(object):
             response = self.custom_create_pipeline(
                 name, unique_id, description, tags)
             self.pipeline_id = response['pipelineId']
+            get_pipeline_catalog().add(self.pipeline_id, name)
 
     @property
     def id(self):
@@ -62,10 +70,39 @@ class DataPipeline(object):
     def aws_format(self):
         """Create a list aws readable format dicts of all pipeline objects
 
+        Note:
+            The list is built once and cached until an object is added, so
+            it should not be modified and changes made to the objects after
+            it was built are not reflected.
+
         Returns:
             result(list of dict): list of AWS-readable dict of all objects
         """
-        return [x.aws_format() for x in self.objects]
+        if self._aws_format is None:
+            self._aws_format = [x.aws_format() for x in self.objects]
+        return self._aws_format
+
+    @property
+    def definition_json(self):
+        """JSON serialization of the aws format, created once
+
+        Returns:
+            result(str): JSON list of the AWS-readable dict of all objects
+        """
+        if self._definition_json is None:
+            self._definition_json = json.dumps(self.aws_format)
+        return self._definition_json
+
+    @property
+    def definition_yaml(self):
+        """YAML serialization of the aws format, created once
+
+        Returns:
+            result(str): YAML list of the AWS-readable dict of all objects
+        """
+        if self._definition_yaml is None:
+            self._definition_yaml = yaml.dump(self.aws_format)
+        return self._definition_yaml
 
     def add_object(self, pipeline_object):
         """Add an object to the datapipeline
@@ -78,28 +115,66 @@ class DataPipeline(object):
                 'pipeline object must be of the type PipelineObject')
 
         self.objects.append(pipeline_object)
+        self._aws_format = None
+        self._definition_json = None
+        self._definition_yaml = None
+
+    def _definition_request(self, action):
+        """Send the serialized definition to the DataPipeline API
+
+        Note:
+            The request body is built around the cached JSON of the objects
+            instead of serializing them again for every call like boto does.
+
+        Args:
+            action(str): DataPipeline API action taking a pipeline definition
+
+        Returns:
+            response(dict): response of the API
+        """
+        body = '{"pipelineId": %s, "pipelineObjects": %s}' % (
+            json.dumps(self.id), self.definition_json)
+        return get_response_from_boto(
+            self.conn.make_request, action=action, body=body)
 
     def validate_pipeline_definition(self):
         """Validate the current pipeline
         """
-        response = self.conn.validate_pipeline_definition(
-            self.aws_format, self.id)
+        response = self._definition_request('ValidatePipelineDefinition')
         return response.get('validationErrors', None)
 
     def update_pipeline_definition(self):
         """Updates the datapipeline definition
         """
-        self.conn.put_pipeline_definition(self.aws_format, self.id)
+        self._definition_request('PutPipelineDefinition')
+
+    def deployed_definition(self, version='active'):
+        """Fetch the definition of the pipeline stored on AWS
+
+        Args:
+            version(str): version of the definition, can be active or latest
+
+        Returns:
+            result(list of dict): AWS-readable dict of all objects, None if
+            the pipeline has no definition of that version
+        """
+        try:
+            response = get_response_from_boto(
+                self.conn.get_pipeline_definition, self.id, version)
+        except InvalidRequestException:
+            return None
+        return response.get('pipelineObjects', None)
 
     def activate(self):
         """Activate the datapipeline
         """
-        self.conn.activate_pipeline(self.id)
+        get_response_from_boto(self.conn.activate_pipeline, self.id)
 
     def delete(self):
         """Deletes the datapipeline
         """
-        self.conn.delete_pipeline(self.pipeline_id)
+        get_response_from_boto(self.conn.delete_pipeline, self.pipeline_id)
+        get_pipeline_catalog().remove(self.pipeline_id)
 
     def instance_details(self):
         """List details of all the pipeline instances
@@ -108,8 +183,9 @@ class DataPipeline(object):
             result(dict of list): Dictionary mapping run date to a list of
             pipeline instances combined per date
         """
-        # Get instances associated with the pipeline id
-        instances = list_pipeline_instances(self.pipeline_id, self.conn)
+        # Get instances associated with the pipeline id, described by
+        # workers with their own connections
+        instances = list_pipeline_instances(self.pipeline_id)
 
         # Collect instances by start date
         result = defaultdict(list)
@@ -132,5 +208,6 @@ class DataPipeline(object):
             params['description'] = description
         if tags is not None:
             params['tags'] = tags
-        return self.conn.make_request(action='CreatePipeline',
+        return get_response_from_boto(self.conn.make_request,
+                                      action='CreatePipeline',
                                       body=json.dumps(params))
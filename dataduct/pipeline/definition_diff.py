@@ -0,0 +1,148 @@
+"""
+Object level diff between a deployed and a local pipeline definition
+"""
+import re
+from datetime import datetime
+from pytimeparse import parse
+
+from ..utils.constants import VERSION_NAME_PLACEHOLDER
+
+VERSION_NAME_REGEX = re.compile(r'version_\d{14}')
+
+START_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def find_version_name(pipeline_objects):
+    """Find the version name used in the paths of a pipeline definition
+
+    Args:
+        pipeline_objects(list of dict): pipeline objects in the AWS format
+
+    Returns:
+        result(str): version name of the pipeline, None if there is none
+    """
+    for pipeline_object in pipeline_objects:
+        for field in pipeline_object['fields']:
+            match = VERSION_NAME_REGEX.search(field.get('stringValue', ''))
+            if match:
+                return match.group()
+    return None
+
+
+def normalize_start_time(start_time, period, occurrences=None):
+    """Offset of a schedule start time within its period
+
+    Note:
+        The date of a start time depends on the time of compilation, so only
+        the time of day is kept. For periods shorter than a day, the start
+        time is also moved back by whole periods at compilation, so only the
+        offset within the period is kept.
+
+    Args:
+        start_time(str): startDateTime of the schedule
+        period(str): period of the schedule
+        occurrences(str): number of runs of a one-time schedule
+
+    Returns:
+        result(str): offset of the start time formatted as HH:MM:SS
+    """
+    start_time = datetime.strptime(start_time, START_TIME_FORMAT)
+    offset = start_time.hour * 3600 + start_time.minute * 60 + \
+        start_time.second
+    period_seconds = parse(period) if period else None
+    if not occurrences and period_seconds and \
+            period_seconds < SECONDS_PER_DAY:
+        offset %= period_seconds
+    return '%02d:%02d:%02d' % (offset // 3600, offset % 3600 // 60,
+                               offset % 60)
+
+
+def normalize_definition(pipeline_objects):
+    """Normalize pipeline objects so that definitions can be compared
+
+    Note:
+        Version names are replaced with a placeholder, schedule start times
+        are reduced to their offset within the period and the fields are
+        sorted.
+
+    Args:
+        pipeline_objects(list of dict): pipeline objects in the AWS format
+
+    Returns:
+        result(dict): object ids mapped to a sorted list of field tuples
+    """
+    result = dict()
+    for pipeline_object in pipeline_objects:
+        fields = pipeline_object['fields']
+        values = dict((field['key'], field.get('stringValue'))
+                      for field in fields)
+
+        normalized = [('name', 'stringValue', pipeline_object['name'])]
+        for field in fields:
+            if values.get('type') == 'Schedule' and \
+                    field['key'] == 'startDateTime':
+                normalized.append((field['key'], 'stringValue',
+                                   normalize_start_time(
+                                       field['stringValue'],
+                                       values.get('period'),
+                                       values.get('occurrences'))))
+            elif 'refValue' in field:
+                normalized.append((field['key'], 'refValue',
+                                   field['refValue']))
+            else:
+                normalized.append((field['key'], 'stringValue',
+                                   VERSION_NAME_REGEX.sub(
+                                       VERSION_NAME_PLACEHOLDER,
+                                       field.get('stringValue', ''))))
+        result[pipeline_object['id']] = sorted(normalized)
+    return result
+
+
+class DefinitionDiff(object):
+    """Semantic differences between a deployed and a local definition
+
+    The diff is empty, and evaluates to False, when the two definitions only
+    differ in their version names and in the dates of schedule start times.
+    """
+    def __init__(self, deployed_objects, local_objects):
+        """Constructor for the DefinitionDiff class
+
+        Args:
+            deployed_objects(list of dict): objects of the deployed pipeline
+            local_objects(list of dict): objects of the local pipeline
+        """
+        self.deployed_version_name = find_version_name(deployed_objects)
+        deployed = normalize_definition(deployed_objects)
+        local = normalize_definition(local_objects)
+
+        self.added = sorted(set(local) - set(deployed))
+        self.removed = sorted(set(deployed) - set(local))
+
+        # Changed objects map to the removed and the added fields
+        self.changed = dict()
+        for object_id in set(local) & set(deployed):
+            if local[object_id] != deployed[object_id]:
+                self.changed[object_id] = (
+                    sorted(set(deployed[object_id]) - set(local[object_id])),
+                    sorted(set(local[object_id]) - set(deployed[object_id])),
+                )
+
+    def __nonzero__(self):
+        """The diff is True if the definitions differ
+        """
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        """Formatted output of the diff, one line per object or field
+        """
+        output = ['+ %s' % object_id for object_id in self.added]
+        output.extend('- %s' % object_id for object_id in self.removed)
+        for object_id in sorted(self.changed):
+            output.append('~ %s' % object_id)
+            removed, added = self.changed[object_id]
+            output.extend('    - %s: %s' % (key, value)
+                          for key, _, value in removed)
+            output.extend('    + %s: %s' % (key, value)
+                          for key, _, value in added)
+        return '\n'.join(output)
@@ -0,0 +1,114 @@
+"""
+Memoized transitive closure of the dependencies between activities
+"""
+from ..utils.exceptions import ETLInputError
+
+
+class DependencyClosure(object):
+    """Reachability cache for the dependsOn graph of a pipeline
+
+    Every activity that is seen is assigned a bit, and the set of activities
+    it transitively depends on is cached as an integer bitmask. Each activity
+    is only expanded once, so pruning the dependencies of a step costs time
+    linear in the number of activities instead of the number of paths.
+
+    Note:
+        Cached closures are only valid as long as the dependsOn fields of the
+        cached activities do not change. Call invalidate with the activities
+        before changing their dependencies.
+    """
+    def __init__(self):
+        """Constructor for the DependencyClosure class
+        """
+        self._bits = dict()
+        self._masks = dict()
+
+    @staticmethod
+    def _dependencies(activity):
+        """Direct dependencies of an activity as a list
+        """
+        dependencies = activity.depends_on
+        if dependencies is None:
+            return []
+        if not isinstance(dependencies, list):
+            return [dependencies]
+        return dependencies
+
+    def _bit(self, activity):
+        """Bit assigned to the activity, created on first use
+        """
+        if activity not in self._bits:
+            self._bits[activity] = 1 << len(self._bits)
+        return self._bits[activity]
+
+    def _ancestor_mask(self, activity):
+        """Bitmask of all the activities the activity transitively depends on
+
+        Note:
+            The graph is walked with an explicit stack so that long chains of
+            steps do not hit the recursion limit.
+        """
+        if activity in self._masks:
+            return self._masks[activity]
+
+        path = set([activity])
+        stack = [(activity, iter(self._dependencies(activity)))]
+        while stack:
+            current, dependencies = stack[-1]
+            dependency = next(dependencies, None)
+            if dependency is not None:
+                if dependency in self._masks:
+                    continue
+                if dependency in path:
+                    raise ETLInputError(
+                        'Circular dependency found at %s' % dependency.id)
+                path.add(dependency)
+                stack.append(
+                    (dependency, iter(self._dependencies(dependency))))
+                continue
+
+            stack.pop()
+            path.discard(current)
+            mask = 0
+            for dependency in self._dependencies(current):
+                mask |= self._masks[dependency] | self._bit(dependency)
+            self._masks[current] = mask
+
+        return self._masks[activity]
+
+    def ancestors(self, activity):
+        """All the activities that the activity transitively depends on
+
+        Args:
+            activity(Activity): activity whose dependencies are resolved
+
+        Returns:
+            result(set of Activity): transitive dependencies of the activity
+        """
+        mask = self._ancestor_mask(activity)
+        return set(a for a, bit in self._bits.iteritems() if mask & bit)
+
+    def prune(self, activities):
+        """Remove the activities that others in the list already depend on
+
+        Args:
+            activities(list of Activity): activities to be depended upon
+
+        Returns:
+            result(list of Activity): the activities that are not transitive
+            dependencies of any other activity in the input
+        """
+        activity_set = set(activities)
+        covered = 0
+        for activity in activity_set:
+            covered |= self._ancestor_mask(activity)
+        return [a for a in activity_set if not covered & self._bit(a)]
+
+    def invalidate(self, activities):
+        """Drop the cached closures before the activities change dependencies
+
+        Args:
+            activities(list of Activity): activities about to be changed
+        """
+        if any(activity in self._masks for activity in activities):
+            self._masks.clear()
@@ -0,0 +1,134 @@
+"""
+Catalog of the pipelines of the account indexed by name and id
+"""
+import threading
+
+from .utils import list_pipelines
+
+
+class PipelineCatalog(object):
+    """Pipelines of the account listed once and indexed by name and id
+
+    The list is fetched on the first lookup. Pipelines created or deleted
+    through dataduct afterwards are added to or removed from the index
+    instead of listing all the pipelines again, and refresh can be called
+    to pick up changes made by other processes.
+    """
+    def __init__(self, conn=None):
+        """Constructor for the PipelineCatalog class
+
+        Args:
+            conn(DataPipelineConnection): boto connection to datapipeline
+        """
+        self.conn = conn
+        self._lock = threading.RLock()
+        self._names = None
+        self._ids = None
+
+    @property
+    def loaded(self):
+        """Whether the pipelines were listed already
+        """
+        return self._names is not None
+
+    def refresh(self):
+        """List the pipelines of the account again
+        """
+        names = dict()
+        ids = dict()
+        for pipeline in list_pipelines(self.conn):
+            names[pipeline['id']] = pipeline['name']
+            ids.setdefault(pipeline['name'], []).append(pipeline['id'])
+        with self._lock:
+            self._names = names
+            self._ids = ids
+
+    def _load(self):
+        """List the pipelines unless they were listed already
+        """
+        with self._lock:
+            if not self.loaded:
+                self.refresh()
+
+    def ids(self, name):
+        """Ids of the pipelines with a name
+
+        Args:
+            name(str): name of the pipelines
+
+        Returns:
+            result(list of str): ids in the order they were listed
+        """
+        self._load()
+        with self._lock:
+            return list(self._ids.get(name, []))
+
+    def name(self, pipeline_id):
+        """Name of the pipeline with an id
+
+        Args:
+            pipeline_id(str): id of the pipeline
+
+        Returns:
+            result(str): name of the pipeline, None if it does not exist
+        """
+        self._load()
+        with self._lock:
+            return self._names.get(pipeline_id)
+
+    def __contains__(self, name):
+        """Check if a pipeline with a name exists
+        """
+        return bool(self.ids(name))
+
+    def __iter__(self):
+        """Iterate over the (name, id) of all the pipelines
+        """
+        self._load()
+        with self._lock:
+            pipelines = sorted((n, i) for i, n in self._names.iteritems())
+        return iter(pipelines)
+
+    def add(self, pipeline_id, name):
+        """Add a pipeline created after the pipelines were listed
+
+        Args:
+            pipeline_id(str): id of the pipeline
+            name(str): name of the pipeline
+        """
+        with self._lock:
+            if not self.loaded or pipeline_id in self._names:
+                return
+            self._names[pipeline_id] = name
+            self._ids.setdefault(name, []).append(pipeline_id)
+
+    def remove(self, pipeline_id):
+        """Remove a pipeline deleted after the pipelines were listed
+
+        Args:
+            pipeline_id(str): id of the pipeline
+        """
+        with self._lock:
+            if not self.loaded or pipeline_id not in self._names:
+                return
+            name = self._names.pop(pipeline_id)
+            self._ids[name].remove(pipeline_id)
+            if not self._ids[name]:
+                del self._ids[name]
+
+
+_pipeline_catalog = None
+_pipeline_catalog_lock = threading.Lock()
+
+
+def get_pipeline_catalog():
+    """Get the catalog shared by everything in the process
+
+    Returns:
+        PipelineCatalog: catalog of the process
+    """
+    global _pipeline_catalog
+    with _pipeline_catalog_lock:
+        if _pipeline_catalog is None:
+            _pipeline_catalog = PipelineCatalog()
+        return _pipeline_catalog
@@ -56,7 +56,7 @@ class PipelineObject(object):
         Returns:
             result(list of S3Files): List of files to be uploaded to s3
         """
-        result = self.additional_s3_files
+        result = list(self.additional_s3_files)
         for _, values in self.fields.iteritems():
             for value in values:
                 if isinstance(value, S3File) or isinstance(value, S3Directory):
@@ -12,16 +12,25 @@ class Precondition(PipelineObject):
     def __init__(self,
                  id,
                  is_directory=True,
+                 s3_key=None,
                  **kwargs):
         """Constructor for the Precondition class
 
         Args:
             id(str): id of the precondition object
             is_directory(bool): if s3 path is a directory or not
+            s3_key(str): uri of an S3 key that must exist, instead of the
+                path of the node
             **kwargs(optional): Keyword arguments directly passed to base class
         """
 
-        if is_directory:
+        if s3_key is not None:
+            super(Precondition, self).__init__(
+                id=id,
+                type='S3KeyExists',
+                s3Key=s3_key,
+            )
+        elif is_directory:
             super(Precondition, self).__init__(
                 id=id,
                 type='S3PrefixNotEmpty',
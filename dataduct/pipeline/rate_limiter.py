@@ -0,0 +1,162 @@
+"""
+Token bucket rate limiter shared by all the calls to the DataPipeline API
+"""
+import random
+import threading
+import time
+
+import logging
+logger = logging.getLogger(__name__)
+
+THROTTLING_ERROR_CODES = set(['ThrottlingException', 'Throttling'])
+
+
+def is_throttling_error(error):
+    """Check if an exception is a rate limit error of an AWS API
+
+    Args:
+        error(Exception): exception raised by a boto call
+
+    Returns:
+        result(bool): True if the request was throttled
+    """
+    return getattr(error, 'error_code', None) in THROTTLING_ERROR_CODES
+
+
+class RateLimiter(object):
+    """Thread safe token bucket with a jittered backoff on throttling
+
+    Every call takes a token from a bucket that is refilled at a fixed rate
+    and holds at most burst tokens. When a call is throttled anyway, all the
+    threads sharing the limiter pause for a random delay that grows with the
+    number of consecutive throttles, so they back off together instead of
+    retrying on their own schedule.
+    """
+    def __init__(self, rate, burst=1, max_backoff=60, base_backoff=1):
+        """Constructor for the RateLimiter class
+
+        Args:
+            rate(float): tokens added to the bucket per second
+            burst(int): maximum number of tokens in the bucket
+            max_backoff(float): maximum seconds to pause after a throttle
+            base_backoff(float): seconds to pause after the first throttle
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError('Rate must be positive and burst at least one')
+
+        self.rate = float(rate)
+        self.burst = burst
+        self.max_backoff = max_backoff
+        self.base_backoff = base_backoff
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = time.time()
+        self._paused_until = 0
+        self._consecutive_throttles = 0
+
+        self.calls = 0
+        self.throttles = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.latency_seconds = 0.0
+        self.max_latency_seconds = 0.0
+
+    def _reserve(self):
+        """Take a token and return the seconds to wait before using it
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= 1
+
+            # A negative balance is a token borrowed from the future
+            delay = max(-self._tokens / self.rate, self._paused_until - now)
+            if delay > 0:
+                self.waits += 1
+                self.wait_seconds += delay
+            return delay
+
+    def acquire(self):
+        """Block until the next request is allowed
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttled(self):
+        """Pause all the threads after a rate limit error
+
+        Returns:
+            delay(float): seconds until requests are allowed again
+        """
+        with self._lock:
+            self.throttles += 1
+            self._consecutive_throttles += 1
+            cap = min(self.max_backoff, self.base_backoff *
+                      2 ** (self._consecutive_throttles - 1))
+            # Half of the delay is fixed and half is jitter
+            delay = cap / 2.0 + random.uniform(0, cap / 2.0)
+            self._paused_until = max(self._paused_until, time.time() + delay)
+            # Tokens collected before the throttle are not trusted anymore
+            self._tokens = min(self._tokens, 0)
+            return delay
+
+    def _record(self, latency, throttled):
+        """Update the counters after a request
+        """
+        with self._lock:
+            self.calls += 1
+            self.latency_seconds += latency
+            self.max_latency_seconds = max(self.max_latency_seconds, latency)
+            if not throttled:
+                self._consecutive_throttles = 0
+
+    def call(self, fn, *args, **kwargs):
+        """Call a function when allowed and retry it when throttled
+
+        Args:
+            fn(function): Function to call
+            args(optional): arguments
+            kwargs(optional): keyword arguments
+
+        Returns:
+            response: result of the function
+        """
+        while True:
+            self.acquire()
+            start = time.time()
+            try:
+                response = fn(*args, **kwargs)
+            except Exception, error:
+                self._record(time.time() - start, is_throttling_error(error))
+                if not is_throttling_error(error):
+                    raise
+                delay = self.throttled()
+                logger.warning('Rate limit exceeded. Retrying in %.1f '
+                               'seconds.', delay)
+            else:
+                self._record(time.time() - start, False)
+                return response
+
+    @property
+    def stats(self):
+        """Counters of the calls made through the limiter
+
+        Returns:
+            result(dict): number of calls, throttles and waits with the
+            seconds spent waiting and the average and maximum latency
+        """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'throttles': self.throttles,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'average_latency_seconds':
+                    self.latency_seconds / self.calls if self.calls else 0.0,
+                'max_latency_seconds': self.max_latency_seconds,
+            }
@@ -0,0 +1,131 @@
+"""Local fake of the DataPipeline API used by the tests
+"""
+import json
+import threading
+from collections import defaultdict
+
+from boto.datapipeline.exceptions import InvalidRequestException
+
+PAGE_SIZE = 2
+
+
+class FakeDataPipelineConnection(object):
+    """In memory stand-in for the boto DataPipelineConnection
+
+    Pipelines are keyed by their unique id, the latest definition is stored
+    on put and copied to the active definition on activation. The number of
+    calls of every action is counted in calls. Instances are dicts of fields
+    stored per pipeline id in instances.
+    """
+    def __init__(self):
+        self.pipelines = dict()
+        self.latest = dict()
+        self.active = dict()
+        self.instances = defaultdict(dict)
+        self.calls = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def _count(self, action):
+        with self.lock:
+            self.calls[action] += 1
+
+    def make_request(self, action, body):
+        """Handles the requests made without the boto methods
+        """
+        params = json.loads(body)
+        if action == 'ValidatePipelineDefinition':
+            return self.validate_pipeline_definition(
+                params['pipelineObjects'], params['pipelineId'])
+        if action == 'PutPipelineDefinition':
+            return self.put_pipeline_definition(
+                params['pipelineObjects'], params['pipelineId'])
+        if action != 'CreatePipeline':
+            raise NotImplementedError(action)
+
+        self.calls[action] += 1
+        pipeline_id = self.pipelines.setdefault(
+            params['uniqueId'], 'df-%d' % self.calls[action])
+        return {'pipelineId': pipeline_id}
+
+    def validate_pipeline_definition(self, pipeline_objects, pipeline_id):
+        self._count('ValidatePipelineDefinition')
+        return {'validationErrors': []}
+
+    def put_pipeline_definition(self, pipeline_objects, pipeline_id):
+        self._count('PutPipelineDefinition')
+        self.latest[pipeline_id] = json.loads(json.dumps(pipeline_objects))
+        return {'errored': False}
+
+    def get_pipeline_definition(self, pipeline_id, version=None):
+        self._count('GetPipelineDefinition')
+        definitions = self.active if version == 'active' else self.latest
+        if pipeline_id not in definitions:
+            raise InvalidRequestException(
+                400, 'Bad Request', {'message': 'No definition found'})
+        return {'pipelineObjects': definitions[pipeline_id]}
+
+    def list_pipelines(self, marker=None):
+        self._count('ListPipelines')
+        start = int(marker or 0)
+        pipelines = sorted(self.pipelines.iteritems(), key=lambda p: p[1])
+        page = [{'id': pipeline_id, 'name': name}
+                for name, pipeline_id in pipelines[start:start + PAGE_SIZE]]
+        has_more_results = start + PAGE_SIZE < len(pipelines)
+        return {
+            'pipelineIdList': page,
+            'hasMoreResults': has_more_results,
+            'marker': str(start + PAGE_SIZE) if has_more_results else None,
+        }
+
+    def delete_pipeline(self, pipeline_id):
+        self._count('DeletePipeline')
+        for name, existing_id in self.pipelines.items():
+            if existing_id == pipeline_id:
+                del self.pipelines[name]
+        return {}
+
+    @staticmethod
+    def _selected(fields, selector):
+        value = fields.get(selector['fieldName'])
+        operator = selector['operator']
+        values = operator['values']
+        if operator['type'] == 'EQ':
+            return value in values
+        if operator['type'] == 'BETWEEN':
+            return value is not None and values[0] <= value <= values[1]
+        if operator['type'] == 'GE':
+            return value is not None and value >= values[0]
+        if operator['type'] == 'LE':
+            return value is not None and value <= values[0]
+        raise NotImplementedError(operator['type'])
+
+    def query_objects(self, pipeline_id, sphere, marker=None, query=None,
+                      limit=None):
+        self._count('QueryObjects')
+        selectors = query['selectors'] if query else []
+        ids = sorted(
+            instance_id
+            for instance_id, fields in self.instances[pipeline_id].items()
+            if all(self._selected(fields, s) for s in selectors))
+        start = int(marker or 0)
+        has_more_results = start + PAGE_SIZE < len(ids)
+        return {
+            'ids': ids[start:start + PAGE_SIZE],
+            'hasMoreResults': has_more_results,
+            'marker': str(start + PAGE_SIZE) if has_more_results else None,
+        }
+
+    def describe_objects(self, object_ids, pipeline_id):
+        self._count('DescribeObjects')
+        instances = self.instances[pipeline_id]
+        return {'pipelineObjects': [{
+            'id': instance_id,
+            'name': instance_id,
+            'fields': [{'key': k, 'stringValue': v}
+                       for k, v in sorted(instances[instance_id].items())],
+        } for instance_id in object_ids]}
+
+    def activate_pipeline(self, pipeline_id):
+        self._count('ActivatePipeline')
+        self.active[pipeline_id] = self.latest[pipeline_id]
+        return {}
@@ -0,0 +1,50 @@
+"""Tests for the DataPipeline object
+"""
+import json
+import yaml
+
+import unittest
+from mock import patch
+from nose.tools import eq_
+
+from ..data_pipeline import DataPipeline
+from ..pipeline_object import PipelineObject
+from .fake_datapipeline import FakeDataPipelineConnection
+
+
+class DataPipelineTests(unittest.TestCase):
+    """Tests for the DataPipeline object
+    """
+
+    def setUp(self):
+        """Setup a pipeline on a fake connection
+        """
+        self.conn = FakeDataPipelineConnection()
+        with patch('dataduct.pipeline.data_pipeline.'
+                   'get_datapipeline_connection', return_value=self.conn):
+            self.pipeline = DataPipeline(unique_id='test_pipeline')
+        self.pipeline.add_object(PipelineObject('Object0', type='Test'))
+
+    def test_aws_format_is_cached(self):
+        """Test that the definition is serialized once until objects change
+        """
+        result = self.pipeline.aws_format
+        assert self.pipeline.aws_format is result
+        definition_json = self.pipeline.definition_json
+        assert self.pipeline.definition_json is definition_json
+        eq_(json.loads(definition_json), result)
+        eq_(yaml.load(self.pipeline.definition_yaml), result)
+
+        self.pipeline.add_object(PipelineObject('Object1', type='Test'))
+        eq_([o['id'] for o in self.pipeline.aws_format],
+            ['Object0', 'Object1'])
+        eq_(len(json.loads(self.pipeline.definition_json)), 2)
+        eq_(len(yaml.load(self.pipeline.definition_yaml)), 2)
+
+    def test_definition_requests(self):
+        """Test that the serialized definition is sent to the API
+        """
+        eq_(self.pipeline.validate_pipeline_definition(), [])
+        self.pipeline.update_pipeline_definition()
+        eq_(self.conn.calls['ValidatePipelineDefinition'], 1)
+        eq_(self.conn.latest[self.pipeline.id], self.pipeline.aws_format)
@@ -0,0 +1,117 @@
+"""Tests for the diff between pipeline definitions
+"""
+import unittest
+from copy import deepcopy
+from nose.tools import eq_
+
+from ..definition_diff import DefinitionDiff
+
+
+def string_field(key, value):
+    """Field with a string value in the AWS format
+    """
+    return {'key': key, 'stringValue': value}
+
+
+class DefinitionDiffTests(unittest.TestCase):
+    """Tests for the diff between pipeline definitions
+    """
+
+    def setUp(self):
+        """Setup a deployed definition with a schedule and an activity
+        """
+        self.deployed = [{
+            'id': 'Schedule0',
+            'name': 'Schedule0',
+            'fields': [
+                string_field('type', 'Schedule'),
+                string_field('startDateTime', '2015-01-01T01:00:00'),
+                string_field('period', '1 day'),
+            ],
+        }, {
+            'id': 'Activity0',
+            'name': 'Activity0',
+            'fields': [
+                string_field('type', 'ShellCommandActivity'),
+                string_field('command', 'echo hello'),
+                string_field(
+                    'scriptUri', 's3://bucket/src/version_20150101010000/a'),
+                {'key': 'schedule', 'refValue': 'Schedule0'},
+            ],
+        }]
+
+    def test_version_and_start_date_are_ignored(self):
+        """Test that recompiling the same pipeline gives an empty diff
+        """
+        local = deepcopy(self.deployed)
+        local[0]['fields'][1] = string_field(
+            'startDateTime', '2015-02-01T01:00:00')
+        local[1]['fields'][2] = string_field(
+            'scriptUri', 's3://bucket/src/version_20150201010000/a')
+        local[1]['fields'].reverse()
+
+        diff = DefinitionDiff(self.deployed, local)
+        assert not diff
+        eq_(diff.deployed_version_name, 'version_20150101010000')
+        eq_(str(diff), '')
+
+    def test_object_level_changes(self):
+        """Test that added, removed and changed objects are reported
+        """
+        local = deepcopy(self.deployed)
+        local[1]['fields'][1] = string_field('command', 'echo changed')
+        local[1]['id'] = local[1]['name'] = 'Activity1'
+        local.append(deepcopy(self.deployed[1]))
+        local[2]['fields'][1] = string_field('command', 'echo changed')
+        local[0]['fields'][2] = string_field('period', '1 hour')
+
+        diff = DefinitionDiff(self.deployed, local)
+        assert diff
+        eq_(diff.added, ['Activity1'])
+        eq_(diff.removed, [])
+        eq_(sorted(diff.changed), ['Activity0', 'Schedule0'])
+        eq_(diff.changed['Activity0'], (
+            [('command', 'stringValue', 'echo hello')],
+            [('command', 'stringValue', 'echo changed')],
+        ))
+        eq_(str(diff).splitlines(), [
+            '+ Activity1',
+            '~ Activity0',
+            '    - command: echo hello',
+            '    + command: echo changed',
+            '~ Schedule0',
+            '    - period: 1 day',
+            '    - startDateTime: 01:00:00',
+            '    + period: 1 hour',
+            '    + startDateTime: 00:00:00',
+        ])
+
+    def test_load_time_changes_are_reported(self):
+        """Test that a change of the time of day of the schedule is a diff
+        """
+        local = deepcopy(self.deployed)
+        local[0]['fields'][1] = string_field(
+            'startDateTime', '2015-02-01T02:30:00')
+
+        diff = DefinitionDiff(self.deployed, local)
+        assert diff
+        eq_(diff.changed, {'Schedule0': (
+            [('startDateTime', 'stringValue', '01:00:00')],
+            [('startDateTime', 'stringValue', '02:30:00')],
+        )})
+
+    def test_hourly_start_time_offsets(self):
+        """Test that hourly schedules only compare the offset in the hour
+        """
+        self.deployed[0]['fields'][2] = string_field('period', '1 hour')
+        local = deepcopy(self.deployed)
+        local[0]['fields'][1] = string_field(
+            'startDateTime', '2015-02-01T00:00:00')
+        assert not DefinitionDiff(self.deployed, local)
+
+        local[0]['fields'][1] = string_field(
+            'startDateTime', '2015-02-01T00:15:00')
+        eq_(DefinitionDiff(self.deployed, local).changed, {'Schedule0': (
+            [('startDateTime', 'stringValue', '00:00:00')],
+            [('startDateTime', 'stringValue', '00:15:00')],
+        )})
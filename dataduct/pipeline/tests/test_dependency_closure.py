@@ -0,0 +1,73 @@
+"""Tests for the dependency closure of activities
+"""
+import unittest
+from nose.tools import eq_
+from nose.tools import raises
+
+from ..dependency_closure import DependencyClosure
+from ...utils.exceptions import ETLInputError
+
+
+class FakeActivity(object):
+    """Minimal activity with an id and dependencies
+    """
+    def __init__(self, id, depends_on=None):
+        self.id = id
+        self.depends_on = depends_on if depends_on is not None else []
+
+
+class DependencyClosureTests(unittest.TestCase):
+    """Tests for the dependency closure of activities
+    """
+
+    def setUp(self):
+        """Setup a diamond shaped graph: top <- (left, right) <- bottom
+        """
+        self.top = FakeActivity('top')
+        self.left = FakeActivity('left', [self.top])
+        self.right = FakeActivity('right', self.top)
+        self.bottom = FakeActivity('bottom', [self.left, self.right])
+        self.closure = DependencyClosure()
+
+    def test_ancestors(self):
+        """Test the transitive dependencies of the activities
+        """
+        eq_(self.closure.ancestors(self.top), set())
+        eq_(self.closure.ancestors(self.right), set([self.top]))
+        eq_(self.closure.ancestors(self.bottom),
+            set([self.top, self.left, self.right]))
+
+    def test_prune(self):
+        """Test that activities covered by other activities are removed
+        """
+        result = self.closure.prune(
+            [self.top, self.left, self.right, self.left])
+        eq_(sorted(a.id for a in result), ['left', 'right'])
+        eq_(self.closure.prune([self.bottom, self.top]), [self.bottom])
+
+    def test_invalidate(self):
+        """Test that changed dependencies are picked up after invalidation
+        """
+        other = FakeActivity('other')
+        eq_(self.closure.ancestors(self.left), set([self.top]))
+
+        self.closure.invalidate([self.top])
+        self.top.depends_on = [other]
+        eq_(self.closure.ancestors(self.bottom),
+            set([self.top, self.left, self.right, other]))
+
+    def test_long_chain(self):
+        """Test that long chains do not hit the recursion limit
+        """
+        chain = [FakeActivity('activity0')]
+        for index in range(1, 5000):
+            chain.append(FakeActivity('activity%d' % index, [chain[-1]]))
+        eq_(len(self.closure.ancestors(chain[-1])), 4999)
+        eq_(self.closure.prune(chain), [chain[-1]])
+
+    @raises(ETLInputError)
+    def test_circular_dependency(self):
+        """Test that circular dependencies raise an error
+        """
+        self.top.depends_on = [self.bottom]
+        self.closure.ancestors(self.bottom)
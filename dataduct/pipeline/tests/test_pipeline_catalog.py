@@ -0,0 +1,55 @@
+"""Tests for the pipeline catalog
+"""
+import unittest
+from mock import patch
+from nose.tools import eq_
+
+from ..data_pipeline import DataPipeline
+from ..pipeline_catalog import PipelineCatalog
+from .fake_datapipeline import FakeDataPipelineConnection
+
+
+class PipelineCatalogTests(unittest.TestCase):
+    """Tests for the pipeline catalog
+    """
+
+    def setUp(self):
+        """Setup an account with a few pipelines on a fake connection
+        """
+        self.conn = FakeDataPipelineConnection()
+        for index in range(5):
+            self.conn.make_request(
+                'CreatePipeline', '{"uniqueId": "pipeline_%d"}' % index)
+        self.catalog = PipelineCatalog(self.conn)
+
+    def test_pipelines_are_listed_once(self):
+        """Test that all the lookups use a single listing
+        """
+        eq_(self.catalog.ids('pipeline_3'), ['df-4'])
+        eq_(self.catalog.name('df-1'), 'pipeline_0')
+        assert 'pipeline_4' in self.catalog
+        assert 'pipeline_5' not in self.catalog
+        eq_(len(list(self.catalog)), 5)
+
+        # Three pages of two pipelines
+        eq_(self.conn.calls['ListPipelines'], 3)
+
+    def test_created_and_deleted_pipelines_are_indexed(self):
+        """Test that pipelines created and deleted through dataduct update
+        the catalog without listing again
+        """
+        eq_(self.catalog.ids('pipeline_0'), ['df-1'])
+        with patch('dataduct.pipeline.data_pipeline.'
+                   'get_datapipeline_connection', return_value=self.conn), \
+                patch('dataduct.pipeline.data_pipeline.get_pipeline_catalog',
+                      return_value=self.catalog):
+            DataPipeline(pipeline_id='df-1').delete()
+            DataPipeline(unique_id='pipeline_new')
+
+        assert 'pipeline_0' not in self.catalog
+        eq_(self.catalog.ids('pipeline_new'), ['df-6'])
+        eq_(self.conn.calls['ListPipelines'], 3)
+
+        self.catalog.refresh()
+        eq_(sorted(name for name, _ in self.catalog),
+            ['pipeline_%d' % i for i in range(1, 5)] + ['pipeline_new'])
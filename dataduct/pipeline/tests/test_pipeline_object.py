@@ -0,0 +1,24 @@
+"""Tests for the base pipeline object
+"""
+import unittest
+from nose.tools import eq_
+
+from ..pipeline_object import PipelineObject
+from ...s3 import S3File
+
+
+class PipelineObjectTests(unittest.TestCase):
+    """Tests for the base pipeline object
+    """
+
+    def test_s3_files_do_not_accumulate(self):
+        """Test that reading the s3 files does not add them again
+        """
+        script = S3File(text='echo script')
+        extra = S3File(text='echo extra')
+        pipeline_object = PipelineObject('Object0', scriptUri=script)
+        pipeline_object.add_additional_files([extra])
+
+        eq_(pipeline_object.s3_files, [extra, script])
+        eq_(pipeline_object.s3_files, [extra, script])
+        eq_(pipeline_object.additional_s3_files, [extra])
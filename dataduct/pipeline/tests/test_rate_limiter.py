@@ -0,0 +1,101 @@
+"""Tests for the DataPipeline API rate limiter
+"""
+import unittest
+from mock import patch
+from nose.tools import eq_
+from nose.tools import raises
+
+from boto.exception import JSONResponseError
+
+from ..rate_limiter import RateLimiter
+
+
+class FakeClock(object):
+    """Clock that only moves forward when sleeping
+    """
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def throttling_error():
+    """Error raised by boto when a request is throttled
+    """
+    return JSONResponseError(
+        400, 'Bad Request', {'__type': 'ThrottlingException'})
+
+
+class RateLimiterTests(unittest.TestCase):
+    """Tests for the DataPipeline API rate limiter
+    """
+
+    def setUp(self):
+        """Replace the clock of the limiter
+        """
+        self.clock = FakeClock()
+        self.patcher = patch('dataduct.pipeline.rate_limiter.time',
+                             self.clock)
+        self.patcher.start()
+
+    def tearDown(self):
+        """Restore the clock of the limiter
+        """
+        self.patcher.stop()
+
+    def test_burst_then_rate(self):
+        """Test that calls beyond the burst are spaced by the rate
+        """
+        limiter = RateLimiter(rate=2, burst=3)
+        for _ in range(5):
+            limiter.call(lambda: None)
+
+        eq_(self.clock.sleeps, [0.5, 0.5])
+        stats = limiter.stats
+        eq_(stats['calls'], 5)
+        eq_(stats['waits'], 2)
+        eq_(stats['wait_seconds'], 1.0)
+        eq_(stats['throttles'], 0)
+
+    def test_throttles_are_retried_with_backoff(self):
+        """Test that throttled calls back off and are retried
+        """
+        limiter = RateLimiter(rate=100, burst=100, max_backoff=4)
+        errors = [throttling_error() for _ in range(4)]
+
+        def request():
+            """Fails until all the errors are raised
+            """
+            if errors:
+                raise errors.pop()
+            return 'response'
+
+        with patch('random.uniform', side_effect=lambda low, high: high):
+            eq_(limiter.call(request), 'response')
+
+        eq_(self.clock.sleeps, [1, 2, 4, 4])
+        eq_(limiter.stats['throttles'], 4)
+        eq_(limiter.stats['calls'], 5)
+
+    @raises(ValueError)
+    def test_other_errors_are_raised(self):
+        """Test that errors other than throttling are not retried
+        """
+        limiter = RateLimiter(rate=1)
+
+        def request():
+            """Fails with a non retryable error
+            """
+            raise ValueError()
+
+        try:
+            limiter.call(request)
+        finally:
+            eq_(limiter.stats['calls'], 1)
+            eq_(self.clock.sleeps, [])
@@ -0,0 +1,99 @@
+"""Tests for the DataPipeline API utility functions
+"""
+import threading
+import unittest
+from datetime import datetime
+from mock import patch
+from nose.tools import eq_
+
+from ..utils import instance_query
+from ..utils import list_pipeline_instances
+from .fake_datapipeline import FakeDataPipelineConnection
+
+
+class ListPipelineInstancesTests(unittest.TestCase):
+    """Tests for listing the instances of a pipeline
+    """
+
+    def setUp(self):
+        """Setup a pipeline with ten days of daily instances
+        """
+        self.conn = FakeDataPipelineConnection()
+        for day in range(1, 11):
+            self.conn.instances['df-0']['@Activity_2015-01-%02d' % day] = {
+                '@scheduledStartTime': '2015-01-%02dT01:00:00' % day,
+                '@status': 'FINISHED' if day % 2 else 'FAILED',
+            }
+
+    def test_all_instances_in_order(self):
+        """Test that all the instances are described in batches
+        """
+        instances = list_pipeline_instances(
+            'df-0', self.conn, increment=3, workers=3)
+        assert not isinstance(instances, list)
+
+        eq_([i['id'] for i in instances],
+            ['@Activity_2015-01-%02d' % day for day in range(1, 11)])
+        eq_(self.conn.calls['DescribeObjects'], 4)
+
+    def test_connection_per_worker(self):
+        """Test that the describe workers do not share a connection
+        """
+        connected = []
+        described = []
+        describe_objects = self.conn.describe_objects
+
+        def connect():
+            """Record the thread that opened a connection
+            """
+            connected.append(threading.current_thread())
+            return self.conn
+
+        def record_describe(*args):
+            """Record the thread that described instances
+            """
+            described.append(threading.current_thread())
+            return describe_objects(*args)
+
+        with patch('dataduct.pipeline.utils.get_datapipeline_connection',
+                   side_effect=connect), \
+                patch.object(self.conn, 'describe_objects',
+                             side_effect=record_describe):
+            instances = list(list_pipeline_instances(
+                'df-0', increment=3, workers=3))
+
+        eq_(len(instances), 10)
+        eq_(len(described), 4)
+        assert threading.current_thread() not in described
+        assert set(described) <= set(connected)
+        eq_(len(connected), len(set(connected)))
+
+    def test_selected_instances(self):
+        """Test that the query only selects the requested instances
+        """
+        instances = list(list_pipeline_instances(
+            'df-0', self.conn,
+            start_time=datetime(2015, 1, 3),
+            end_time='2015-01-07T00:00:00',
+            statuses=['FAILED'],
+        ))
+        eq_([i['@scheduledStartTime'] for i in instances],
+            ['2015-01-04T01:00:00', '2015-01-06T01:00:00'])
+        eq_(self.conn.calls['DescribeObjects'], 1)
+
+    def test_no_instances(self):
+        """Test that nothing is described when no instance is selected
+        """
+        eq_(list(list_pipeline_instances(
+            'df-0', self.conn, statuses=['RUNNING'])), [])
+        eq_(self.conn.calls['DescribeObjects'], 0)
+
+    @staticmethod
+    def test_instance_query():
+        """Test the selectors of the instance query
+        """
+        eq_(instance_query(), None)
+        eq_(instance_query(end_time=datetime(2015, 1, 2)), {'selectors': [{
+            'fieldName': '@scheduledStartTime',
+            'operator': {'type': 'LE', 'values': ['2015-01-02T00:00:00']},
+        }]})
@@ -3,47 +3,59 @@ Shared utility functions
 """
 from boto.datapipeline import regions
 from boto.datapipeline.layer1 import DataPipelineConnection
-from time import sleep
+from datetime import datetime
+from multiprocessing.pool import ThreadPool
 import dateutil.parser
+import threading
 
 from dataduct.config import Config
+from .rate_limiter import RateLimiter
 
 config = Config()
 REGION = config.etl.get('REGION', None)
+DP_API_RATE = config.etl.get('DP_API_RATE', 5)
+DP_API_BURST = config.etl.get('DP_API_BURST', 10)
+DP_API_MAX_BACKOFF = config.etl.get('DP_API_MAX_BACKOFF', 60)
 
 DP_ACTUAL_END_TIME = '@actualEndTime'
 DP_ATTEMPT_COUNT_KEY = '@attemptCount'
 DP_INSTANCE_ID_KEY = 'id'
 DP_INSTANCE_STATUS_KEY = '@status'
+DP_SCHEDULED_START_TIME = '@scheduledStartTime'
+DP_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+DESCRIBE_WORKERS = 4
 
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
 
-def _update_sleep_time(last_time=None):
-    """Expotentially decay sleep times between calls incase of failures
+# Connections are not thread safe, each describe worker keeps its own
+_connections = threading.local()
 
-    Note:
-        Start time for sleep is 5 and the max is 60
 
-    Args:
-        last_time(int): time used in the last iteration
+def get_rate_limiter():
+    """Get the rate limiter shared by all the DataPipeline API calls
 
-    Returns:
-        next_time(int): time to sleep in the next iteration of the code
+    Note:
+        The limiter is created once per process from the DP_API_RATE,
+        DP_API_BURST and DP_API_MAX_BACKOFF settings of the etl config
 
+    Returns:
+        RateLimiter: limiter of the process
     """
-    start_sleep_time = 5
-    max_sleep_time = 60
-
-    if last_time is None:
-        return start_sleep_time
-
-    return min(last_time * 2, max_sleep_time)
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(
+                DP_API_RATE, DP_API_BURST, DP_API_MAX_BACKOFF)
+        return _rate_limiter
 
 
 def get_response_from_boto(fn, *args, **kwargs):
-    """Expotentially decay sleep times between calls incase of failures
+    """Call the DataPipeline API through the shared rate limiter
 
     Note:
-        If there is a rate limit error, sleep until the error goes away
+        If there is a rate limit error, all the callers back off with a
+        jittered delay and the call is retried until the error goes away
 
     Args:
         func(function): Function to call
@@ -58,20 +70,7 @@ def get_response_from_boto(fn, *args, **kwargs):
         args(optional): arguments
         kwargs(optional): keyword arguments
     """
-
-    response = None
-    sleep_time = None
-    while response is None:
-        try:
-            response = fn(*args, **kwargs)
-        except Exception, error:
-            if error.error_code != 'ThrottlingException':
-                raise
-            else:
-                sleep_time = _update_sleep_time(sleep_time)
-                print "Rate limit exceeded. Sleeping %d seconds." % sleep_time
-                sleep(sleep_time)
-    return response
+    return get_rate_limiter().call(fn, *args, **kwargs)
 
 
 def get_list_from_boto(func, response_key, *args, **kwargs):
@@ -102,51 +101,133 @@ def get_list_from_boto(func, response_key, *args, **kwargs):
     return results
 
 
-def list_pipeline_instances(pipeline_id, conn=None, increment=25):
-    """List details of all the pipeline instances
+def _selector_time(value):
+    """Format a datetime for a query selector, strings are kept as is
+    """
+    if isinstance(value, datetime):
+        return value.strftime(DP_DATETIME_FORMAT)
+    return value
+
+
+def instance_query(start_time=None, end_time=None, statuses=None):
+    """Query selecting pipeline instances on the server side
+
+    Args:
+        start_time(datetime or str): earliest scheduled start time
+        end_time(datetime or str): latest scheduled start time
+        statuses(list of str): statuses of the instances to select
+
+    Returns:
+        query(dict): query for query_objects, None to select everything
+    """
+    selectors = []
+    if start_time is not None and end_time is not None:
+        selectors.append({
+            'fieldName': DP_SCHEDULED_START_TIME,
+            'operator': {
+                'type': 'BETWEEN',
+                'values': [_selector_time(start_time),
+                           _selector_time(end_time)],
+            },
+        })
+    elif start_time is not None or end_time is not None:
+        selectors.append({
+            'fieldName': DP_SCHEDULED_START_TIME,
+            'operator': {
+                'type': 'GE' if start_time is not None else 'LE',
+                'values': [_selector_time(start_time or end_time)],
+            },
+        })
+
+    if statuses:
+        selectors.append({
+            'fieldName': DP_INSTANCE_STATUS_KEY,
+            'operator': {'type': 'EQ', 'values': list(statuses)},
+        })
+
+    if not selectors:
+        return None
+    return {'selectors': selectors}
+
+
+def _instance_dict(pipeline_object):
+    """Flatten the fields of a described pipeline instance
+    """
+    pipeline_dict = dict(
+        (
+            sub_dict['key'],
+            sub_dict.get('stringValue', sub_dict.get('refValue', None))
+        )
+        for sub_dict in pipeline_object['fields']
+    )
+    pipeline_dict['id'] = pipeline_object['id']
+    return pipeline_dict
+
+
+def list_pipeline_instances(pipeline_id, conn=None, increment=25,
+                            start_time=None, end_time=None, statuses=None,
+                            workers=DESCRIBE_WORKERS):
+    """List details of the pipeline instances
+
+    Note:
+        The instances are described in batches by a pool of threads sharing
+        the rate limit of the API, each with its own connection. Instances
+        are yielded in the order of their ids as soon as their batch is
+        described. A connection given by the caller is not shared between
+        threads, so its batches are described one at a time.
 
     Args:
         pipeline_id(str): id of the pipeline
-        conn(DataPipelineConnection): boto connection to datapipeline
+        conn(DataPipelineConnection): boto connection to datapipeline, a
+            connection per thread if None
         increment(int): rate of increments in API calls
+        start_time(datetime or str): earliest scheduled start time
+        end_time(datetime or str): latest scheduled start time
+        statuses(list of str): only list instances with these statuses
+        workers(int): maximum number of concurrent describe calls
 
-    Returns:
-        instances(list): list of pipeline instances
+    Yields:
+        instance(dict): fields of a pipeline instance
     """
+    shared_conn = conn is not None
     if conn is None:
         conn = get_datapipeline_connection()
 
-    # Get all instances
+    # Get the ids of the selected instances
+    query = instance_query(start_time, end_time, statuses)
     instance_ids = sorted(get_list_from_boto(conn.query_objects,
                                              'ids',
                                              pipeline_id,
-                                             'INSTANCE'))
-
-    # Collect all instance details
-    instances = []
-    for start in range(0, len(instance_ids), increment):
-
-        # Describe objects in batches as API is rate limited
-        response = get_response_from_boto(
-            conn.describe_objects,
-            instance_ids[start:start + increment],
-            pipeline_id,
-        )
-
-        for pipeline_object in response['pipelineObjects']:
-            pipeline_dict = dict(
-                (
-                    sub_dict['key'],
-                    sub_dict.get('stringValue', sub_dict.get('refValue', None))
-                )
-                for sub_dict in pipeline_object['fields']
-            )
-            pipeline_dict['id'] = pipeline_object['id']
-
-            # Append to all instances
-            instances.append(pipeline_dict)
-
-    return instances
+                                             'INSTANCE',
+                                             query=query))
+    batches = [instance_ids[start:start + increment]
+               for start in range(0, len(instance_ids), increment)]
+    if not batches:
+        return
+
+    def describe(batch, describe_conn=None):
+        """Describe a batch of instances, with the connection of the worker
+        thread if no connection is given
+        """
+        if describe_conn is None:
+            describe_conn = _thread_datapipeline_connection()
+        return get_response_from_boto(describe_conn.describe_objects,
+                                      batch, pipeline_id)['pipelineObjects']
+
+    if shared_conn:
+        for batch in batches:
+            for pipeline_object in describe(batch, conn):
+                yield _instance_dict(pipeline_object)
+        return
+
+    pool = ThreadPool(processes=max(1, min(workers, len(batches))))
+    try:
+        for pipeline_objects in pool.imap(describe, batches):
+            for pipeline_object in pipeline_objects:
+                yield _instance_dict(pipeline_object)
+    finally:
+        pool.terminate()
+        pool.join()
 
 
 def get_datapipeline_connection():
@@ -160,6 +241,17 @@ def get_datapipeline_connection():
     return conn
 
 
+def _thread_datapipeline_connection():
+    """Get the DataPipeline connection of the current worker thread
+
+    Returns:
+        DataPipelineConnection: boto connection created on first use
+    """
+    if getattr(_connections, 'conn', None) is None:
+        _connections.conn = get_datapipeline_connection()
+    return _connections.conn
+
+
 def list_pipelines(conn=None):
     """Fetch a list of all pipelines with boto
 
@@ -1,4 +1,7 @@
 from .s3_file import S3File
+from .s3_reader import S3Reader
 from .s3_path import S3Path
 from .s3_directory import S3Directory
 from .s3_log_path import S3LogPath
+from .content_store import content_addressed_dir
+from .upload_planner import UploadPlanner
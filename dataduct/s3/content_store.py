@@ -0,0 +1,84 @@
+"""
+Content addressed store for the source files of pipelines
+"""
+import hashlib
+import os
+
+from ..utils import constants as const
+from ..utils.helpers import get_s3_base_path
+from .s3_directory import S3Directory
+from .s3_path import S3Path
+from .utils import md5_digest
+
+CONTENT_STR = 'content'
+
+
+def content_store_dir():
+    """Root of the content addressed store
+
+    Returns:
+        s3_path(S3Path): directory under which the sources are stored
+    """
+    return S3Path(
+        uri=os.path.join(get_s3_base_path(), const.SRC_STR, CONTENT_STR),
+        is_directory=True,
+    )
+
+
+def content_digest(s3_object):
+    """Digest of the local contents of an S3 file or directory
+
+    Note:
+        The digest of a directory covers the relative paths and the MD5 of
+        every file in it.
+
+    Args:
+        s3_object(S3File or S3Directory): object with local contents
+
+    Returns:
+        result(str): hex digest of the contents
+    """
+    if not isinstance(s3_object, S3Directory):
+        return md5_digest(s3_object.path, s3_object.local_text)
+
+    digest = hashlib.md5()
+    for root, directories, file_names in os.walk(s3_object.path,
+                                                 followlinks=True):
+        directories.sort()
+        for file_name in sorted(file_names):
+            file_path = os.path.join(root, file_name)
+            digest.update(os.path.relpath(file_path, s3_object.path))
+            digest.update(md5_digest(file_path))
+    return digest.hexdigest()
+
+
+def content_addressed_dir(s3_object):
+    """Directory of the store where an S3 file or directory is kept
+
+    Args:
+        s3_object(S3File or S3Directory): object with local contents
+
+    Returns:
+        s3_path(S3Path): directory named after the digest of the contents
+    """
+    return S3Path(content_digest(s3_object), is_directory=True,
+                  parent_dir=content_store_dir())
+
+
+def content_addressed_prefix(bucket, key):
+    """Prefix of the digest directory if a key is in the content store
+
+    Args:
+        bucket(str): bucket of the key
+        key(str): key of a file
+
+    Returns:
+        result(str): key prefix of the digest directory containing the key,
+        None if the key is not in the content store
+    """
+    store = content_store_dir()
+    store_prefix = store.key.rstrip('/') + '/'
+    if bucket != store.bucket or not key.startswith(store_prefix):
+        return None
+    digest = key[len(store_prefix):].split('/')[0]
+    return store_prefix + digest + '/'
@@ -0,0 +1,61 @@
+"""
+Manifests listing the files loaded by a single Redshift COPY
+"""
+import json
+
+from ..utils.exceptions import ETLInputError
+from .s3_path import S3Path
+from .utils import get_s3_bucket
+from .utils import upload_to_s3
+
+
+def list_prefix_keys(input_uris):
+    """List the files a COPY from each of the S3 prefixes would load
+
+    Note:
+        Like COPY, every key starting with the prefix is matched, except the
+        keys of empty directories
+
+    Args:
+        input_uris(list of str): S3 uris of the prefixes
+
+    Returns:
+        files(list of tuple): S3 uri and size of the files, in order of the
+            prefixes
+    """
+    files = []
+    for input_uri in input_uris:
+        s3_path = S3Path(uri=input_uri)
+        prefix = s3_path.key
+        if input_uri.endswith('/'):
+            prefix += '/'
+        for key in get_s3_bucket(s3_path.bucket).list(prefix=prefix):
+            if not key.name.endswith('/'):
+                files.append(
+                    ('s3://%s/%s' % (s3_path.bucket, key.name), key.size))
+    return files
+
+
+def list_prefix_files(input_uris):
+    """List the S3 uris of the files a COPY from the S3 prefixes would load
+    """
+    return [uri for uri, _ in list_prefix_keys(input_uris)]
+
+
+def create_copy_manifest(file_uris, manifest_path):
+    """Write a COPY manifest to S3 in which every file is mandatory
+
+    Args:
+        file_uris(list of str): S3 uris of the files to be loaded
+        manifest_path(S3Path): path of the manifest
+
+    Raises:
+        ETLInputError: If there are no files to be loaded
+    """
+    if not file_uris:
+        raise ETLInputError('No files to load into the manifest %s' %
+                            manifest_path.uri)
+    manifest = {
+        'entries': [{'url': uri, 'mandatory': True} for uri in file_uris]
+    }
+    upload_to_s3(manifest_path, file_text=json.dumps(manifest, indent=2))
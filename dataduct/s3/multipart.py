@@ -0,0 +1,214 @@
+"""
+Parallel and resumable multipart upload of large files to S3
+"""
+import math
+import os
+import time
+
+from boto.s3.multipart import MultiPartUpload
+from boto.utils import compute_md5
+from multiprocessing.pool import ThreadPool
+from StringIO import StringIO
+
+from ..config import Config
+
+import logging
+logger = logging.getLogger(__name__)
+
+config = Config()
+PART_SIZE = config.etl.get('S3_MULTIPART_PART_SIZE', 64 * 1024 * 1024)
+PART_WORKERS = config.etl.get('S3_MULTIPART_WORKERS', 4)
+PART_RETRIES = 3
+
+# Limits of the S3 API
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+MAX_COPY_SIZE = 5 * 1024 * 1024 * 1024
+COPY_PART_SIZE = 512 * 1024 * 1024
+
+
+def plan_parts(size, part_size=PART_SIZE):
+    """Split a file in parts of at least part_size bytes
+
+    Note:
+        The part size is increased if the file would need more parts than
+        allowed by S3
+
+    Args:
+        size(int): size of the file in bytes
+        part_size(int): preferred size of the parts in bytes
+
+    Returns:
+        parts(list of tuple): (part number, offset, size) of every part
+    """
+    part_size = max(part_size, MIN_PART_SIZE,
+                    int(math.ceil(size / float(MAX_PARTS))))
+    offsets = xrange(0, max(size, 1), part_size)
+    return [(index + 1, offset, min(part_size, size - offset))
+            for index, offset in enumerate(offsets)]
+
+
+def _find_upload(bucket, key_name):
+    """Find an unfinished multipart upload of a key to resume
+
+    Returns:
+        upload(MultiPartUpload): latest unfinished upload, None if none
+    """
+    uploads = [u for u in bucket.get_all_multipart_uploads(prefix=key_name)
+               if u.key_name == key_name]
+    if not uploads:
+        return None
+    return max(uploads, key=lambda u: u.initiated)
+
+
+def _thread_upload(upload):
+    """Get a multipart upload bound to the S3 connection of the thread
+
+    Note:
+        Connections are not shared between threads, so the workers address
+        the upload by its id on the bucket of their own connection
+
+    Args:
+        upload(MultiPartUpload): upload initiated by any thread
+
+    Returns:
+        upload(MultiPartUpload): same upload on the bucket of the thread
+    """
+    from .utils import get_s3_bucket
+    thread_upload = MultiPartUpload(get_s3_bucket(upload.bucket.name))
+    thread_upload.key_name = upload.key_name
+    thread_upload.id = upload.id
+    return thread_upload
+
+
+def multipart_upload(bucket, key_name, file_name=None, file_text=None,
+                     part_size=PART_SIZE, workers=PART_WORKERS,
+                     retries=PART_RETRIES, resume=True):
+    """Upload a file to S3 in parts uploaded by a pool of threads
+
+    Note:
+        Every part is read from disk by the thread uploading it, so at most
+        one part per worker is in memory. Failed parts are retried and if
+        the upload still fails it is left unfinished, so the parts that were
+        uploaded are reused the next time the same key is uploaded.
+
+    Args:
+        bucket(boto.S3.bucket.Bucket): bucket to upload to
+        key_name(str): key of the uploaded file
+        file_name(str): Name of the file to be uploaded
+        file_text(str): Contents of the file to be uploaded
+        part_size(int): size of the parts in bytes
+        workers(int): maximum number of parts uploaded at once
+        retries(int): number of retries of a failed part
+        resume(bool): reuse the parts of an unfinished upload of the key
+    """
+    if file_name:
+        size = os.stat(file_name).st_size
+    else:
+        size = len(file_text)
+    parts = plan_parts(size, part_size)
+
+    upload = _find_upload(bucket, key_name) if resume else None
+    uploaded = dict()
+    if upload is not None:
+        uploaded = dict((p.part_number, (p.etag.strip('"'), p.size))
+                        for p in upload)
+        # All the listed parts are completed, so extra parts can not be kept
+        if max(uploaded.keys() or [0]) > len(parts):
+            upload.cancel_upload()
+            upload = None
+            uploaded = dict()
+        else:
+            logger.info('Resuming the upload of %s with %d uploaded parts',
+                        key_name, len(uploaded))
+    if upload is None:
+        upload = bucket.initiate_multipart_upload(key_name)
+
+    def upload_part(part):
+        """Upload a single part unless it was uploaded already
+        """
+        part_number, offset, part_length = part
+        part_upload = _thread_upload(upload)
+        if file_name:
+            fp = open(file_name, 'rb')
+        else:
+            fp = StringIO(file_text)
+        try:
+            fp.seek(offset)
+            md5 = compute_md5(fp, size=part_length)
+            if uploaded.get(part_number) == (md5[0], part_length):
+                return False
+
+            for attempt in range(retries + 1):
+                fp.seek(offset)
+                try:
+                    part_upload.upload_part_from_file(
+                        fp, part_number, md5=md5, size=part_length)
+                    return True
+                except Exception:
+                    if attempt == retries:
+                        raise
+                    logger.warning('Retrying part %d of %s', part_number,
+                                   key_name)
+                    time.sleep(2 ** attempt)
+        finally:
+            fp.close()
+
+    start = time.time()
+    done = 0
+    pool = ThreadPool(processes=max(1, min(workers, len(parts))))
+    try:
+        for _ in pool.imap_unordered(upload_part, parts):
+            done += 1
+            logger.info('Uploaded %d of %d parts of %s', done, len(parts),
+                        key_name)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        logger.error('Upload of %s failed, the uploaded parts are kept to '
+                     'resume it', key_name)
+        raise
+    finally:
+        pool.join()
+
+    upload.complete_upload()
+    logger.info('Uploaded %s (%d bytes) in %.2f seconds', key_name, size,
+                time.time() - start)
+
+
+def multipart_copy(src_key, dst_bucket, dst_key_name,
+                   part_size=COPY_PART_SIZE, workers=PART_WORKERS):
+    """Copy a key within S3 in parts copied by a pool of threads
+
+    Note:
+        Needed for keys over 5 GB, which can not be copied in one request
+
+    Args:
+        src_key(boto.S3.key.Key): key to be copied, with its size
+        dst_bucket(boto.S3.bucket.Bucket): bucket to copy to
+        dst_key_name(str): key of the copy
+        part_size(int): size of the parts in bytes
+        workers(int): maximum number of parts copied at once
+    """
+    parts = plan_parts(src_key.size, part_size)
+    upload = dst_bucket.initiate_multipart_upload(dst_key_name)
+
+    def copy_part(part):
+        """Copy a single byte range of the source key
+        """
+        part_number, offset, part_length = part
+        _thread_upload(upload).copy_part_from_key(
+            src_key.bucket.name, src_key.name, part_number, offset,
+            offset + part_length - 1)
+
+    pool = ThreadPool(processes=max(1, min(workers, len(parts))))
+    try:
+        pool.map(copy_part, parts)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        upload.cancel_upload()
+        raise
+    finally:
+        pool.join()
+    upload.complete_upload()
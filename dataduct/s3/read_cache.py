@@ -0,0 +1,176 @@
+"""
+On-disk read-through cache of objects on S3 validated with their ETag
+"""
+import atexit
+import errno
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+
+from boto.exception import S3ResponseError
+
+from ..config import Config
+from ..utils.exceptions import ETLInputError
+
+import logging
+logger = logging.getLogger(__name__)
+
+config = Config()
+CACHE_DIR = config.etl.get('S3_CACHE_DIR', None)
+CACHE_MAX_BYTES = config.etl.get('S3_CACHE_MAX_BYTES', 1024 * 1024 * 1024)
+
+HTTP_NOT_MODIFIED = 304
+HTTP_NOT_FOUND = 404
+
+_read_cache = None
+_read_cache_lock = threading.Lock()
+
+
+class S3ReadCache(object):
+    """Cache of S3 objects in a local directory
+
+    Note:
+        Every object is stored in a file named after the digest of its bucket
+        and key and its ETag, so processes sharing the directory only ever
+        see complete files. A cached object is only used after a conditional
+        GET confirms that its ETag is still current. The least recently used
+        objects are removed once the cache grows over max_bytes.
+    """
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES):
+        """Constructor for the read cache
+
+        Args:
+            directory(str): directory of the cached objects
+            max_bytes(int): maximum total size of the cached objects
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.stats = dict(hits=0, misses=0, bytes_downloaded=0)
+        self._lock = threading.Lock()
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def _entries(self, bucket_name, key_name):
+        """Digest and cached files of a key
+        """
+        digest = hashlib.sha1('%s/%s' % (bucket_name, key_name)).hexdigest()
+        return digest, glob.glob(os.path.join(self.directory, digest + '.*'))
+
+    def fetch(self, bucket, key_name):
+        """Local file with the current contents of a key
+
+        Args:
+            bucket(boto.S3.bucket.Bucket): bucket of the key
+            key_name(str): key to be read
+
+        Returns:
+            file_name(str): cached file with the contents of the key
+
+        Raises:
+            ETLInputError: If the key does not exist
+        """
+        digest, entries = self._entries(bucket.name, key_name)
+        headers = dict()
+        cached = None
+        if entries:
+            cached = max(entries, key=os.path.getmtime)
+            headers['If-None-Match'] = '"%s"' % cached.rsplit('.', 1)[1]
+
+        key = bucket.new_key(key_name)
+        fd, temp_file = tempfile.mkstemp(dir=self.directory, prefix='.')
+        os.close(fd)
+        try:
+            key.get_contents_to_filename(temp_file, headers=headers)
+        except Exception, error:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            if not isinstance(error, S3ResponseError):
+                raise
+            if error.status == HTTP_NOT_MODIFIED:
+                try:
+                    os.utime(cached, None)
+                except OSError:
+                    # Evicted by another process since it was found
+                    return self.fetch(bucket, key_name)
+                with self._lock:
+                    self.stats['hits'] += 1
+                return cached
+            if error.status == HTTP_NOT_FOUND:
+                raise ETLInputError('The key does not exist: s3://%s/%s' %
+                                    (bucket.name, key_name))
+            raise
+
+        file_name = os.path.join(
+            self.directory, '%s.%s' % (digest, key.etag.strip('"')))
+        os.rename(temp_file, file_name)
+        for old_file in entries:
+            if old_file != file_name:
+                try:
+                    os.remove(old_file)
+                except OSError, error:
+                    # Evicted by another process since it was found
+                    if error.errno != errno.ENOENT:
+                        raise
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self.stats['bytes_downloaded'] += os.path.getsize(file_name)
+        self._evict(keep=file_name)
+        return file_name
+
+    def read(self, bucket, key_name):
+        """Contents of a key read through the cache
+        """
+        with open(self.fetch(bucket, key_name), 'rb') as f:
+            return f.read()
+
+    def _evict(self, keep):
+        """Remove the least recently used files over the size limit
+        """
+        entries = []
+        for file_name in glob.glob(os.path.join(self.directory, '*')):
+            try:
+                stat = os.stat(file_name)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, file_name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if file_name == keep:
+                continue
+            try:
+                os.remove(file_name)
+            except OSError:
+                continue
+            total -= size
+
+    def log_stats(self):
+        """Log the hits and misses of the cache
+        """
+        logger.info('S3 read cache: %(hits)d hits, %(misses)d misses, '
+                    '%(bytes_downloaded)d bytes downloaded', self.stats)
+
+
+def get_read_cache():
+    """Get the read cache of the process
+
+    Note:
+        The cache is only used if S3_CACHE_DIR is set in the etl config. Its
+        hits and misses are logged when the process exits.
+
+    Returns:
+        S3ReadCache: cache of the process, None if there is no cache
+    """
+    global _read_cache
+    if not CACHE_DIR:
+        return None
+    with _read_cache_lock:
+        if _read_cache is None:
+            _read_cache = S3ReadCache(CACHE_DIR, CACHE_MAX_BYTES)
+            atexit.register(_read_cache.log_stats)
+        return _read_cache
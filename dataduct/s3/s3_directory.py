@@ -1,7 +1,10 @@
 """
 Base class for storing a S3 File
 """
+import os
+
 from .s3_path import S3Path
+from .utils import matches_s3
 from .utils import upload_dir_to_s3
 from ..utils.helpers import parse_path
 from ..utils.exceptions import ETLInputError
@@ -46,6 +49,25 @@ class S3Directory(object):
             raise ETLInputError('S3 path must be directory')
         self._s3_path = value
 
+    def matches_s3(self, s3_path):
+        """Check if the directory at the S3 path has the same files
+
+        Args:
+            s3_path(S3Path): path of the directory on S3 to compare with
+
+        Returns:
+            result(bool): True if every local file matches its S3 copy
+        """
+        for root, _, file_names in os.walk(self.path, followlinks=True):
+            for file_name in file_names:
+                local_file_path = os.path.join(root, file_name)
+                relative_path = os.path.relpath(local_file_path, self.path)
+                file_s3_path = S3Path(uri=os.path.join(
+                    's3://', s3_path.bucket, s3_path.key, relative_path))
+                if not matches_s3(file_s3_path, local_file_path):
+                    return False
+        return True
+
     def upload_to_s3(self):
         """Uploads the directory to the s3 directory
         """
@@ -1,9 +1,21 @@
 """
 Base class for storing a S3 File
 """
+import mmap
+import os
+import tempfile
+
+from contextlib import closing
+from contextlib import contextmanager
+from StringIO import StringIO
+
 from ..utils.exceptions import ETLInputError
 from ..utils.helpers import parse_path
 from .s3_path import S3Path
+from .s3_reader import READ_CHUNK_SIZE
+from .s3_reader import S3Reader
+from .s3_reader import get_s3_key
+from .utils import matches_s3
 from .utils import read_from_s3
 from .utils import upload_to_s3
 
@@ -49,6 +61,19 @@ class S3File(object):
         else:
             raise ETLInputError('No URI provided for the file to be uploaded')
 
+    def matches_s3(self, s3_path):
+        """Check if the file at the S3 path has the same contents
+
+        Args:
+            s3_path(S3Path): path of the file on S3 to compare with
+
+        Returns:
+            result(bool): True if the contents match or nothing is local
+        """
+        if self._path or self._text:
+            return matches_s3(s3_path, self._path, self._text)
+        return True
+
     @property
     def text(self):
         """Outputs the text of the associated file
@@ -65,6 +90,90 @@ class S3File(object):
                 return f.read()
         return read_from_s3(self._s3_path)
 
+    def open(self, chunk_size=READ_CHUNK_SIZE):
+        """Open the file for reading without loading it in memory
+
+        Args:
+            chunk_size(int): size in bytes of the ranged GETs on S3
+
+        Returns:
+            result(file): file object of the file. Can be local or on S3
+        """
+        if self._text:
+            return StringIO(self._text)
+        elif self._path:
+            return open(self._path, 'rb')
+        elif self._s3_path:
+            return S3Reader(self._s3_path, chunk_size)
+        raise ETLInputError('No path or text given for the file')
+
+    def iter_chunks(self, chunk_size=READ_CHUNK_SIZE):
+        """Iterate over the file in chunks of at most chunk_size bytes
+        """
+        with closing(self.open(chunk_size)) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def iter_lines(self, chunk_size=READ_CHUNK_SIZE):
+        """Iterate over the lines of the file, including the newlines
+        """
+        with closing(self.open(chunk_size)) as f:
+            for line in f:
+                yield line
+
+    @contextmanager
+    def mmap(self, directory=None):
+        """Memory map the file, spooled to a temporary file if not local
+
+        Note:
+            Files on S3 are downloaded in a single GET to a temporary file
+            which is removed on exit
+
+        Args:
+            directory(str): directory of the temporary file
+
+        Yields:
+            result(mmap.mmap): read-only memory map of the file
+        """
+        if self._path:
+            fd, file_name = os.open(self._path, os.O_RDONLY), None
+        else:
+            fd, file_name = tempfile.mkstemp(dir=directory)
+            with os.fdopen(os.dup(fd), 'wb') as f:
+                if self._text:
+                    f.write(self._text)
+                else:
+                    get_s3_key(self._s3_path).get_contents_to_file(f)
+        try:
+            # Empty files can not be mapped
+            if os.fstat(fd).st_size == 0:
+                yield ''
+            else:
+                mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+                try:
+                    yield mapped
+                finally:
+                    mapped.close()
+        finally:
+            os.close(fd)
+            if file_name:
+                os.remove(file_name)
+
+    @property
+    def path(self):
+        """Outputs the local path of the file, None if it is not local
+        """
+        return self._path
+
+    @property
+    def local_text(self):
+        """Outputs the text the file was created with, None if not given
+        """
+        return self._text
+
     @property
     def file_name(self):
         """The file name of this file
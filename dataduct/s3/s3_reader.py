@@ -0,0 +1,143 @@
+"""
+File-like reader of an object on S3 with ranged GETs
+"""
+from ..config import Config
+from ..utils.exceptions import ETLInputError
+from .s3_path import S3Path
+from .utils import get_s3_bucket
+
+config = Config()
+READ_CHUNK_SIZE = config.etl.get('S3_READ_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+def get_s3_key(s3_path):
+    """Get the key of an existing object on S3
+
+    Args:
+        s3_path(S3Path): path of the object
+
+    Returns:
+        key(boto.S3.key.Key): key with the size of the object
+
+    Raises:
+        ETLInputError: If the object does not exist
+    """
+    if not isinstance(s3_path, S3Path):
+        raise ETLInputError('Input path should be of type S3Path')
+
+    key = get_s3_bucket(s3_path.bucket).get_key(s3_path.key)
+    if key is None:
+        raise ETLInputError('The key does not exist: %s' % s3_path.uri)
+    return key
+
+
+class S3Reader(object):
+    """Read-only file object for an object on S3
+
+    Note:
+        The object is fetched one chunk at a time with ranged GETs, so at
+        most one chunk is held in memory and seeking only fetches the
+        chunks that are read
+    """
+    def __init__(self, s3_path, chunk_size=READ_CHUNK_SIZE):
+        """Constructor for the S3 reader
+
+        Args:
+            s3_path(S3Path): path of the object to be read
+            chunk_size(int): size in bytes of each ranged GET
+        """
+        self._key = get_s3_key(s3_path)
+        self.size = self._key.size
+        self.chunk_size = chunk_size
+        self.closed = False
+        self._position = 0
+        self._buffer = ''
+        self._buffer_offset = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        """Iterate over the lines of the object
+        """
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def _buffered(self):
+        """Offset in the buffer of the current position, fetching the chunk
+        with the current position if it is not in the buffer
+        """
+        if self.closed:
+            raise ValueError('I/O operation on closed file')
+        start = self._position - self._buffer_offset
+        if not 0 <= start < len(self._buffer):
+            end = min(self._position + self.chunk_size, self.size) - 1
+            self._buffer = self._key.get_contents_as_string(
+                headers={'Range': 'bytes=%d-%d' % (self._position, end)})
+            self._buffer_offset = self._position
+            start = 0
+        return start
+
+    def read(self, size=-1):
+        """Read at most size bytes, until the end of the object if negative
+
+        Returns:
+            result(str): bytes read, empty at the end of the object
+        """
+        parts = []
+        remaining = self.size - self._position
+        if size >= 0:
+            remaining = min(size, remaining)
+        while remaining > 0:
+            start = self._buffered()
+            part = self._buffer[start:start + remaining]
+            parts.append(part)
+            self._position += len(part)
+            remaining -= len(part)
+        return ''.join(parts)
+
+    def readline(self):
+        """Read until the end of the line, including the newline
+
+        Returns:
+            result(str): line read, empty at the end of the object
+        """
+        parts = []
+        while self._position < self.size:
+            start = self._buffered()
+            newline = self._buffer.find('\n', start)
+            end = len(self._buffer) if newline == -1 else newline + 1
+            parts.append(self._buffer[start:end])
+            self._position += end - start
+            if newline != -1:
+                break
+        return ''.join(parts)
+
+    def seek(self, offset, whence=0):
+        """Move to a position relative to the start, the current position or
+        the end of the object
+        """
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self.size
+        if offset < 0:
+            raise ValueError('Negative seek position %d' % offset)
+        self._position = offset
+
+    def tell(self):
+        """Current position in the object
+        """
+        return self._position
+
+    def close(self):
+        """Release the buffered chunk
+        """
+        self.closed = True
+        self._buffer = ''
@@ -0,0 +1,198 @@
+"""
+Splitting of files on S3 into gzip parts of equal size for Redshift loads
+"""
+import gzip
+import math
+import os
+import re
+import tempfile
+import time
+
+from collections import namedtuple
+
+from .s3_file import S3File
+from .s3_path import S3Path
+from .utils import upload_to_s3
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Smallest uncompressed part worth loading on a slice of its own
+MIN_SPLIT_PART_SIZE = 1024 * 1024
+
+# COPY options for input whose rows can not be split into gzip parts
+UNSPLITTABLE_OPTIONS = ['IGNOREHEADER', 'CSV', 'FIXEDWIDTH', 'JSON', 'AVRO',
+                        'GZIP', 'BZIP2', 'LZOP']
+
+QUOTED_STRING_REGEX = re.compile(r"'(?:[^'\\]|\\.)*'")
+OPTION_WORD_REGEX = re.compile(r'[A-Z0-9_]+')
+
+# Outcome of splitting files into gzip parts
+SplitResult = namedtuple(
+    'SplitResult', ['part_uris', 'bytes_in', 'bytes_out', 'seconds'])
+
+
+def copy_option_words(command_options):
+    """Keywords of COPY options, without the quoted arguments
+
+    Args:
+        command_options(str): options of a COPY statement
+
+    Returns:
+        words(set of str): upper case keywords of the options
+    """
+    return set(OPTION_WORD_REGEX.findall(
+        QUOTED_STRING_REGEX.sub('', command_options or '').upper()))
+
+
+def unsplittable_options(command_options):
+    """COPY options that prevent the input from being split
+
+    Note:
+        Headers, CSV, fixed width and structured formats are parsed across
+        lines, and compressed input can not be read line by line
+
+    Args:
+        command_options(str): options of a COPY statement
+
+    Returns:
+        options(list of str): options in UNSPLITTABLE_OPTIONS that are used
+    """
+    words = copy_option_words(command_options)
+    return [option for option in UNSPLITTABLE_OPTIONS if option in words]
+
+
+def iter_records(lines, escape=False, quote_char=None):
+    """Join lines into the records COPY loads from them
+
+    Note:
+        With escape, a newline preceded by an odd number of backslashes is
+        part of the record. With a quote character, newlines between quotes
+        are part of the record.
+
+    Args:
+        lines(iterable of str): lines of a file, ending with a newline
+        escape(bool): whether the backslash escapes characters
+        quote_char(str): character quoting fields, None if not quoted
+
+    Returns:
+        records(generator of str): records of the file
+    """
+    tokens = None
+    if quote_char is not None:
+        pattern = re.escape(quote_char)
+        if escape:
+            pattern = r'\\.|' + pattern
+        tokens = re.compile(pattern, re.DOTALL)
+
+    record = []
+    quoted = False
+    for line in lines:
+        record.append(line)
+        if tokens is not None:
+            for token in tokens.findall(line):
+                if token == quote_char:
+                    quoted = not quoted
+        if quoted:
+            continue
+        if escape and line.endswith('\n'):
+            backslashes = len(line) - 1 - len(line[:-1].rstrip('\\'))
+            if backslashes % 2 == 1:
+                continue
+        yield ''.join(record)
+        record = []
+    if record:
+        yield ''.join(record)
+
+
+def split_part_count(file_sizes, slices, parts_per_slice=1,
+                     min_part_size=MIN_SPLIT_PART_SIZE):
+    """Number of parts to split files into so that every slice loads data
+
+    Args:
+        file_sizes(list of int): sizes of the files in bytes
+        slices(int): number of slices of the cluster
+        parts_per_slice(int): number of parts loaded by each slice
+        min_part_size(int): smallest size of a part in bytes
+
+    Returns:
+        num_parts(int): number of parts, None if the files need no split
+    """
+    if not file_sizes or len(file_sizes) % slices == 0:
+        return None
+    num_parts = min(slices * parts_per_slice,
+                    sum(file_sizes) // min_part_size)
+    if num_parts <= 1:
+        return None
+    return num_parts
+
+
+def split_to_gzip_parts(file_uris, total_size, num_parts, output_path,
+                        escape=False, quote_char=None):
+    """Split files on S3 into gzip parts of about the same size
+
+    Note:
+        The files are streamed record by record and every part is compressed
+        to a temporary file and uploaded once complete, so the memory used
+        does not depend on the size of the files. Records are never split,
+        including those with escaped or quoted newlines.
+
+    Args:
+        file_uris(list of str): S3 uris of the files to be split
+        total_size(int): total size of the files in bytes
+        num_parts(int): number of parts to split the files into
+        output_path(S3Path): directory of the parts
+        escape(bool): whether the backslash escapes newlines in the files
+        quote_char(str): character quoting fields, None if not quoted
+
+    Returns:
+        result(SplitResult): uris of the parts, bytes read and written, time
+    """
+    start = time.time()
+    part_size = int(math.ceil(total_size / float(num_parts)))
+    part_uris = []
+    bytes_in = bytes_out = 0
+    part = None
+
+    def finish_part(part):
+        """Upload a complete part and remove the temporary file
+        """
+        file_name, gzip_file = part
+        gzip_file.close()
+        s3_path = S3Path(key='part-%05d.gz' % len(part_uris),
+                         parent_dir=output_path)
+        upload_to_s3(s3_path, file_name=file_name)
+        part_uris.append(s3_path.uri)
+        size = os.path.getsize(file_name)
+        os.remove(file_name)
+        return size
+
+    try:
+        for file_uri in file_uris:
+            lines = S3File(s3_path=S3Path(uri=file_uri)).iter_lines()
+            for line in iter_records(lines, escape, quote_char):
+                if not line.endswith('\n'):
+                    line += '\n'
+                if part is None:
+                    fd, file_name = tempfile.mkstemp(suffix='.gz')
+                    os.close(fd)
+                    part = (file_name, gzip.open(file_name, 'wb'))
+                part[1].write(line)
+                bytes_in += len(line)
+                # Parts end at multiples of the part size of the input
+                if bytes_in >= part_size * (len(part_uris) + 1):
+                    bytes_out += finish_part(part)
+                    part = None
+        if part is not None:
+            bytes_out += finish_part(part)
+            part = None
+    finally:
+        if part is not None:
+            part[1].close()
+            os.remove(part[0])
+
+    seconds = time.time() - start
+    logger.info('Split %d files (%d bytes) into %d gzip parts (%d bytes) in '
+                '%.2f seconds', len(file_uris), bytes_in, len(part_uris),
+                bytes_out, seconds)
+    return SplitResult(part_uris, bytes_in, bytes_out, seconds)
@@ -0,0 +1,280 @@
+"""Local fake of the boto S3 API used by the tests
+"""
+import hashlib
+import threading
+
+from boto.exception import S3ResponseError
+
+
+class FakeKey(object):
+    """In memory stand-in for a boto S3 key
+    """
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.key = name
+        self.etag = None
+        self.size = None
+        self.storage_class = 'STANDARD'
+
+    def _store(self, contents):
+        self.etag = '"%s"' % hashlib.md5(contents).hexdigest()
+        self.size = len(contents)
+        self.bucket.store(self, contents)
+
+    def set_contents_from_string(self, text, **kwargs):
+        self._store(text)
+
+    def set_contents_from_filename(self, file_name, **kwargs):
+        with open(file_name, 'rb') as f:
+            self._store(f.read())
+
+    def get_contents_as_string(self, headers=None):
+        contents = self.bucket.contents[self.name]
+        with self.bucket.connection.lock:
+            self.bucket.connection.count('GET')
+        if headers and 'Range' in headers:
+            start, end = headers['Range'][len('bytes='):].split('-')
+            return contents[int(start):int(end) + 1]
+        return contents
+
+    def get_contents_to_file(self, fp):
+        fp.write(self.get_contents_as_string())
+
+    def get_contents_to_filename(self, file_name, headers=None):
+        with self.bucket.connection.lock:
+            self.bucket.connection.count('GET')
+        stored = self.bucket.keys.get(self.name)
+        if stored is None:
+            raise S3ResponseError(404, 'Not Found')
+        if headers and headers.get('If-None-Match') == stored.etag:
+            raise S3ResponseError(304, 'Not Modified')
+        self.etag = stored.etag
+        with open(file_name, 'wb') as f:
+            f.write(self.bucket.contents[self.name])
+
+    def copy(self, dst_bucket, dst_key, **kwargs):
+        connection = self.bucket.connection
+        with connection.lock:
+            connection.count('COPY')
+        key = FakeKey(connection.get_bucket(dst_bucket), dst_key)
+        key._store(self.bucket.contents[self.name])
+        return key
+
+
+class FakePart(object):
+    """Uploaded part of a fake multipart upload
+    """
+    def __init__(self, part_number, contents):
+        self.part_number = part_number
+        self.size = len(contents)
+        self.etag = '"%s"' % hashlib.md5(contents).hexdigest()
+        self.contents = contents
+
+
+class FakeMultiPartUpload(object):
+    """In memory stand-in for a boto multipart upload
+
+    Like boto uploads, the uploads with the same id on a bucket share their
+    parts. The part numbers in fail_parts fail once per listed occurrence.
+    """
+    def __init__(self, bucket=None):
+        self.bucket = bucket
+        self.key_name = None
+        self.id = None
+        self.initiated = None
+
+    @property
+    def parts(self):
+        return self.bucket.upload_parts[self.id]
+
+    @property
+    def fail_parts(self):
+        return self.bucket.upload_failures[self.id]
+
+    @fail_parts.setter
+    def fail_parts(self, part_numbers):
+        self.bucket.upload_failures[self.id] = part_numbers
+
+    def __iter__(self):
+        return iter([self.parts[n] for n in sorted(self.parts)])
+
+    def upload_part_from_file(self, fp, part_num, md5=None, size=None,
+                              **kwargs):
+        contents = fp.read(size)
+        with self.bucket.connection.lock:
+            self.bucket.connection.count('UPLOAD_PART')
+            if part_num in self.fail_parts:
+                self.fail_parts.remove(part_num)
+                raise IOError('Part %d failed' % part_num)
+            self.parts[part_num] = FakePart(part_num, contents)
+
+    def copy_part_from_key(self, src_bucket_name, src_key_name, part_num,
+                           start, end):
+        connection = self.bucket.connection
+        contents = connection.get_bucket(src_bucket_name).contents[
+            src_key_name][start:end + 1]
+        with connection.lock:
+            connection.count('COPY_PART')
+            self.parts[part_num] = FakePart(part_num, contents)
+
+    def complete_upload(self):
+        key = FakeKey(self.bucket, self.key_name)
+        key.set_contents_from_string(
+            ''.join(part.contents for part in self))
+        self.cancel_upload()
+
+    def cancel_upload(self):
+        self.bucket.uploads[:] = [u for u in self.bucket.uploads
+                                  if u.id != self.id]
+
+
+class FakeDeleteError(object):
+    """Key that could not be deleted by a multi-object delete
+    """
+    def __init__(self, key):
+        self.key = key
+        self.code = 'AccessDenied'
+
+
+class FakeMultiDeleteResult(object):
+    """Result of a fake multi-object delete
+    """
+    def __init__(self):
+        self.deleted = []
+        self.errors = []
+
+
+class FakeBucket(object):
+    """In memory stand-in for a boto S3 bucket
+
+    The bucket of a shared connection keeps its contents in the bucket of
+    the same name of the original connection.
+    """
+    def __init__(self, connection, name, shared=None):
+        self.connection = connection
+        self.name = name
+        if shared is None:
+            self.keys = dict()
+            self.contents = dict()
+            self.uploads = []
+            self.upload_parts = dict()
+            self.upload_failures = dict()
+            self.fail_deletes = set()
+        else:
+            self.keys = shared.keys
+            self.contents = shared.contents
+            self.uploads = shared.uploads
+            self.upload_parts = shared.upload_parts
+            self.upload_failures = shared.upload_failures
+            self.fail_deletes = shared.fail_deletes
+
+    def _bound_key(self, key):
+        """Copy of a stored key bound to this bucket, like a listed key
+        """
+        bound = FakeKey(self, key.name)
+        bound.etag = key.etag
+        bound.size = key.size
+        return bound
+
+    def store(self, key, contents):
+        with self.connection.lock:
+            self.connection.count('PUT')
+            self.keys[key.name] = key
+            self.contents[key.name] = contents
+
+    def new_key(self, key_name):
+        return FakeKey(self, key_name)
+
+    def get_key(self, key_name):
+        with self.connection.lock:
+            self.connection.count('HEAD')
+        key = self.keys.get(key_name)
+        return self._bound_key(key) if key is not None else None
+
+    def initiate_multipart_upload(self, key_name):
+        upload = FakeMultiPartUpload(self)
+        upload.key_name = key_name
+        upload.initiated = len(self.upload_parts)
+        upload.id = '%s-%s' % (key_name, upload.initiated)
+        self.upload_parts[upload.id] = dict()
+        self.upload_failures[upload.id] = []
+        self.uploads.append(upload)
+        return upload
+
+    def get_all_multipart_uploads(self, prefix=''):
+        uploads = []
+        for upload in self.uploads:
+            if upload.key_name.startswith(prefix):
+                bound = FakeMultiPartUpload(self)
+                bound.key_name = upload.key_name
+                bound.id = upload.id
+                bound.initiated = upload.initiated
+                uploads.append(bound)
+        return uploads
+
+    def delete_keys(self, keys, quiet=False):
+        """Delete up to 1000 keys, the keys in fail_deletes are not deleted
+        """
+        assert len(keys) <= 1000
+        result = FakeMultiDeleteResult()
+        with self.connection.lock:
+            self.connection.count('DELETE')
+            for name in keys:
+                if name in self.fail_deletes:
+                    result.errors.append(FakeDeleteError(name))
+                elif self.keys.pop(name, None) is not None:
+                    del self.contents[name]
+                    result.deleted.append(name)
+        return result
+
+    def list(self, prefix=''):
+        with self.connection.lock:
+            self.connection.count('LIST')
+            return [self._bound_key(self.keys[name])
+                    for name in sorted(self.keys) if name.startswith(prefix)]
+
+
+class FakeS3Connection(object):
+    """In memory stand-in for the boto S3Connection
+
+    Buckets are created on first use and the number of requests of every
+    type is counted in calls. The connections made with connect share the
+    buckets and calls of this connection, but like boto connections they
+    must only be used by the thread that made them.
+    """
+    def __init__(self, shared=None):
+        self.shared = shared
+        self.thread = threading.current_thread()
+        self.buckets = dict()
+        if shared is None:
+            self.calls = dict(PUT=0, GET=0, HEAD=0, LIST=0, UPLOAD_PART=0,
+                              DELETE=0, COPY=0, COPY_PART=0)
+            self.lock = threading.Lock()
+        else:
+            self.calls = shared.calls
+            self.lock = shared.lock
+
+    def connect(self):
+        """Make a connection of the current thread to the same buckets
+        """
+        return FakeS3Connection(shared=self)
+
+    def count(self, call):
+        """Count a request, with the lock held
+        """
+        if self.shared is not None and \
+                threading.current_thread() is not self.thread:
+            raise AssertionError('S3 connection of %s used by %s' % (
+                self.thread.name, threading.current_thread().name))
+        self.calls[call] += 1
+
+    def get_bucket(self, bucket_name, validate=True):
+        shared = None
+        if self.shared is not None:
+            shared = self.shared.get_bucket(bucket_name)
+        with self.lock:
+            if bucket_name not in self.buckets:
+                self.buckets[bucket_name] = FakeBucket(
+                    self, bucket_name, shared)
+            return self.buckets[bucket_name]
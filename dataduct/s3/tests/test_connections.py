@@ -0,0 +1,64 @@
+"""Tests for the S3 connections cached per thread
+"""
+import threading
+import unittest
+from mock import patch
+from nose.tools import eq_
+
+from ..s3_path import S3Path
+from ..utils import clear_s3_connections
+from ..utils import get_s3_bucket
+from ..utils import read_from_s3
+from ..utils import upload_to_s3
+from .fake_s3 import FakeS3Connection
+
+
+class ConnectionTests(unittest.TestCase):
+    """Tests for the S3 connections cached per thread
+    """
+
+    def setUp(self):
+        """Patch boto to create a new fake connection on every connect
+        """
+        self.patcher = patch('boto.connect_s3', side_effect=FakeS3Connection)
+        self.connect_s3 = self.patcher.start()
+        clear_s3_connections()
+
+    def tearDown(self):
+        """Remove the patch of the connection
+        """
+        self.patcher.stop()
+
+    def test_connection_is_reused(self):
+        """Test that the calls from a thread share a connection and bucket
+        """
+        for index in range(10):
+            s3_path = S3Path(uri='s3://bucket/file_%d' % index)
+            upload_to_s3(s3_path, file_text='text %d' % index)
+            eq_(read_from_s3(s3_path), 'text %d' % index)
+
+        eq_(self.connect_s3.call_count, 1)
+        assert get_s3_bucket('bucket') is get_s3_bucket('bucket')
+
+    def test_connection_per_thread(self):
+        """Test that threads do not share connections
+        """
+        buckets = []
+        threads = [threading.Thread(
+            target=lambda: buckets.append(get_s3_bucket('bucket')))
+            for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The call count of the mock is not updated atomically
+        eq_(len(set(id(bucket.connection) for bucket in buckets)), 3)
+
+    def test_clear_connections(self):
+        """Test that cleared connections are opened again
+        """
+        bucket = get_s3_bucket('bucket')
+        clear_s3_connections()
+        assert get_s3_bucket('bucket') is not bucket
+        eq_(self.connect_s3.call_count, 2)
@@ -0,0 +1,85 @@
+"""Tests for the content addressed store
+"""
+import os
+import unittest
+from mock import patch
+from nose.tools import eq_
+from testfixtures import TempDirectory
+
+from ..content_store import content_addressed_dir
+from ..content_store import content_addressed_prefix
+from ..content_store import content_digest
+from ..content_store import content_store_dir
+from ..s3_directory import S3Directory
+from ..s3_file import S3File
+from ..upload_planner import UploadPlanner
+from ..utils import clear_s3_connections
+from .fake_s3 import FakeS3Connection
+
+
+class ContentStoreTests(unittest.TestCase):
+    """Tests for the content addressed store
+    """
+
+    def setUp(self):
+        """Setup a local directory with scripts
+        """
+        self.directory = TempDirectory()
+        self.directory.write('scripts/a.sh', 'echo a')
+        self.directory.write('scripts/nested/b.sh', 'echo b')
+        self.script = self.directory.write('script.sh', 'echo script')
+
+    def tearDown(self):
+        """Remove the local directory
+        """
+        self.directory.cleanup()
+
+    def test_digest_follows_contents(self):
+        """Test that the digest only changes with the contents
+        """
+        scripts = S3Directory(path=self.directory.getpath('scripts'))
+        digest = content_digest(scripts)
+        eq_(content_digest(S3Directory(path=scripts.path)), digest)
+
+        self.directory.write('scripts/nested/b.sh', 'echo changed')
+        assert content_digest(scripts) != digest
+
+        eq_(content_digest(S3File(path=self.script)),
+            content_digest(S3File(text='echo script')))
+
+    def test_prefix_of_stored_keys(self):
+        """Test that only keys in the store have a digest prefix
+        """
+        s3_path = content_addressed_dir(S3File(path=self.script))
+        store = content_store_dir()
+        key = os.path.join(s3_path.key, 'script.sh')
+
+        eq_(content_addressed_prefix(s3_path.bucket, key),
+            s3_path.key.rstrip('/') + '/')
+        eq_(content_addressed_prefix(store.bucket, 'other/script.sh'), None)
+        eq_(content_addressed_prefix('other_bucket', key), None)
+
+    def test_unchanged_sources_are_not_uploaded(self):
+        """Test that existing sources are found with one LIST per digest
+        """
+        def upload(conn):
+            """Upload the scripts with a new planner
+            """
+            planner = UploadPlanner()
+            for s3_object in [S3File(path=self.script), S3Directory(
+                    path=self.directory.getpath('scripts'))]:
+                s3_object.s3_path = content_addressed_dir(s3_object)
+                planner.add_file(s3_object)
+            with patch('boto.connect_s3', return_value=conn):
+                planner.upload()
+            return planner
+
+        clear_s3_connections()
+        conn = FakeS3Connection()
+        eq_(upload(conn).unchanged, 0)
+        eq_(conn.calls['PUT'], 3)
+
+        planner = upload(conn)
+        eq_(planner.unchanged, 3)
+        eq_(conn.calls['PUT'], 3)
+        eq_(conn.calls['LIST'], 4)
@@ -0,0 +1,111 @@
+"""Tests for the batched directory delete and the concurrent directory copy
+"""
+import unittest
+from mock import patch
+from nose.tools import eq_
+from nose.tools import raises
+
+from ..multipart import multipart_copy
+from ..s3_path import S3Path
+from ..utils import clear_s3_connections
+from ..utils import copy_dir_with_s3
+from ..utils import delete_dir_from_s3
+from ...utils.exceptions import ETLInputError
+from .fake_s3 import FakeMultiPartUpload
+from .fake_s3 import FakeS3Connection
+
+
+class DirectoryCleanupTests(unittest.TestCase):
+    """Tests for the batched directory delete and the directory copy
+    """
+
+    def setUp(self):
+        """Setup a fake S3 with a directory of many keys
+        """
+        self.conn = FakeS3Connection()
+        self.bucket = self.conn.get_bucket('bucket')
+        for index in range(2500):
+            self.bucket.new_key('data/part-%04d' % index) \
+                .set_contents_from_string('row %d' % index)
+        self.bucket.new_key('data/nested/file').set_contents_from_string('x')
+        self.bucket.new_key('data_other/file').set_contents_from_string('y')
+        self.patchers = [
+            patch('boto.connect_s3', side_effect=self.conn.connect),
+            patch('dataduct.s3.multipart.MultiPartUpload',
+                  FakeMultiPartUpload),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        clear_s3_connections()
+
+    def tearDown(self):
+        """Remove the patches of the connection
+        """
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_delete_in_batches(self):
+        """Test that keys are deleted with requests of 1000 keys and that
+        keys sharing the prefix outside the directory are kept
+        """
+        deleted = delete_dir_from_s3(
+            S3Path(uri='s3://bucket/data', is_directory=True))
+
+        eq_(deleted, 2501)
+        eq_(self.conn.calls['DELETE'], 3)
+        eq_(sorted(self.bucket.keys), ['data_other/file'])
+
+    @raises(ETLInputError)
+    def test_delete_reports_failed_keys(self):
+        """Test that keys which could not be deleted raise an error
+        """
+        self.bucket.fail_deletes.add('data/part-0042')
+        delete_dir_from_s3(S3Path(uri='s3://bucket/data/', is_directory=True))
+
+    def test_copy_keeps_relative_paths(self):
+        """Test that nested keys keep their path relative to the directory
+        """
+        result = copy_dir_with_s3(
+            S3Path(uri='s3://bucket/data/', is_directory=True),
+            S3Path(uri='s3://backup/copy/', is_directory=True))
+
+        backup = self.conn.get_bucket('backup')
+        eq_(result.transferred, 2501)
+        eq_(self.conn.calls['COPY'], 2501)
+        eq_(backup.contents['copy/nested/file'], 'x')
+        eq_(backup.contents['copy/part-0007'], 'row 7')
+        assert 'copy/file' not in backup.contents
+
+    def test_copy_large_keys_in_parts(self):
+        """Test that keys over the copy limit are copied in parts
+        """
+        self.bucket.new_key('large/file').set_contents_from_string(
+            'abcdefghij')
+        with patch('dataduct.s3.utils.MAX_COPY_SIZE', 5):
+            copy_dir_with_s3(
+                S3Path(uri='s3://bucket/large/', is_directory=True),
+                S3Path(uri='s3://bucket/moved/', is_directory=True))
+
+        eq_(self.bucket.contents['moved/file'], 'abcdefghij')
+        eq_(self.conn.calls['COPY'], 0)
+        eq_(self.conn.calls['COPY_PART'], 1)
+        eq_(self.bucket.uploads, [])
+
+    def test_multipart_copy_ranges(self):
+        """Test that the copied byte ranges cover the whole key
+        """
+        key = self.bucket.new_key('large/file')
+        key.set_contents_from_string('abcdefghij')
+        with patch('dataduct.s3.multipart.MIN_PART_SIZE', 4):
+            multipart_copy(key, self.bucket, 'moved/file', part_size=4)
+
+        eq_(self.bucket.contents['moved/file'], 'abcdefghij')
+        eq_(self.conn.calls['COPY_PART'], 3)
+
+    @raises(ETLInputError)
+    def test_copy_missing_directory(self):
+        """Test that copying an empty directory raises an error
+        """
+        copy_dir_with_s3(
+            S3Path(uri='s3://bucket/missing/', is_directory=True),
+            S3Path(uri='s3://bucket/moved/', is_directory=True))
@@ -0,0 +1,77 @@
+"""Tests for the concurrent directory upload and download
+"""
+import os
+import unittest
+from mock import patch
+from nose.tools import eq_
+from testfixtures import TempDirectory
+
+from ..s3_path import S3Path
+from ..utils import clear_s3_connections
+from ..utils import download_dir_from_s3
+from ..utils import upload_dir_to_s3
+from .fake_s3 import FakeS3Connection
+
+
+class DirectorySyncTests(unittest.TestCase):
+    """Tests for the concurrent directory upload and download
+    """
+
+    def setUp(self):
+        """Setup a local directory with nested files and a fake S3
+        """
+        self.directory = TempDirectory()
+        self.directory.write('source/a/run.sh', 'echo a')
+        self.directory.write('source/b/run.sh', 'echo b')
+        self.directory.write('source/notes.txt', 'notes')
+        self.source = self.directory.getpath('source')
+        self.s3_path = S3Path(uri='s3://bucket/src/', is_directory=True)
+
+        self.conn = FakeS3Connection()
+        self.patcher = patch('boto.connect_s3', side_effect=self.conn.connect)
+        self.patcher.start()
+        clear_s3_connections()
+
+    def tearDown(self):
+        """Remove the local directory
+        """
+        self.patcher.stop()
+        self.directory.cleanup()
+
+    def test_upload_skips_unchanged_files(self):
+        """Test that relative paths are kept and unchanged files skipped
+        """
+        result = upload_dir_to_s3(self.s3_path, self.source, workers=2)
+        eq_(sorted(self.conn.buckets['bucket'].contents),
+            ['src/a/run.sh', 'src/b/run.sh', 'src/notes.txt'])
+        eq_((result.transferred, result.skipped, result.bytes), (3, 0, 17))
+
+        self.directory.write('source/b/run.sh', 'echo changed')
+        result = upload_dir_to_s3(self.s3_path, self.source)
+        eq_((result.transferred, result.skipped), (1, 2))
+        eq_(self.conn.calls['PUT'], 4)
+
+    def test_include_and_exclude(self):
+        """Test that only the included and not excluded files are uploaded
+        """
+        upload_dir_to_s3(self.s3_path, self.source,
+                         include=['*.sh'], exclude=['b/*'])
+        eq_(sorted(self.conn.buckets['bucket'].contents), ['src/a/run.sh'])
+
+    def test_download_keeps_relative_paths(self):
+        """Test that nested keys do not overwrite each other on download
+        """
+        upload_dir_to_s3(self.s3_path, self.source)
+        target = self.directory.getpath('target')
+
+        result = download_dir_from_s3(self.s3_path, target, workers=2)
+        eq_(result.transferred, 3)
+        self.directory.compare(
+            ['a/', 'a/run.sh', 'b/', 'b/run.sh', 'notes.txt'],
+            path='target')
+        with open(os.path.join(target, 'b', 'run.sh')) as f:
+            eq_(f.read(), 'echo b')
+
+        result = download_dir_from_s3(self.s3_path, target)
+        eq_((result.transferred, result.skipped), (0, 3))
+        eq_(self.conn.calls['GET'], 3)
@@ -0,0 +1,64 @@
+"""Tests for the COPY manifests
+"""
+import json
+import unittest
+from mock import patch
+from nose.tools import eq_
+from nose.tools import raises
+
+from ..manifest import create_copy_manifest
+from ..manifest import list_prefix_files
+from ..s3_path import S3Path
+from ..utils import clear_s3_connections
+from ...utils.exceptions import ETLInputError
+from .fake_s3 import FakeS3Connection
+
+
+class ManifestTests(unittest.TestCase):
+    """Tests for the COPY manifests
+    """
+
+    def setUp(self):
+        """Setup a fake S3 with the output of two steps
+        """
+        self.conn = FakeS3Connection()
+        self.bucket = self.conn.get_bucket('bucket')
+        for name in ['step_a/part-0', 'step_a/part-1', 'step_a/empty/',
+                     'step_a_other/part-0', 'step_b/data.tsv']:
+            self.bucket.new_key(name).set_contents_from_string('1\t2\n')
+        self.patcher = patch('boto.connect_s3', return_value=self.conn)
+        self.patcher.start()
+        clear_s3_connections()
+
+    def tearDown(self):
+        """Remove the patch of the connection
+        """
+        self.patcher.stop()
+
+    def test_list_prefix_files(self):
+        """Test that the files of directories and single files are listed
+        """
+        eq_(list_prefix_files(['s3://bucket/step_a/',
+                               's3://bucket/step_b/data.tsv']),
+            ['s3://bucket/step_a/part-0', 's3://bucket/step_a/part-1',
+             's3://bucket/step_b/data.tsv'])
+
+    def test_create_copy_manifest(self):
+        """Test that every file is a mandatory entry of the manifest
+        """
+        file_uris = list_prefix_files(['s3://bucket/step_a/'])
+        create_copy_manifest(
+            file_uris, S3Path(uri='s3://bucket/step_c/load.manifest'))
+
+        manifest = json.loads(self.bucket.contents['step_c/load.manifest'])
+        eq_(manifest['entries'], [
+            {'url': 's3://bucket/step_a/part-0', 'mandatory': True},
+            {'url': 's3://bucket/step_a/part-1', 'mandatory': True},
+        ])
+
+    @raises(ETLInputError)
+    def test_empty_manifest(self):
+        """Test that a manifest needs files to load
+        """
+        create_copy_manifest(
+            [], S3Path(uri='s3://bucket/step_c/load.manifest'))
@@ -0,0 +1,101 @@
+"""Tests for the multipart upload
+"""
+import unittest
+from mock import patch
+from nose.tools import eq_
+from nose.tools import raises
+from testfixtures import TempDirectory
+
+from ..multipart import MAX_PARTS
+from ..multipart import multipart_upload
+from ..multipart import plan_parts
+from ..utils import clear_s3_connections
+from .fake_s3 import FakeMultiPartUpload
+from .fake_s3 import FakeS3Connection
+
+CONTENTS = ''.join(chr(ord('a') + i % 26) * 10 for i in range(100))
+
+
+class MultipartUploadTests(unittest.TestCase):
+    """Tests for the multipart upload
+    """
+
+    def setUp(self):
+        """Setup a local file and a bucket, with small parts allowed
+        """
+        self.directory = TempDirectory()
+        self.file_name = self.directory.write('extract.tsv', CONTENTS)
+        self.conn = FakeS3Connection()
+        self.bucket = self.conn.get_bucket('bucket')
+        self.patchers = [
+            patch('boto.connect_s3', side_effect=self.conn.connect),
+            patch('dataduct.s3.multipart.MIN_PART_SIZE', 1),
+            patch('dataduct.s3.multipart.MultiPartUpload',
+                  FakeMultiPartUpload),
+            patch('time.sleep'),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        clear_s3_connections()
+
+    def tearDown(self):
+        """Remove the local file
+        """
+        for patcher in self.patchers:
+            patcher.stop()
+        self.directory.cleanup()
+
+    def upload(self, **kwargs):
+        """Upload the local file in parts of 300 bytes
+        """
+        multipart_upload(self.bucket, 'data/extract.tsv',
+                         file_name=self.file_name, part_size=300, **kwargs)
+
+    @staticmethod
+    def test_plan_parts():
+        """Test that the parts cover the file within the S3 limits
+        """
+        eq_(plan_parts(1000, 300),
+            [(1, 0, 300), (2, 300, 300), (3, 600, 300), (4, 900, 100)])
+        assert len(plan_parts(MAX_PARTS * 1000 + 1, 300)) <= MAX_PARTS
+
+    def test_upload_in_parts(self):
+        """Test that the parts are uploaded in parallel and assembled
+        """
+        self.upload(workers=3)
+        eq_(self.conn.calls['UPLOAD_PART'], 4)
+        eq_(self.bucket.contents['data/extract.tsv'], CONTENTS)
+        eq_(self.bucket.uploads, [])
+
+    def test_failed_parts_are_retried(self):
+        """Test that a failed part is uploaded again
+        """
+        upload = self.bucket.initiate_multipart_upload('data/extract.tsv')
+        upload.fail_parts = [2]
+        with patch.object(self.bucket, 'initiate_multipart_upload',
+                          return_value=upload):
+            self.upload(resume=False)
+        eq_(self.conn.calls['UPLOAD_PART'], 5)
+        eq_(self.bucket.contents['data/extract.tsv'], CONTENTS)
+
+    def test_failed_upload_is_resumed(self):
+        """Test that only the missing parts are uploaded on resume
+        """
+        upload = self.bucket.initiate_multipart_upload('data/extract.tsv')
+        upload.fail_parts = [3, 3]
+
+        @raises(IOError)
+        def failing_upload():
+            """Upload that fails on the third part
+            """
+            self.upload(retries=1, workers=1)
+        failing_upload()
+        # The fourth part may be uploaded before the pool is terminated
+        kept = sorted(upload.parts)
+        assert kept in ([1, 2], [1, 2, 4])
+
+        self.conn.calls['UPLOAD_PART'] = 0
+        self.upload()
+        eq_(self.conn.calls['UPLOAD_PART'], 4 - len(kept))
+        eq_(self.bucket.contents['data/extract.tsv'], CONTENTS)
+        eq_(self.bucket.uploads, [])
@@ -0,0 +1,102 @@
+"""Tests for the read-through cache of S3 objects
+"""
+import os
+import unittest
+from mock import patch
+from nose.tools import eq_
+from nose.tools import raises
+from testfixtures import TempDirectory
+
+from ..read_cache import S3ReadCache
+from ..s3_file import S3File
+from ..s3_path import S3Path
+from ..utils import clear_s3_connections
+from ..utils import download_from_s3
+from ...utils.exceptions import ETLInputError
+from .fake_s3 import FakeS3Connection
+
+
+class S3ReadCacheTests(unittest.TestCase):
+    """Tests for the read-through cache of S3 objects
+    """
+
+    def setUp(self):
+        """Setup a fake S3 with a few files and an empty cache
+        """
+        self.conn = FakeS3Connection()
+        self.bucket = self.conn.get_bucket('bucket')
+        for name in ['a.sql', 'b.sql', 'c.sql']:
+            self.bucket.new_key(name).set_contents_from_string(
+                'select %s;' % name[0] * 10)
+        self.directory = TempDirectory()
+        self.cache = S3ReadCache(self.directory.getpath('cache'))
+
+    def tearDown(self):
+        """Remove the cache directory
+        """
+        self.directory.cleanup()
+
+    def test_unchanged_files_are_not_downloaded(self):
+        """Test that unchanged files are validated with their ETag
+        """
+        eq_(self.cache.read(self.bucket, 'a.sql'), 'select a;' * 10)
+        eq_(self.cache.read(self.bucket, 'a.sql'), 'select a;' * 10)
+        eq_(self.cache.stats['hits'], 1)
+        eq_(self.cache.stats['misses'], 1)
+
+        self.bucket.new_key('a.sql').set_contents_from_string('select 1;')
+        eq_(self.cache.read(self.bucket, 'a.sql'), 'select 1;')
+        eq_(self.cache.stats['misses'], 2)
+        eq_(len(os.listdir(self.cache.directory)), 1)
+
+    def test_least_recently_used_files_are_evicted(self):
+        """Test that the cache is kept under its size limit
+        """
+        self.cache.max_bytes = 200
+        file_a = self.cache.fetch(self.bucket, 'a.sql')
+        file_b = self.cache.fetch(self.bucket, 'b.sql')
+        os.utime(file_a, (1, 1))
+        os.utime(file_b, (2, 2))
+        self.cache.fetch(self.bucket, 'c.sql')
+
+        assert not os.path.exists(file_a)
+        assert os.path.exists(file_b)
+
+    def test_stale_file_removed_by_another_process(self):
+        """Test that a stale file evicted concurrently does not fail a read
+        """
+        stale_file = self.cache.fetch(self.bucket, 'a.sql')
+        self.bucket.new_key('a.sql').set_contents_from_string('select 1;')
+        rename = os.rename
+
+        def rename_and_evict(source, destination):
+            """Rename the downloaded file while another process evicts
+            """
+            rename(source, destination)
+            os.remove(stale_file)
+
+        with patch('os.rename', side_effect=rename_and_evict):
+            eq_(self.cache.read(self.bucket, 'a.sql'), 'select 1;')
+        eq_(len(os.listdir(self.cache.directory)), 1)
+
+    @raises(ETLInputError)
+    def test_missing_key(self):
+        """Test that reading a missing key raises an error
+        """
+        self.cache.fetch(self.bucket, 'missing.sql')
+
+    def test_s3_file_and_download_use_the_cache(self):
+        """Test that S3 files are read through the configured cache
+        """
+        s3_path = S3Path(uri='s3://bucket/b.sql')
+        with patch('boto.connect_s3', return_value=self.conn), \
+                patch('dataduct.s3.read_cache._read_cache', self.cache), \
+                patch('dataduct.s3.read_cache.CACHE_DIR',
+                      self.cache.directory):
+            clear_s3_connections()
+            eq_(S3File(s3_path=s3_path).text, 'select b;' * 10)
+            download_from_s3(s3_path, self.directory.getpath('download'))
+
+        eq_(self.directory.read('download/b.sql'), 'select b;' * 10)
+        eq_(self.cache.stats['misses'], 1)
+        eq_(self.cache.stats['hits'], 1)
@@ -0,0 +1,83 @@
+"""Tests for the streaming reads of S3 files
+"""
+import unittest
+from mock import patch
+from nose.tools import eq_
+from nose.tools import raises
+from testfixtures import TempDirectory
+
+from ..s3_file import S3File
+from ..s3_path import S3Path
+from ..s3_reader import S3Reader
+from ..utils import clear_s3_connections
+from ...utils.exceptions import ETLInputError
+from .fake_s3 import FakeS3Connection
+
+LINES = ['line %d\n' % index for index in range(100)]
+
+
+class S3ReaderTests(unittest.TestCase):
+    """Tests for the streaming reads of S3 files
+    """
+
+    def setUp(self):
+        """Setup a fake S3 with a file of many lines
+        """
+        self.conn = FakeS3Connection()
+        self.conn.get_bucket('bucket').new_key('data.txt') \
+            .set_contents_from_string(''.join(LINES))
+        self.s3_path = S3Path(uri='s3://bucket/data.txt')
+        self.patcher = patch('boto.connect_s3', return_value=self.conn)
+        self.patcher.start()
+        clear_s3_connections()
+
+    def tearDown(self):
+        """Remove the patch of the connection
+        """
+        self.patcher.stop()
+
+    def test_read_in_ranges(self):
+        """Test that reads fetch one chunk at a time
+        """
+        with S3Reader(self.s3_path, chunk_size=100) as reader:
+            eq_(reader.read(10), 'line 0\nlin')
+            eq_(self.conn.calls['GET'], 1)
+            reader.seek(-8, 2)
+            eq_(reader.read(), 'line 99\n')
+            eq_(reader.tell(), reader.size)
+            eq_(reader.read(), '')
+            eq_(self.conn.calls['GET'], 2)
+
+    def test_iter_lines(self):
+        """Test that lines spanning chunks are joined
+        """
+        lines = list(S3File(s3_path=self.s3_path).iter_lines(chunk_size=7))
+        eq_(lines, LINES)
+
+    def test_iter_chunks(self):
+        """Test that chunks cover the file
+        """
+        chunks = list(S3File(s3_path=self.s3_path).iter_chunks(100))
+        eq_(len(chunks[0]), 100)
+        eq_(''.join(chunks), ''.join(LINES))
+        eq_(S3File(text='abc').iter_chunks(2).next(), 'ab')
+
+    def test_mmap(self):
+        """Test that files on S3 are spooled and removed after mapping
+        """
+        with TempDirectory() as directory:
+            with S3File(s3_path=self.s3_path).mmap(directory.path) as mapped:
+                eq_(mapped[:7], 'line 0\n')
+                eq_(mapped.size(), len(''.join(LINES)))
+                eq_(len(directory.actual()), 1)
+            eq_(directory.actual(), [])
+
+            directory.write('local.txt', 'local text')
+            with S3File(path=directory.getpath('local.txt')).mmap() as mapped:
+                eq_(mapped[6:], 'text')
+
+    @raises(ETLInputError)
+    def test_missing_key(self):
+        """Test that reading a missing key raises an error
+        """
+        S3Reader(S3Path(uri='s3://bucket/missing.txt'))
@@ -0,0 +1,123 @@
+"""Tests for the splitting of files into gzip parts
+"""
+import gzip
+import unittest
+from mock import patch
+from nose.tools import eq_
+from StringIO import StringIO
+
+from ..s3_path import S3Path
+from ..split import iter_records
+from ..split import split_part_count
+from ..split import split_to_gzip_parts
+from ..split import unsplittable_options
+from ..utils import clear_s3_connections
+from .fake_s3 import FakeS3Connection
+
+
+class SplitTests(unittest.TestCase):
+    """Tests for the splitting of files into gzip parts
+    """
+
+    def setUp(self):
+        """Setup a fake S3 with a large file and a small file
+        """
+        self.conn = FakeS3Connection()
+        self.bucket = self.conn.get_bucket('bucket')
+        self.rows = ['%d\trow number %d\n' % (i, i) for i in range(1000)]
+        self.bucket.new_key('input/large.tsv').set_contents_from_string(
+            ''.join(self.rows[:900]))
+        # The last row of a file may not end with a newline
+        self.bucket.new_key('input/small.tsv').set_contents_from_string(
+            ''.join(self.rows[900:]).rstrip('\n'))
+        self.patcher = patch('boto.connect_s3', return_value=self.conn)
+        self.patcher.start()
+        clear_s3_connections()
+
+    def tearDown(self):
+        """Remove the patch of the connection
+        """
+        self.patcher.stop()
+
+    @staticmethod
+    def test_split_part_count():
+        """Test that only file counts that leave slices idle are split
+        """
+        eq_(split_part_count([10 ** 9], 4), 4)
+        eq_(split_part_count([10 ** 9] * 3, 4, parts_per_slice=2), 8)
+        eq_(split_part_count([10 ** 9] * 8, 4), None)
+        eq_(split_part_count([3 * 1024 * 1024], 4), 3)
+        eq_(split_part_count([1024], 4), None)
+
+    def test_split_to_gzip_parts(self):
+        """Test that rows are kept whole and parts are about equal
+        """
+        keys = [self.bucket.keys['input/large.tsv'],
+                self.bucket.keys['input/small.tsv']]
+        result = split_to_gzip_parts(
+            ['s3://bucket/%s' % key.name for key in keys],
+            sum(key.size for key in keys), 4,
+            S3Path(uri='s3://bucket/split/', is_directory=True))
+
+        eq_(result.part_uris, ['s3://bucket/split/part-%05d.gz' % i
+                               for i in range(4)])
+        parts = [gzip.GzipFile(fileobj=StringIO(
+            self.bucket.contents['split/part-%05d.gz' % i])).read()
+            for i in range(4)]
+        eq_(''.join(parts), ''.join(self.rows))
+        eq_(result.bytes_in, len(''.join(self.rows)))
+        eq_(result.bytes_out, sum(
+            len(self.bucket.contents['split/part-%05d.gz' % i])
+            for i in range(4)))
+
+        sizes = [len(part) for part in parts]
+        assert max(sizes) - min(sizes) < 2 * len(self.rows[-1])
+        assert all(part.endswith('\n') for part in parts)
+
+    @staticmethod
+    def test_unsplittable_options():
+        """Test that options parsed across lines or compressed are found
+        """
+        eq_(unsplittable_options("DELIMITER ',' IGNOREHEADER 1"),
+            ['IGNOREHEADER'])
+        eq_(unsplittable_options("DELIMITER '\t' ESCAPE gzip"), ['GZIP'])
+        eq_(unsplittable_options("FORMAT AS JSON 'auto' LZOP"),
+            ['JSON', 'LZOP'])
+        eq_(unsplittable_options("DELIMITER 'csv' NULL AS 'GZIP' ESCAPE"),
+            [])
+        eq_(unsplittable_options(None), [])
+
+    @staticmethod
+    def test_iter_records():
+        """Test that escaped and quoted newlines continue the record
+        """
+        lines = ['1\tone\\\n', 'two\n', '2\tend\\\\\n', '3\t"a\n',
+                 'b"\n', '4']
+        eq_(list(iter_records(lines)), lines)
+        eq_(list(iter_records(lines, escape=True)),
+            ['1\tone\\\ntwo\n', '2\tend\\\\\n', '3\t"a\n', 'b"\n', '4'])
+        eq_(list(iter_records(lines, escape=True, quote_char='"')),
+            ['1\tone\\\ntwo\n', '2\tend\\\\\n', '3\t"a\nb"\n', '4'])
+        eq_(list(iter_records(['1\t"a\\"\n', '2\n'], escape=True,
+                              quote_char='"')),
+            ['1\t"a\\"\n2\n'])
+
+    def test_escaped_newlines_stay_in_their_part(self):
+        """Test that parts never end in the middle of a record
+        """
+        rows = ['%d\tfirst line\\\nsecond line %d\n' % (i, i)
+                for i in range(500)]
+        self.bucket.new_key('input/escaped.tsv').set_contents_from_string(
+            ''.join(rows))
+        result = split_to_gzip_parts(
+            ['s3://bucket/input/escaped.tsv'], len(''.join(rows)), 7,
+            S3Path(uri='s3://bucket/escaped/', is_directory=True),
+            escape=True)
+
+        parts = [gzip.GzipFile(fileobj=StringIO(self.bucket.contents[
+            'escaped/part-%05d.gz' % i])).read()
+            for i in range(len(result.part_uris))]
+        eq_(len(parts), 7)
+        eq_(''.join(parts), ''.join(rows))
+        assert all(part.startswith(rows[int(part.split('\t', 1)[0])])
+                   for part in parts)
@@ -0,0 +1,109 @@
+"""Tests for the upload planner
+"""
+import unittest
+from mock import patch
+from nose.tools import eq_
+from nose.tools import raises
+from testfixtures import TempDirectory
+
+from ..s3_directory import S3Directory
+from ..s3_file import S3File
+from ..s3_path import S3Path
+from ..upload_planner import UploadPlanner
+from ..utils import clear_s3_connections
+from ...utils.exceptions import ETLInputError
+from .fake_s3 import FakeMultiPartUpload
+from .fake_s3 import FakeS3Connection
+
+
+class UploadPlannerTests(unittest.TestCase):
+    """Tests for the upload planner
+    """
+
+    def setUp(self):
+        """Setup a local directory with scripts
+        """
+        self.directory = TempDirectory()
+        self.directory.write('scripts/a.sh', 'echo a')
+        self.directory.write('scripts/nested/b.sh', 'echo b')
+        self.script = self.directory.write('script.sh', 'echo script')
+        self.planner = UploadPlanner()
+
+    def tearDown(self):
+        """Remove the local directory
+        """
+        self.directory.cleanup()
+
+    def test_duplicates_are_planned_once(self):
+        """Test that the same bytes going to the same key are uploaded once
+        """
+        s3_dir = S3Path(uri='s3://bucket/src/', is_directory=True)
+        for _ in range(3):
+            s3_file = S3File(path=self.script)
+            s3_file.s3_path = s3_dir
+            self.planner.add_file(s3_file)
+        self.planner.add_file(S3File(
+            text='select 1;', s3_path=S3Path(uri='s3://bucket/src/a.sql')))
+        self.planner.add_file(S3File(s3_path=S3Path(uri='s3://bucket/x')))
+
+        eq_([(u.bucket, u.key) for u in self.planner.uploads],
+            [('bucket', 'src/a.sql'), ('bucket', 'src/script.sh')])
+        eq_(self.planner.duplicates, 2)
+
+    def test_directories_are_expanded(self):
+        """Test that every file of a directory is planned
+        """
+        self.planner.add_file(S3Directory(
+            path=self.directory.getpath('scripts'),
+            s3_path=S3Path(uri='s3://bucket/src/scripts/', is_directory=True),
+        ))
+        eq_([u.key for u in self.planner.uploads],
+            ['src/scripts/a.sh', 'src/scripts/nested/b.sh'])
+
+    @staticmethod
+    @raises(ETLInputError)
+    def test_file_without_s3_path():
+        """Test that files need an S3 path
+        """
+        UploadPlanner().add_file(S3File(text='echo'))
+
+    def test_upload(self):
+        """Test that the files are uploaded over one connection per worker
+        """
+        clear_s3_connections()
+        conn = FakeS3Connection()
+        for index in range(20):
+            self.planner.add_file(S3File(
+                text='file %d' % index,
+                s3_path=S3Path(uri='s3://bucket/src/%d' % index),
+            ))
+
+        with patch('boto.connect_s3', side_effect=conn.connect) as connect_s3:
+            timings = self.planner.upload(workers=4)
+
+        assert 1 <= connect_s3.call_count <= 4
+        eq_(len(timings), 20)
+        eq_(conn.calls['PUT'], 20)
+        eq_(conn.buckets['bucket'].contents['src/7'], 'file 7')
+
+    def test_large_files_are_uploaded_in_parts(self):
+        """Test that files over the part size go through multipart uploads
+        """
+        clear_s3_connections()
+        conn = FakeS3Connection()
+        large_file = self.directory.write('large.csv', 'a,b\n' * 10)
+        self.planner.add_file(S3File(
+            path=large_file, s3_path=S3Path(uri='s3://bucket/large.csv')))
+        self.planner.add_file(S3File(path=self.script,
+                                     s3_path=S3Path(uri='s3://bucket/x.sh')))
+
+        with patch('boto.connect_s3', side_effect=conn.connect), \
+                patch('dataduct.s3.upload_planner.PART_SIZE', 16), \
+                patch('dataduct.s3.multipart.MIN_PART_SIZE', 1), \
+                patch('dataduct.s3.multipart.MultiPartUpload',
+                      FakeMultiPartUpload):
+            self.planner.upload(workers=2)
+
+        eq_(conn.calls['UPLOAD_PART'], 3)
+        eq_(conn.buckets['bucket'].contents['large.csv'], 'a,b\n' * 10)
+        eq_(conn.buckets['bucket'].contents['x.sh'], 'echo script')
@@ -0,0 +1,230 @@
+"""
+Deduplicated and concurrent upload of files to S3
+"""
+import os
+import time
+
+from boto.utils import compute_md5
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+from StringIO import StringIO
+
+from ..utils.exceptions import ETLInputError
+from .content_store import content_addressed_prefix
+from .multipart import PART_SIZE
+from .multipart import multipart_upload
+from .s3_directory import S3Directory
+from .utils import get_s3_bucket
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+PROGRESS_SECTIONS = 10
+SLOWEST_UPLOADS = 5
+
+# A single file to be uploaded with the (hex, base64, size) MD5 of its bytes
+PlannedUpload = namedtuple(
+    'PlannedUpload', ['bucket', 'key', 'file_name', 'text', 'md5'])
+
+
+def _is_uploaded(etag, md5):
+    """Whether an existing key with the ETag has the contents with the MD5
+    """
+    if etag is None:
+        return False
+    # Multipart ETags are the MD5 of the MD5s of the parts
+    return '-' in etag or etag == md5
+
+
+class UploadPlanner(object):
+    """Plans the upload of S3 files and directories and runs it in parallel
+
+    Directories are expanded to one upload per file and uploads are keyed by
+    their destination, so an artifact referenced by several pipeline objects
+    is only uploaded once. Each worker thread sends its requests over its
+    own S3 connection, reused for all the files it uploads.
+    Files larger than S3_MULTIPART_PART_SIZE are uploaded in parts.
+    """
+    def __init__(self):
+        """Constructor for the UploadPlanner class
+        """
+        self._uploads = dict()
+        self.duplicates = 0
+        self.unchanged = 0
+
+    @property
+    def uploads(self):
+        """Planned uploads sorted by destination
+
+        Returns:
+            result(list of PlannedUpload): uploads that will be made
+        """
+        return [self._uploads[d] for d in sorted(self._uploads)]
+
+    def _plan(self, bucket, key, file_name=None, text=None):
+        """Add an upload unless the same bytes already go to the destination
+        """
+        if file_name:
+            with open(file_name, 'rb') as f:
+                md5 = compute_md5(f)
+        else:
+            md5 = compute_md5(StringIO(text))
+
+        destination = (bucket, key)
+        planned = self._uploads.get(destination)
+        if planned is not None:
+            if planned.md5 == md5:
+                self.duplicates += 1
+                return
+            logger.warning('Different files uploaded to s3://%s/%s, '
+                           'the last one is used', bucket, key)
+        self._uploads[destination] = PlannedUpload(
+            bucket, key, file_name, text, md5)
+
+    def add_file(self, s3_file):
+        """Plan the upload of an S3 file or directory
+
+        Args:
+            s3_file(S3File or S3Directory): file to be uploaded
+
+        Raises:
+            ETLInputError: If no S3 path is provided for the file
+        """
+        if isinstance(s3_file, S3Directory):
+            return self.add_directory(s3_file)
+
+        s3_path = s3_file.s3_path
+        if not s3_path:
+            raise ETLInputError('No URI provided for the file to be uploaded')
+
+        # Nothing is stored locally for files that only live on S3
+        if not s3_file.path and not s3_file.local_text:
+            return
+
+        if s3_path.is_directory:
+            key = os.path.join(s3_path.key, os.path.basename(s3_file.path))
+        else:
+            key = s3_path.key
+        self._plan(s3_path.bucket, key, s3_file.path, s3_file.local_text)
+
+    def add_directory(self, s3_directory):
+        """Plan the upload of every file in an S3 directory
+
+        Args:
+            s3_directory(S3Directory): directory to be uploaded
+        """
+        s3_path = s3_directory.s3_path
+        if not s3_path or not s3_path.is_directory:
+            raise ETLInputError('S3 path must be directory')
+
+        if not os.path.isdir(s3_directory.path):
+            raise ETLInputError('Local path must be a directory')
+
+        for root, _, file_names in os.walk(s3_directory.path,
+                                           followlinks=True):
+            for file_name in file_names:
+                local_file_path = os.path.join(root, file_name)
+                relative_path = os.path.relpath(
+                    local_file_path, s3_directory.path)
+                self._plan(s3_path.bucket,
+                           os.path.join(s3_path.key, relative_path),
+                           file_name=local_file_path)
+
+    def add_files(self, s3_files):
+        """Plan the upload of a list of S3 files and directories
+
+        Args:
+            s3_files(list of S3File or S3Directory): files to be uploaded
+        """
+        for s3_file in s3_files:
+            self.add_file(s3_file)
+
+    def upload(self, workers=DEFAULT_WORKERS):
+        """Upload all the planned files with a pool of threads
+
+        Note:
+            Files in the content addressed store are only uploaded if they
+            do not exist yet. Existing files are found with one LIST request
+            per digest directory instead of one request per file. The ETag
+            of a multipart upload is not the MD5 of the file, so such files
+            are only checked for existence, which the digest directory
+            makes sufficient.
+
+        Args:
+            workers(int): maximum number of concurrent requests
+
+        Returns:
+            timings(list of tuple): seconds spent on each S3 uri
+        """
+        uploads = self.uploads
+        if not uploads:
+            return []
+
+        prefixes = set()
+        for upload in uploads:
+            prefix = content_addressed_prefix(upload.bucket, upload.key)
+            if prefix is not None:
+                prefixes.add((upload.bucket, prefix))
+
+        def list_prefix(bucket_prefix):
+            """MD5 of the keys that exist under a prefix
+            """
+            bucket, prefix = bucket_prefix
+            return [((bucket, key.name), key.etag.strip('"'))
+                    for key in get_s3_bucket(bucket).list(prefix=prefix)]
+
+        def upload_file(upload):
+            """Upload a single file and time it
+            """
+            start = time.time()
+            bucket = get_s3_bucket(upload.bucket)
+            if upload.md5[2] > PART_SIZE:
+                multipart_upload(bucket, upload.key, upload.file_name,
+                                 upload.text, part_size=PART_SIZE)
+            elif upload.file_name:
+                bucket.new_key(upload.key).set_contents_from_filename(
+                    upload.file_name, md5=upload.md5)
+            else:
+                bucket.new_key(upload.key).set_contents_from_string(
+                    upload.text, md5=upload.md5)
+            uri = 's3://%s/%s' % (upload.bucket, upload.key)
+            return uri, time.time() - start
+
+        start = time.time()
+        pool = ThreadPool(processes=max(1, min(workers, len(uploads))))
+        try:
+            existing = dict()
+            for keys in pool.imap_unordered(list_prefix, prefixes):
+                existing.update(keys)
+            changed = [u for u in uploads
+                       if not _is_uploaded(existing.get((u.bucket, u.key)),
+                                           u.md5[0])]
+            self.unchanged = len(uploads) - len(changed)
+
+            timings = []
+            progress_step = max(1, len(changed) / PROGRESS_SECTIONS)
+            for timing in pool.imap_unordered(upload_file, changed):
+                timings.append(timing)
+                if len(timings) % progress_step == 0:
+                    logger.info('Uploaded %d of %d files',
+                                len(timings), len(changed))
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+        self._log_summary(timings, time.time() - start)
+        return timings
+
+    def _log_summary(self, timings, elapsed):
+        """Log the total time and the slowest uploads
+        """
+        logger.info('Uploaded %d files in %.2f seconds, skipped %d '
+                    'duplicates and %d unchanged files', len(timings),
+                    elapsed, self.duplicates, self.unchanged)
+        for uri, seconds in sorted(timings, key=lambda t: -t[1])[
+                :SLOWEST_UPLOADS]:
+            logger.info('%.2f seconds: %s', seconds, uri)
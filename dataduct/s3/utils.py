@@ -2,29 +2,94 @@
 Shared utility functions
 """
 import boto.s3
+import hashlib
 import os
 import pyprind
+import shutil
+import threading
+import time
+
+from collections import namedtuple
+from fnmatch import fnmatch
+from multiprocessing.pool import ThreadPool
 
 from ..utils.exceptions import ETLInputError
+from .multipart import MAX_COPY_SIZE
+from .multipart import PART_SIZE
+from .multipart import multipart_copy
+from .multipart import multipart_upload
+from .read_cache import get_read_cache
 from .s3_path import S3Path
 
+import logging
+logger = logging.getLogger(__name__)
 
 CHUNK_SIZE = 5242880
 PROGRESS_SECTIONS = 10
+SYNC_WORKERS = 8
+DELETE_BATCH_SIZE = 1000
+
+# Outcome of a directory upload or download
+SyncResult = namedtuple(
+    'SyncResult', ['transferred', 'skipped', 'bytes', 'seconds'])
+
+# Connections are not shared between threads, each thread keeps its own
+# connection with its pool of keep-alive HTTP connections
+_connections = threading.local()
+_connections_generation = [0]
+_connections_lock = threading.Lock()
+
+
+def get_s3_connection():
+    """Get the S3 connection of the current thread
+
+    Note:
+        The connection is created on first use and reused by all the calls
+        from the thread, which saves resolving the credentials and opening
+        a new HTTPS connection for every request
+
+    Returns:
+        S3Connection: boto connection of the thread
+    """
+    with _connections_lock:
+        generation = _connections_generation[0]
+    if getattr(_connections, 'generation', None) != generation:
+        _connections.conn = boto.connect_s3()
+        _connections.buckets = dict()
+        _connections.generation = generation
+    return _connections.conn
 
 
-def get_s3_bucket(bucket_name):
+def clear_s3_connections():
+    """Drop the cached S3 connections of all the threads
+
+    Note:
+        Each thread opens a new connection on its next call, e.g. after the
+        credentials have changed
+    """
+    with _connections_lock:
+        _connections_generation[0] += 1
+
+
+def get_s3_bucket(bucket_name, conn=None):
     """Returns an S3 bucket object from boto
 
     Args:
         bucket_name(str): Name of the bucket to be read
+        conn(S3Connection): Connection to use, the cached connection of the
+            thread if None
 
     Returns:
         bucket(boto.S3.bucket.Bucket): Boto S3 bucket object
     """
-    conn = boto.connect_s3()
-    bucket = boto.s3.bucket.Bucket(conn, bucket_name)
-    return bucket
+    if conn is not None:
+        return conn.get_bucket(bucket_name, validate=False)
+
+    conn = get_s3_connection()
+    if bucket_name not in _connections.buckets:
+        _connections.buckets[bucket_name] = conn.get_bucket(
+            bucket_name, validate=False)
+    return _connections.buckets[bucket_name]
 
 
 def read_from_s3(s3_path):
@@ -33,6 +98,9 @@ def read_from_s3(s3_path):
     Args:
         s3_path(S3Path): Input path of the file to be read
 
+    Note:
+        The file is read through the local cache if S3_CACHE_DIR is set
+
     Returns:
         results(str): Contents of the file as a string
     """
@@ -40,6 +108,10 @@ def read_from_s3(s3_path):
         raise ETLInputError('Input path should be of type S3Path')
 
     bucket = get_s3_bucket(s3_path.bucket)
+    cache = get_read_cache()
+    if cache is not None:
+        return cache.read(bucket, s3_path.key)
+
     key = bucket.get_key(s3_path.key)
 
     return key.get_contents_as_string()
@@ -48,6 +120,9 @@ def read_from_s3(s3_path):
 def upload_to_s3(s3_path, file_name=None, file_text=None):
     """Uploads a file to S3
 
+    Note:
+        Files larger than S3_MULTIPART_PART_SIZE are uploaded in parts
+
     Args:
         s3_path(S3Path): Output path of the file to be uploaded
         file_name(str): Name of the file to be uploaded to s3
@@ -63,6 +138,18 @@ def upload_to_s3(s3_path, file_name=None, file_text=None):
         source_size = os.stat(file_name).st_size
     else:
         source_size = len(file_text)
+
+    bucket = get_s3_bucket(s3_path.bucket)
+    if s3_path.is_directory:
+        key_name = os.path.join(s3_path.key, os.path.basename(file_name))
+    else:
+        key_name = s3_path.key
+
+    # Large files are uploaded in parts in parallel
+    if source_size > PART_SIZE:
+        multipart_upload(bucket, key_name, file_name, file_text)
+        return
+
     if source_size > CHUNK_SIZE:
         bar = pyprind.ProgPercent(
             PROGRESS_SECTIONS, monitor=True, title='Uploading %s' % file_name)
@@ -73,12 +160,6 @@ def upload_to_s3(s3_path, file_name=None, file_text=None):
         bar = None
         cb = None
 
-    bucket = get_s3_bucket(s3_path.bucket)
-    if s3_path.is_directory:
-        key_name = os.path.join(s3_path.key, os.path.basename(file_name))
-    else:
-        key_name = s3_path.key
-
     key = bucket.new_key(key_name)
     if file_name:
         key.set_contents_from_filename(
@@ -88,9 +169,64 @@ def upload_to_s3(s3_path, file_name=None, file_text=None):
             file_text, cb=cb, num_cb=PROGRESS_SECTIONS)
 
 
+def md5_digest(file_name=None, file_text=None):
+    """MD5 of the contents of a local file or a string
+
+    Args:
+        file_name(str): Name of the local file
+        file_text(str): Contents of the file
+
+    Returns:
+        result(str): hex digest of the contents
+    """
+    digest = hashlib.md5()
+    if file_name:
+        with open(file_name, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+                digest.update(chunk)
+    else:
+        digest.update(file_text)
+    return digest.hexdigest()
+
+
+def matches_s3(s3_path, file_name=None, file_text=None):
+    """Check if a file on S3 has the same contents as a local file
+
+    Note:
+        The ETag of the key is compared to the MD5 of the local contents, so
+        files uploaded in multiple parts never match.
+
+    Args:
+        s3_path(S3Path): Path of the file on S3
+        file_name(str): Name of the local file
+        file_text(str): Contents of the local file
+
+    Returns:
+        result(bool): True if the key exists and has the same contents
+    """
+    if not isinstance(s3_path, S3Path):
+        raise ETLInputError('Input path should be of type S3Path')
+
+    if not any([file_name, file_text]):
+        raise ETLInputError('File_name or text should be given')
+
+    if s3_path.is_directory:
+        key_name = os.path.join(s3_path.key, os.path.basename(file_name))
+    else:
+        key_name = s3_path.key
+
+    key = get_s3_bucket(s3_path.bucket).get_key(key_name)
+    if key is None:
+        return False
+    return key.etag.strip('"') == md5_digest(file_name, file_text)
+
+
 def download_from_s3(s3_path, local_path):
     """Downloads a file from s3
 
+    Note:
+        The file is read through the local cache if S3_CACHE_DIR is set
+
     Args:
         s3_path(S3Path): Input path of the file to be downloaded
         local_path(file_path): Output path of the file to be downloaded
@@ -102,7 +238,6 @@ def download_from_s3(s3_path, local_path):
         raise ETLInputError('S3 path must not be directory')
 
     bucket = get_s3_bucket(s3_path.bucket)
-    key = bucket.get_key(key_name=s3_path.key)
 
     # Make sure directories exist
     if not os.path.isdir(os.path.abspath(local_path)):
@@ -110,6 +245,12 @@ def download_from_s3(s3_path, local_path):
 
     # Calculate relative path
     local_file_path = os.path.join(local_path, s3_path.base_filename)
+    cache = get_read_cache()
+    if cache is not None:
+        shutil.copyfile(cache.fetch(bucket, s3_path.key), local_file_path)
+        return
+
+    key = bucket.get_key(key_name=s3_path.key)
     key.get_contents_to_filename(local_file_path)
 
 
@@ -132,13 +273,92 @@ def copy_within_s3(s3_old_path, s3_new_path, raise_when_no_exist=True):
         raise ETLInputError('The key does not exist: %s' % s3_old_path.uri)
 
 
-def upload_dir_to_s3(s3_path, local_path, filter_function=None):
+def _included(relative_path, include=None, exclude=None):
+    """Check if a relative path passes the include and exclude patterns
+
+    Args:
+        relative_path(str): path relative to the synced directory
+        include(list of str): glob patterns of the paths to sync, all if None
+        exclude(list of str): glob patterns of the paths not to sync
+
+    Returns:
+        result(bool): True if the path should be synced
+    """
+    if include and not any(fnmatch(relative_path, p) for p in include):
+        return False
+    return not any(fnmatch(relative_path, p) for p in exclude or [])
+
+
+def _same_file(local_file_path, key):
+    """Check if a local file has the size and ETag of an S3 key
+
+    Note:
+        Files uploaded in multiple parts have no MD5 ETag and never match
+    """
+    if key is None or not os.path.isfile(local_file_path):
+        return False
+    if os.path.getsize(local_file_path) != key.size:
+        return False
+    return key.etag.strip('"') == md5_digest(local_file_path)
+
+
+def _run_transfers(transfer, items, workers, action):
+    """Run transfers on a pool of threads and log the throughput
+
+    Args:
+        transfer(function): transfers an item and returns the bytes moved,
+            None if the item was skipped
+        items(list): items to transfer
+        workers(int): maximum number of concurrent transfers
+        action(str): description of the transfer for the log
+
+    Returns:
+        result(SyncResult): files transferred and skipped, bytes and time
+    """
+    start = time.time()
+    transferred = skipped = total_bytes = 0
+    if items:
+        pool = ThreadPool(processes=max(1, min(workers, len(items))))
+        try:
+            for size in pool.imap_unordered(transfer, items):
+                if size is None:
+                    skipped += 1
+                else:
+                    transferred += 1
+                    total_bytes += size
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    seconds = time.time() - start
+    logger.info('%s %d files (%.1f MB) in %.2f seconds, %.2f MB/s, skipped '
+                '%d unchanged files', action, transferred,
+                total_bytes / 1048576.0, seconds,
+                total_bytes / 1048576.0 / seconds if seconds else 0, skipped)
+    return SyncResult(transferred, skipped, total_bytes, seconds)
+
+
+def upload_dir_to_s3(s3_path, local_path, filter_function=None,
+                     include=None, exclude=None, workers=SYNC_WORKERS):
     """Uploads a complete directory to s3
 
+    Note:
+        Files are uploaded concurrently with their path relative to the
+        directory. Files with the same size and ETag on S3 are skipped.
+
     Args:
         s3_path(S3Path): Output path of the file to be uploaded
         local_path(file_path): Input path of the file to be uploaded
-        filter_function(function): Function to filter out directories
+        filter_function(function): Function to filter out file names
+        include(list of str): glob patterns of the relative paths to upload
+        exclude(list of str): glob patterns of the relative paths to skip
+        workers(int): maximum number of concurrent uploads
+
+    Returns:
+        result(SyncResult): files uploaded and skipped, bytes and time
     """
     if not isinstance(s3_path, S3Path):
         raise ETLInputError('Input path should be of type S3Path')
@@ -150,8 +370,11 @@ def upload_dir_to_s3(s3_path, local_path, filter_function=None):
         raise ETLInputError('Local path must be a directory')
 
     bucket = get_s3_bucket(s3_path.bucket)
+    existing = dict((key.name, key) for key in bucket.list(
+        prefix=s3_path.key.rstrip('/') + '/' if s3_path.key else ''))
 
-    # Add each file individually
+    # Collect each file individually
+    files = []
     for root, _, file_names in os.walk(local_path, followlinks=True):
         for file_name in file_names:
             # Filter file_name based on filter function
@@ -160,18 +383,45 @@ def upload_dir_to_s3(s3_path, local_path, filter_function=None):
 
             local_file_path = os.path.join(root, file_name)
             relative_path = os.path.relpath(local_file_path, local_path)
-
-            key_string = os.path.join(s3_path.key, relative_path)
-            key = bucket.new_key(key_string)
-            key.set_contents_from_filename(local_file_path)
-
-
-def download_dir_from_s3(s3_path, local_path):
+            if _included(relative_path, include, exclude):
+                files.append((local_file_path,
+                              os.path.join(s3_path.key, relative_path)))
+
+    def upload(item):
+        """Upload a file unless it did not change
+        """
+        local_file_path, key_string = item
+        if _same_file(local_file_path, existing.get(key_string)):
+            return None
+        size = os.path.getsize(local_file_path)
+        thread_bucket = get_s3_bucket(s3_path.bucket)
+        if size > PART_SIZE:
+            multipart_upload(thread_bucket, key_string, local_file_path)
+        else:
+            thread_bucket.new_key(key_string).set_contents_from_filename(
+                local_file_path)
+        return size
+
+    return _run_transfers(upload, files, workers, 'Uploaded')
+
+
+def download_dir_from_s3(s3_path, local_path, include=None, exclude=None,
+                         workers=SYNC_WORKERS):
     """Downloads a complete directory from s3
 
+    Note:
+        Keys are downloaded concurrently to their path relative to the
+        directory. Local files with the same size and ETag are skipped.
+
     Args:
         s3_path(S3Path): Input path of the file to be downloaded
         local_path(file_path): Output path of the file to be downloaded
+        include(list of str): glob patterns of the relative paths to download
+        exclude(list of str): glob patterns of the relative paths to skip
+        workers(int): maximum number of concurrent downloads
+
+    Returns:
+        result(SyncResult): files downloaded and skipped, bytes and time
     """
     if not isinstance(s3_path, S3Path):
         raise ETLInputError('Input path should be of type S3Path')
@@ -180,27 +430,67 @@ def download_dir_from_s3(s3_path, local_path):
         raise ETLInputError('S3 path must be directory')
 
     bucket = get_s3_bucket(s3_path.bucket)
-    keys = bucket.get_all_keys(prefix=s3_path.key)
-
-    # Download each file individually
-    for key in keys:
-        # Calculate relative path
-        local_file_path = os.path.join(
-            local_path, os.path.basename(str(key.name)))
+    prefix = s3_path.key.rstrip('/') + '/' if s3_path.key else ''
+
+    keys = []
+    for key in bucket.list(prefix=prefix):
+        # Calculate relative path, skipping the directory placeholders
+        relative_path = key.name[len(prefix):]
+        if relative_path and not relative_path.endswith('/') and \
+                _included(relative_path, include, exclude):
+            keys.append((key, os.path.join(local_path, relative_path)))
+
+    def download(item):
+        """Download a key unless the local file did not change
+        """
+        key, local_file_path = item
+        if _same_file(local_file_path, key):
+            return None
 
         # Make sure directories exist
         local_file_dir = os.path.dirname(local_file_path)
-        if not os.path.exists(local_file_dir):
+        try:
             os.makedirs(local_file_dir)
+        except OSError:
+            if not os.path.isdir(local_file_dir):
+                raise
+
+        get_s3_bucket(s3_path.bucket).new_key(
+            key.name).get_contents_to_filename(local_file_path)
+        return key.size
+
+    return _run_transfers(download, keys, workers, 'Downloaded')
+
 
-        key.get_contents_to_filename(local_file_path)
+def _batches(iterable, size):
+    """Split an iterable in lists of at most size items
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
-def delete_dir_from_s3(s3_path):
+def delete_dir_from_s3(s3_path, workers=SYNC_WORKERS):
     """Deletes a complete directory from s3
 
+    Note:
+        Keys are listed page by page and deleted with multi-object delete
+        requests of up to 1000 keys, sent concurrently
+
     Args:
         s3_path(S3Path): Path of the directory to be deleted
+        workers(int): maximum number of concurrent delete requests
+
+    Returns:
+        result(int): number of keys deleted
+
+    Raises:
+        ETLInputError: If some of the keys could not be deleted
     """
     if not isinstance(s3_path, S3Path):
         raise ETLInputError('Input path should be of type S3Path')
@@ -214,18 +504,55 @@ def delete_dir_from_s3(s3_path):
     # Enforce this to be a folder's prefix
     prefix += '/' if not prefix.endswith('/') else ''
 
-    keys = bucket.get_all_keys(prefix=s3_path.key)
-    for key in keys:
-        key.delete()
-
-
-def copy_dir_with_s3(s3_old_path, s3_new_path, raise_when_no_exist=True):
+    def delete(key_names):
+        """Delete a batch of keys with a single request
+        """
+        return get_s3_bucket(s3_path.bucket).delete_keys(
+            key_names, quiet=True).errors
+
+    start = time.time()
+    deleted = 0
+    errors = []
+    pool = ThreadPool(processes=workers)
+    try:
+        batches = _batches((key.name for key in bucket.list(prefix=prefix)),
+                           DELETE_BATCH_SIZE)
+        for key_names, batch_errors in pool.imap_unordered(
+                lambda batch: (batch, delete(batch)), batches):
+            deleted += len(key_names) - len(batch_errors)
+            errors.extend(batch_errors)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    logger.info('Deleted %d keys from %s in %.2f seconds', deleted,
+                s3_path.uri, time.time() - start)
+    if errors:
+        raise ETLInputError('Could not delete %d keys from %s: %s' % (
+            len(errors), s3_path.uri,
+            ', '.join(e.key for e in errors[:10])))
+    return deleted
+
+
+def copy_dir_with_s3(s3_old_path, s3_new_path, raise_when_no_exist=True,
+                     workers=SYNC_WORKERS):
     """Copies files from one S3 Path to another
 
+    Note:
+        Keys are copied concurrently on the server side with their path
+        relative to the directory. Keys over 5 GB are copied in parts.
+
     Args:
         s3_old_path(S3Path): Output path of the file to be uploaded
         s3_new_path(S3Path): Output path of the file to be uploaded
         raise_when_no_exist(bool, optional): Raise error if file not found
+        workers(int): maximum number of concurrent copies
+
+    Returns:
+        result(SyncResult): keys copied, bytes and time
 
     Raises:
         ETLInputError: If s3_old_path does not exist
@@ -248,10 +575,24 @@ def copy_dir_with_s3(s3_old_path, s3_new_path, raise_when_no_exist=True):
     # Enforce this to be a folder's prefix
     prefix += '/' if not prefix.endswith('/') else ''
 
-    keys = bucket.get_all_keys(prefix=s3_old_path.key)
-    for key in keys:
-        if key:
-            key.copy(s3_new_path.bucket,
-                     os.path.join(s3_new_path.key, os.path.basename(key.key)))
-        elif raise_when_no_exist:
-            raise ETLInputError('The key does not exist: %s' % s3_old_path.uri)
+    keys = [key for key in bucket.list(prefix=prefix)
+            if not key.name.endswith('/')]
+    if not keys and raise_when_no_exist:
+        raise ETLInputError('The key does not exist: %s' % s3_old_path.uri)
+
+    def copy(key):
+        """Copy a key to the same relative path in the new directory
+        """
+        new_key_name = os.path.join(s3_new_path.key, key.name[len(prefix):])
+        if key.size > MAX_COPY_SIZE:
+            multipart_copy(key, get_s3_bucket(s3_new_path.bucket),
+                           new_key_name)
+        else:
+            # The listed key belongs to the connection of the calling thread
+            thread_key = get_s3_bucket(s3_old_path.bucket).new_key(key.name)
+            thread_key.storage_class = key.storage_class
+            thread_key.copy(s3_new_path.bucket, new_key_name,
+                            validate_dst_bucket=False)
+        return key.size
+
+    return _run_transfers(copy, keys, workers, 'Copied')
@@ -1,23 +1,72 @@
-from .column_check import ColumnCheckStep
-from .count_check import CountCheckStep
-from .create_load_redshift import CreateAndLoadStep
-from .create_update_sql import CreateUpdateSqlStep
-from .delta_load import DeltaLoadStep
-from .emr_job import EMRJobStep
-from .emr_streaming import EMRStreamingStep
-from .etl_step import ETLStep
-from .extract_local import ExtractLocalStep
-from .extract_rds import ExtractRdsStep
-from .extract_redshift import ExtractRedshiftStep
-from .extract_postgres import ExtractPostgresStep
-from .extract_s3 import ExtractS3Step
-from .load_redshift import LoadRedshiftStep
-from .load_postgres import LoadPostgresStep
-from .load_reload_pk import LoadReloadAndPrimaryKeyStep
-from .pipeline_dependencies import PipelineDependenciesStep
-from .primary_key_check import PrimaryKeyCheckStep
-from .qa_transform import QATransformStep
-from .reload import ReloadStep
-from .sql_command import SqlCommandStep
-from .transform import TransformStep
-from .upsert import UpsertStep
+"""
+ETL steps, imported when they are first used
+
+Importing every step module pulls in the database parsers and drivers, which
+the executors that run on the resources and most of the CLI do not need. The
+package is replaced by a module that imports a step class the first time it
+is accessed, so `from dataduct.steps import TransformStep` keeps working.
+"""
+import importlib
+import sys
+from types import ModuleType
+
+# Step classes by step type, relative to this package
+STEP_CLASSES = {
+    'column-check': 'column_check.ColumnCheckStep',
+    'count-check': 'count_check.CountCheckStep',
+    'create-load-redshift': 'create_load_redshift.CreateAndLoadStep',
+    'create-update-sql': 'create_update_sql.CreateUpdateSqlStep',
+    'delta-load': 'delta_load.DeltaLoadStep',
+    'emr-step': 'emr_job.EMRJobStep',
+    'emr-streaming': 'emr_streaming.EMRStreamingStep',
+    'extract-local': 'extract_local.ExtractLocalStep',
+    'extract-rds': 'extract_rds.ExtractRdsStep',
+    'extract-redshift': 'extract_redshift.ExtractRedshiftStep',
+    'extract-postgres': 'extract_postgres.ExtractPostgresStep',
+    'extract-s3': 'extract_s3.ExtractS3Step',
+    'load-redshift': 'load_redshift.LoadRedshiftStep',
+    'load-postgres': 'load_postgres.LoadPostgresStep',
+    'load-reload-pk': 'load_reload_pk.LoadReloadAndPrimaryKeyStep',
+    'pipeline-dependencies': 'pipeline_dependencies.PipelineDependenciesStep',
+    'primary-key-check': 'primary_key_check.PrimaryKeyCheckStep',
+    'qa-transform': 'qa_transform.QATransformStep',
+    'reload': 'reload.ReloadStep',
+    'sql-command': 'sql_command.SqlCommandStep',
+    'transform': 'transform.TransformStep',
+    'upsert': 'upsert.UpsertStep',
+}
+
+# Modules of the classes exported by the package, the base step included
+STEP_MODULES = dict(reversed(step_class.rsplit('.', 1))
+                    for step_class in STEP_CLASSES.itervalues())
+STEP_MODULES['ETLStep'] = 'etl_step'
+
+
+class _LazyStepsModule(ModuleType):
+    """Package module that imports the step classes on first access
+    """
+    def __getattr__(self, name):
+        """Import the module of a step class that is not loaded yet
+        """
+        if name not in STEP_MODULES:
+            raise AttributeError('module %r has no attribute %r' %
+                                 (self.__name__, name))
+        module = importlib.import_module(
+            '%s.%s' % (self.__name__, STEP_MODULES[name]))
+        value = getattr(module, name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        """List the step classes along with the loaded attributes
+        """
+        return sorted(set(self.__dict__) | set(STEP_MODULES))
+
+
+# Python 2 clears the globals of a module when it is garbage collected, so
+# the replaced module is kept alive for the methods of the lazy module
+_module = _LazyStepsModule(__name__, __doc__)
+_module.__dict__.update(sys.modules[__name__].__dict__)
+_module.__all__ = sorted(STEP_MODULES)
+_module._original_module = sys.modules[__name__]
+sys.modules[__name__] = _module
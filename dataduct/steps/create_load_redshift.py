@@ -3,6 +3,7 @@
 from ..config import Config
 from ..database import SqlStatement
 from ..database import Table
+from ..s3 import S3Path
 from ..utils import constants as const
 from ..utils.helpers import parse_path
 from .transform import TransformStep
@@ -36,6 +37,12 @@ class CreateAndLoadStep(TransformStep):
         if script_arguments is None:
             script_arguments = list()
 
+        # The input files are listed in a manifest and loaded by one COPY
+        if kwargs.get('s3_data_dir') is not None:
+            script_arguments.append('--manifest_path=%s' % S3Path(
+                key=const.LOAD_MANIFEST_FILE,
+                parent_dir=kwargs['s3_data_dir']).uri)
+
         script_arguments.extend([
             '--table_definition=%s' % table.sql().sql(),
             '--s3_input_paths'] + input_paths)
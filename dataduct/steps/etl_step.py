@@ -4,15 +4,19 @@ Base class for an etl step
 from ..config import Config
 from ..pipeline import Activity
 from ..pipeline import CopyActivity
+from ..pipeline import DependencyClosure
 from ..pipeline import S3Node
 from ..s3 import S3File
 from ..s3 import S3LogPath
 from ..s3 import S3Path
+from ..s3 import content_addressed_dir
 from ..utils import constants as const
 from ..utils.exceptions import ETLInputError
+from ..utils.object_registry import ObjectRegistry
 
 config = Config()
 MAX_RETRIES = config.etl.get('MAX_RETRIES', const.ZERO)
+CONTENT_ADDRESSED_SOURCES = config.etl.get('CONTENT_ADDRESSED_SOURCES', False)
 
 
 class ETLStep(object):
@@ -33,17 +37,22 @@ class ETLStep(object):
     def __init__(self, id, s3_data_dir=None, s3_log_dir=None,
                  s3_source_dir=None, schedule=None, resource=None,
                  worker_group=None, input_node=None, input_path=None,
-                 required_steps=None, max_retries=MAX_RETRIES, sns_object=None):
+                 required_steps=None, max_retries=MAX_RETRIES, sns_object=None,
+                 dependency_closure=None):
         """Constructor for the ETLStep object
 
         Args:
             unique_id (str): Unique id for the pipeline
             name (str): Name of the pipeline (optional)
             pipeline_id (str): Id assigned by AWS and looks like df-xyz
+            dependency_closure(DependencyClosure): closure cache shared by
+                the steps of the pipeline, a new one is created if None
 
         Note:
             If pipelineId is provided we don't need name or unique_id
         """
+        if dependency_closure is None:
+            dependency_closure = DependencyClosure()
 
         # Initialize inputs
         self.id = id
@@ -56,11 +65,12 @@ class ETLStep(object):
         self.max_retries = max_retries
         self._depends_on = list()
         self._output = None
-        self._objects = dict()
+        self._objects = ObjectRegistry()
         self._required_steps = list()
         self._required_activities = list()
         self._input_node = input_node
         self._sns_object = sns_object
+        self._dependency_closure = dependency_closure
 
         if input_path is not None and input_node is not None:
             raise ETLInputError('Both input_path and input_node specified')
@@ -103,28 +113,18 @@ class ETLStep(object):
             self._required_activities.extend(step.activities)
 
         # Set required_activities as the depend_on variable of all activities
-        for activity in self.activities:
-            activity['dependsOn'] = self._find_actual_required_activities()
+        activities = self.activities
+        if activities:
+            required_activities = self._find_actual_required_activities()
+            self._dependency_closure.invalidate(activities)
+            for activity in activities:
+                activity['dependsOn'] = required_activities
 
     def _find_actual_required_activities(self):
         """Find the actual nodes that the activity should depend upon instead
             of all nodes that are sent as required steps
         """
-        activity_set = set(self._required_activities)
-        for required_activity in self._required_activities:
-            activity_set -= self._resolve_dependencies(
-                required_activity.depends_on)
-        return list(activity_set)
-
-    def _resolve_dependencies(self, dependencies):
-        """Resolve the dependencies of the step recursively
-        """
-        dependencies = dependencies if isinstance(dependencies, list) else \
-            [dependencies]
-        result = set(dependencies)
-        for dependency in dependencies:
-            result |= self._resolve_dependencies(dependency.depends_on)
-        return result
+        return self._dependency_closure.prune(self._required_activities)
 
     def create_pipeline_object(self, object_class, object_name=None, **kwargs):
         """Create the pipeline objects associated with the step
@@ -137,8 +137,7 @@ class ETLStep(object):
             new_object(PipelineObject): Creates object based on class.
             Name of object is created on its type and index if not provided
         """
-        instance_count = sum([1 for o in self._objects.values()
-                              if isinstance(o, object_class)])
+        instance_count = self._objects.count(object_class)
 
         # Object name/ids are given by [step_id].[object_class][index]
         if object_name is None:
@@ -224,13 +223,21 @@ class ETLStep(object):
     def create_script(self, s3_object):
         """Set the s3 path for s3 objects with the s3_source_dir
 
+        Note:
+            With CONTENT_ADDRESSED_SOURCES the object is stored in a directory
+            named after the digest of its contents instead, so unchanged
+            sources are not uploaded again for every pipeline version.
+
         Args:
             s3_object(S3File): S3file for which the source directory is set
 
         Returns:
             s3_object(S3File): S3File after the path is set
         """
-        s3_object.s3_path = self.s3_source_dir
+        if CONTENT_ADDRESSED_SOURCES:
+            s3_object.s3_path = content_addressed_dir(s3_object)
+        else:
+            s3_object.s3_path = self.s3_source_dir
         return s3_object
 
     def copy_s3(self, input_node, dest_uri):
@@ -425,6 +432,7 @@ class ETLStep(object):
             'schedule': etl.schedule,
             'max_retries': etl.max_retries,
             'required_steps': list(),
+            'dependency_closure': etl.dependency_closure,
         }
         step_args.update(resource_or_worker_group)
         step_args.update(input_args)
@@ -459,10 +467,10 @@ class ETLStep(object):
                 required_nodes = [input_node]
 
             for required_node in required_nodes:
-                for step in etl.steps.values():
-                    if step not in step_args['required_steps'] and \
-                            required_node in step.pipeline_objects:
-                        step_args['required_steps'].append(step)
+                step = etl.producing_step(required_node)
+                if step is not None and \
+                        step not in step_args['required_steps']:
+                    step_args['required_steps'].append(step)
 
         # Set the name if name not provided
         if 'name' in step_args:
@@ -470,9 +478,7 @@ class ETLStep(object):
         else:
             # If the name of the step is not provided, one is assigned as:
             #   [step_class][index]
-            name = cls.__name__ + str(sum(
-                [1 for a in etl.steps.values() if isinstance(a, cls)]
-            ))
+            name = cls.__name__ + str(etl.steps.count(cls))
 
         # Each step is given it's own directory so that there is no clashing
         # of file names.
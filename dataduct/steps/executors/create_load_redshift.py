@@ -4,19 +4,32 @@
 import argparse
 import pandas.io.sql as pdsql
 import psycopg2.extras
+import time
 
 from dataduct.config import get_aws_credentials
-from dataduct.data_access import redshift_connection
 from dataduct.database import SqlStatement
 from dataduct.database import Table
+from dataduct.s3 import S3Path
+from dataduct.s3.manifest import create_copy_manifest
+from dataduct.s3.manifest import list_prefix_keys
+from dataduct.s3.split import copy_option_words
+from dataduct.s3.split import split_part_count
+from dataduct.s3.split import split_to_gzip_parts
+from dataduct.s3.split import unsplittable_options
+from dataduct.s3.utils import delete_dir_from_s3
 from dataduct.utils.helpers import stringify_credentials
 from sys import stderr
 
 
 def load_redshift(table, input_paths, max_error=0,
                   replace_invalid_char=None, no_escape=False, gzip=False,
-                  command_options=None):
+                  command_options=None, manifest_path=None):
     """Load redshift table with the data in the input s3 paths
+
+    Note:
+        With a manifest all the input paths are loaded with a single COPY,
+        which Redshift runs in parallel across the slices of the cluster.
+        Otherwise each input path is loaded by its own COPY.
     """
     table_name = table.full_name
     print 'Loading data into %s' % table_name
@@ -39,16 +52,20 @@ def load_redshift(table, input_paths, max_error=0,
         "COMPUPDATE OFF STATUPDATE OFF {options};"
     )
 
-    for input_path in input_paths:
-        if not command_options:
-            command_options = (
-                "DELIMITER '\t' {escape} {gzip} NULL AS 'NULL' "
-                "TRUNCATECOLUMNS {max_error} {invalid_char_str}"
-            ).format(escape='ESCAPE' if not no_escape else '',
-                     gzip='GZIP' if gzip else '',
-                     max_error=error_string,
-                     invalid_char_str=invalid_char_str)
+    if not command_options:
+        command_options = (
+            "DELIMITER '\t' {escape} {gzip} NULL AS 'NULL' "
+            "TRUNCATECOLUMNS {max_error} {invalid_char_str}"
+        ).format(escape='ESCAPE' if not no_escape else '',
+                 gzip='GZIP' if gzip else '',
+                 max_error=error_string,
+                 invalid_char_str=invalid_char_str)
 
+    if manifest_path is not None:
+        input_paths = [manifest_path]
+        command_options = 'MANIFEST ' + command_options
+
+    for input_path in input_paths:
         statement = template.format(table=table_name,
                                     path=input_path,
                                     creds=creds,
@@ -58,6 +75,91 @@ def load_redshift(table, input_paths, max_error=0,
     return ' '.join(query)
 
 
+def count_slices(cursor):
+    """Number of slices of the Redshift cluster
+    """
+    cursor.execute('SELECT COUNT(*) AS slices FROM stv_slices')
+    return cursor.fetchone()['slices']
+
+
+def split_input(cursor, input_files, manifest_path, parts_per_slice,
+                command_options=None, no_escape=False):
+    """Split the input files into gzip parts for every slice to load
+
+    Note:
+        The parts are written to the split directory next to the manifest.
+        Input loaded with options in UNSPLITTABLE_OPTIONS is not split.
+
+    Args:
+        cursor(psycopg2.cursor): cursor of the Redshift connection
+        input_files(list of tuple): S3 uri and size of the input files
+        manifest_path(str): S3 uri of the manifest
+        parts_per_slice(int): number of parts loaded by each slice
+        command_options(str): custom options of the COPY, None for defaults
+        no_escape(bool): whether the default options leave out ESCAPE
+
+    Returns:
+        file_uris(list of str): uris of the parts, None if not split
+    """
+    if command_options:
+        blocking_options = unsplittable_options(command_options)
+        if blocking_options:
+            print 'Input is not split because of the COPY options: %s' % (
+                ', '.join(blocking_options))
+            return None
+        option_words = copy_option_words(command_options)
+        escape = 'ESCAPE' in option_words
+        quote_char = '"' if 'REMOVEQUOTES' in option_words else None
+    else:
+        escape = not no_escape
+        quote_char = None
+
+    slices = count_slices(cursor)
+    num_parts = split_part_count(
+        [size for _, size in input_files], slices, parts_per_slice)
+    if num_parts is None:
+        print 'Input of %d files needs no split for %d slices' % (
+            len(input_files), slices)
+        return None
+
+    split_path = S3Path(uri=manifest_path.rsplit('/', 1)[0] + '/split/',
+                        is_directory=True)
+    delete_dir_from_s3(split_path)
+    result = split_to_gzip_parts(
+        [uri for uri, _ in input_files],
+        sum(size for _, size in input_files), num_parts, split_path,
+        escape=escape, quote_char=quote_char)
+
+    print ('Split %d files into %d gzip parts in %.2f seconds, loaded by '
+           '%d of %d slices instead of %d') % (
+        len(input_files), len(result.part_uris), result.seconds,
+        min(len(result.part_uris), slices), slices,
+        min(len(input_files), slices))
+    print 'Compressed %d bytes to %d bytes, %d bytes saved' % (
+        result.bytes_in, result.bytes_out, result.bytes_in - result.bytes_out)
+    return result.part_uris
+
+
+def validate_load_commits(cursor, file_uris):
+    """Check that the last COPY of the session loaded all the files
+
+    Args:
+        cursor(psycopg2.cursor): cursor of the session that ran the COPY
+        file_uris(list of str): S3 uris of the files that should be loaded
+
+    Raises:
+        Exception: If some files are missing in STL_LOAD_COMMITS
+    """
+    cursor.execute("SELECT DISTINCT TRIM(filename) AS filename "
+                   "FROM stl_load_commits WHERE query = pg_last_copy_id()")
+    committed = set(row['filename'] for row in cursor.fetchall())
+    missing = [uri for uri in file_uris if uri not in committed]
+    if missing:
+        raise Exception('Files not loaded by the COPY: %s' %
+                        ', '.join(missing))
+    print 'Loaded %d files' % len(file_uris)
+
+
 def create_error_retrieval_query(input_paths):
     condition = ("filename Like '%{input_path}%'".format(input_path=input_path)
                  for input_path in input_paths)
@@ -84,6 +186,9 @@ def get_redshift_table_colunms(table, cursor):
 
 
 def create_load_redshift_runner():
+    # Imported here so that the COPY helpers do not need the MySQL driver
+    from dataduct.data_access import redshift_connection
+
     parser = argparse.ArgumentParser()
     parser.add_argument('--table_definition', dest='table_definition',
                         required=True)
@@ -97,9 +202,21 @@ def create_load_redshift_runner():
     parser.add_argument('--s3_input_paths', dest='input_paths', nargs='+')
     parser.add_argument('--force_drop_table', dest='force_drop_table',
                         default=False)
+    parser.add_argument('--manifest_path', dest='manifest_path',
+                        default=None)
+    parser.add_argument('--validate_load', action='store_true',
+                        default=False)
+    parser.add_argument('--split_input', action='store_true', default=False)
+    parser.add_argument('--parts_per_slice', dest='parts_per_slice',
+                        default=1, type=int)
     script_arguments = parser.parse_args()
     print script_arguments
 
+    if script_arguments.validate_load and not script_arguments.manifest_path:
+        parser.error('--validate_load requires --manifest_path')
+    if script_arguments.split_input and not script_arguments.manifest_path:
+        parser.error('--split_input requires --manifest_path')
+
     table = Table(SqlStatement(script_arguments.table_definition))
     connection = redshift_connection(
         cursor_factory=psycopg2.extras.RealDictCursor)
@@ -125,13 +242,43 @@ def create_load_redshift_runner():
                     redshift_table_columns=", ".join(redshift_table_columns))
             raise Exception(error_string)
 
+    # List the input files in a manifest to load them with a single COPY
+    file_uris = None
+    gzip = script_arguments.gzip
+    command_options = script_arguments.command_options
+    if script_arguments.manifest_path:
+        input_files = list_prefix_keys(script_arguments.input_paths)
+        file_uris = [uri for uri, _ in input_files]
+
+        # Compressed input can not be split line by line
+        if script_arguments.split_input and gzip:
+            print 'Input is not split because it is compressed'
+        elif script_arguments.split_input:
+            part_uris = split_input(cursor, input_files,
+                                    script_arguments.manifest_path,
+                                    script_arguments.parts_per_slice,
+                                    command_options,
+                                    script_arguments.no_escape)
+            if part_uris is not None:
+                file_uris = part_uris
+                gzip = True
+                if command_options:
+                    command_options += ' GZIP'
+
+        create_copy_manifest(
+            file_uris, S3Path(uri=script_arguments.manifest_path))
+
     # Load data into redshift
     load_query = load_redshift(
         table, script_arguments.input_paths, script_arguments.max_error,
         script_arguments.replace_invalid_char, script_arguments.no_escape,
-        script_arguments.gzip, script_arguments.command_options)
+        gzip, command_options, script_arguments.manifest_path)
     try:
+        start = time.time()
         cursor.execute(load_query)
+        print 'COPY finished in %.2f seconds' % (time.time() - start)
+        if script_arguments.validate_load:
+            validate_load_commits(cursor, file_uris)
         cursor.execute('COMMIT')
     except Exception as error:
         error_query = create_error_retrieval_query(
@@ -32,9 +32,11 @@ import argparse
 import sys
 import time
 from datetime import datetime
+from datetime import timedelta
+from multiprocessing.pool import ThreadPool
 
 from boto.sns import SNSConnection
-from dataduct.pipeline.utils import list_pipelines
+from dataduct.pipeline.pipeline_catalog import get_pipeline_catalog
 from dataduct.pipeline.utils import list_pipeline_instances
 
 
@@ -47,54 +49,116 @@ STATUS = '@status'
 START_TIME = '@scheduledStartTime'
 FINISHED = 'FINISHED'
 
+# Seconds between the first polls, doubled up to the refresh rate
+MIN_REFRESH_RATE = 30
+POLL_WORKERS = 4
 
-def check_dependencies_ready(dependencies, start_date, dependencies_to_ignore):
-    """Checks if every dependent pipeline has completed
+
+def check_dependency(pipeline, name, start_date, dependencies_to_ignore):
+    """Checks if the instances of a dependent pipeline have completed
+
+    Args:
+        pipeline(str): id of the pipeline it depends on
+        name(str): name of the pipeline it depends on
+        start_date(datetime): start date of the pipeline
+        dependencies_to_ignore(list of str): dependencies to ignore if failed
+
+    Returns:
+        ready(bool): True if all the instances of the day have completed
+        failed(bool): True if one of the instances failed
+    """
+    # Only list the instances scheduled on the start date
+    instances = list_pipeline_instances(
+        pipeline,
+        start_time=start_date,
+        end_time=start_date + timedelta(days=1, seconds=-1),
+    )
+
+    instances_today = 0
+    running = False
+    failed = False
+    for instance in instances:
+        date = datetime.strptime(instance[START_TIME], '%Y-%m-%dT%H:%M:%S')
+        if date.date() != start_date.date():
+            continue
+        instances_today += 1
+
+        # One of the dependency failed/cancelled
+        if instance[STATUS] in FAILED_STATUSES:
+            if name not in dependencies_to_ignore:
+                raise Exception(
+                    'Pipeline %s (ID: %s) has bad status: %s'
+                    % (name, pipeline, instance[STATUS])
+                )
+            failed = True
+        # Dependency is still running
+        elif instance[STATUS] != FINISHED:
+            running = True
+
+    # Dependency pipeline has not started from today if nothing was found
+    return instances_today > 0 and not running, failed
+
+
+def check_dependencies_ready(dependencies, start_date, dependencies_to_ignore,
+                             workers=POLL_WORKERS):
+    """Checks which dependent pipelines have not completed yet
 
     Args:
         dependencies(dict): dict from id to name of pipelines it depends on
         start_date(str): string representing the start date of the pipeline
         dependencies_to_ignore(list of str): dependencies to ignore if failed
+        workers(int): maximum number of pipelines checked concurrently
+
+    Returns:
+        pending(dict): dict from id to name of the pipelines not completed
+        failures(list of str): names of the completed pipelines that failed
     """
 
     print 'Checking dependency at ', str(datetime.now())
 
-    dependency_ready = True
-
     # Convert date string to datetime object
     start_date = datetime.strptime(start_date, '%Y-%m-%d')
 
-    for pipeline in dependencies.keys():
-        # Get instances of each pipeline
-        instances = list_pipeline_instances(pipeline)
-        failures = []
-
-        # Collect all pipeline instances that are scheduled for today
-        instances_today = []
-        for instance in instances:
-            date = datetime.strptime(instance[START_TIME], '%Y-%m-%dT%H:%M:%S')
-            if date.date() == start_date.date():
-                instances_today.append(instance)
-
-        # Dependency pipeline has not started from today
-        if not instances_today:
-            dependency_ready = False
-
-        for instance in instances_today:
-            # One of the dependency failed/cancelled
-            if instance[STATUS] in FAILED_STATUSES:
-                if dependencies[pipeline] not in dependencies_to_ignore:
-                    raise Exception(
-                        'Pipeline %s (ID: %s) has bad status: %s'
-                        % (dependencies[pipeline], pipeline, instance[STATUS])
-                    )
-                else:
-                    failures.append(dependencies[pipeline])
-            # Dependency is still running
-            elif instance[STATUS] != FINISHED:
-                dependency_ready = False
-
-    return dependency_ready, failures
+    def check(pipeline):
+        """Check a single dependency
+        """
+        return check_dependency(pipeline, dependencies[pipeline], start_date,
+                                dependencies_to_ignore)
+
+    pipelines = sorted(dependencies.keys())
+    pool = ThreadPool(processes=max(1, min(workers, len(pipelines))))
+    try:
+        results = pool.map(check, pipelines)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    pending = dict()
+    failures = []
+    for pipeline, (ready, failed) in zip(pipelines, results):
+        if not ready:
+            pending[pipeline] = dependencies[pipeline]
+        elif failed:
+            failures.append(dependencies[pipeline])
+    return pending, failures
+
+
+def next_refresh_rate(last_rate, progress, min_rate, max_rate):
+    """Seconds to wait before polling the dependencies again
+
+    Args:
+        last_rate(float): seconds waited before the last poll, None if first
+        progress(bool): True if a dependency completed in the last poll
+        min_rate(float): seconds to wait after a dependency completed
+        max_rate(float): maximum seconds to wait between polls
+
+    Returns:
+        rate(float): seconds to wait
+    """
+    min_rate = min(min_rate, max_rate)
+    if last_rate is None or progress:
+        return min_rate
+    return min(last_rate * 2, max_rate)
 
 
 def dependency_check():
@@ -105,6 +169,8 @@ def dependency_check():
         '--dependencies_ok_to_fail', type=str, nargs='+', default=[])
     parser.add_argument('--pipeline_name', dest='pipeline_name')
     parser.add_argument('--refresh_rate', dest='refresh_rate', default='900')
+    parser.add_argument('--min_refresh_rate', dest='min_refresh_rate',
+                        default=str(MIN_REFRESH_RATE))
     parser.add_argument('--start_date', dest='start_date')
     parser.add_argument('--sns_topic_arn', dest="sns_topic_arn")
 
@@ -114,11 +180,6 @@ def dependency_check():
     if not args.dependencies and not args.dependencies_ok_to_fail:
         sys.exit()
 
-    # Create mapping from pipeline name to id
-    pipeline_name_to_id = dict(
-        (pipeline['name'], pipeline['id']) for pipeline in list_pipelines()
-    )
-
     # Remove whitespace from dependency lists
     dependencies = map(str.strip, args.dependencies)
     dependencies_to_ignore = map(str.strip, args.dependencies_ok_to_fail)
@@ -127,28 +188,34 @@ def dependency_check():
     dependencies.extend(dependencies_to_ignore)
 
     # Check if all dependencies are valid pipelines
+    catalog = get_pipeline_catalog()
     for dependency in dependencies:
-        if dependency not in pipeline_name_to_id:
+        if dependency not in catalog:
             raise Exception('Pipeline not found: %s.' % dependency)
 
     # Map from dependency id to name
-    dependencies = {pipeline_name_to_id[dep]: dep for dep in dependencies}
+    dependencies = {catalog.ids(dep)[-1]: dep for dep in dependencies}
 
     print 'Start checking for dependencies'
     start_time = datetime.now()
 
     failures = []
-    dependencies_ready = False
+    refresh_rate = None
 
-    # Loop until all dependent pipelines have finished or failed
-    while not dependencies_ready:
+    # Loop until all dependent pipelines have finished or failed, completed
+    # pipelines are not polled again
+    while dependencies:
         print 'checking'
-        dependencies_ready, new_failures = check_dependencies_ready(dependencies,
-                                                        args.start_date,
-                                                        dependencies_to_ignore)
+        pending, new_failures = check_dependencies_ready(
+            dependencies, args.start_date, dependencies_to_ignore)
         failures.extend(new_failures)
-        if not dependencies_ready:
-            time.sleep(float(args.refresh_rate))
+        if pending:
+            # Poll less often while no dependency completes
+            refresh_rate = next_refresh_rate(
+                refresh_rate, len(pending) < len(dependencies),
+                float(args.min_refresh_rate), float(args.refresh_rate))
+            time.sleep(refresh_rate)
+        dependencies = pending
 
     # Send message through SNS if there are failures
     if failures:
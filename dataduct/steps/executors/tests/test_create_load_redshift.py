@@ -0,0 +1,162 @@
+"""Tests for the executor of the create-load-redshift step
+"""
+import gzip
+import json
+import unittest
+from mock import patch
+from nose.tools import eq_
+from StringIO import StringIO
+
+from ..create_load_redshift import load_redshift
+from ..create_load_redshift import split_input
+from ..create_load_redshift import validate_load_commits
+from ....database import SqlStatement
+from ....database import Table
+from ....s3 import S3Path
+from ....s3.manifest import create_copy_manifest
+from ....s3.tests.fake_s3 import FakeS3Connection
+from ....s3.utils import clear_s3_connections
+
+CREDENTIALS = 'aws_access_key_id=key;aws_secret_access_key=secret'
+
+
+class FakeCursor(object):
+    """Cursor that records the statements and returns the given rows
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+
+class CreateLoadRedshiftTests(unittest.TestCase):
+    """Tests for the executor of the create-load-redshift step
+    """
+
+    def setUp(self):
+        """Setup the table and the credentials
+        """
+        self.table = Table(SqlStatement(
+            'CREATE TABLE analytics.orders (id INTEGER);'))
+        self.patcher = patch(
+            'dataduct.steps.executors.create_load_redshift.'
+            'get_aws_credentials', return_value=('key', 'secret', None))
+        self.patcher.start()
+
+    def tearDown(self):
+        """Remove the patch of the credentials
+        """
+        self.patcher.stop()
+
+    def test_manifest_is_loaded_with_one_copy(self):
+        """Test that all the input paths are loaded from the manifest
+        """
+        query = load_redshift(
+            self.table, ['s3://bucket/a/', 's3://bucket/b/'], gzip=True,
+            manifest_path='s3://bucket/load.manifest')
+
+        eq_(query.count('COPY'), 1)
+        assert query.startswith('TRUNCATE analytics.orders; ')
+        assert ("COPY analytics.orders FROM 's3://bucket/load.manifest' "
+                "WITH CREDENTIALS AS '%s' COMPUPDATE OFF STATUPDATE OFF "
+                "MANIFEST DELIMITER '\t' ESCAPE GZIP NULL AS 'NULL' "
+                "TRUNCATECOLUMNS" % CREDENTIALS) in query
+
+    def test_command_options_get_the_manifest_prefix(self):
+        """Test that custom options are prefixed with MANIFEST
+        """
+        query = load_redshift(
+            self.table, ['s3://bucket/a/'], command_options='CSV GZIP',
+            manifest_path='s3://bucket/load.manifest')
+        assert query.endswith(
+            "COMPUPDATE OFF STATUPDATE OFF MANIFEST CSV GZIP;")
+
+    def test_input_paths_without_manifest(self):
+        """Test that every input path is loaded by its own COPY
+        """
+        query = load_redshift(
+            self.table, ['s3://bucket/a/', 's3://bucket/b/'],
+            command_options='CSV')
+        eq_(query.count('COPY'), 2)
+        assert 'MANIFEST' not in query
+
+    @staticmethod
+    def test_all_files_committed():
+        """Test that the commits of the last COPY are checked
+        """
+        cursor = FakeCursor([{'filename': 's3://bucket/a/part-0'},
+                             {'filename': 's3://bucket/a/part-1'}])
+        validate_load_commits(
+            cursor, ['s3://bucket/a/part-0', 's3://bucket/a/part-1'])
+        assert 'pg_last_copy_id()' in cursor.statements[0]
+
+    def test_missing_file_is_an_error(self):
+        """Test that a file missing from the commits raises an error
+        """
+        cursor = FakeCursor([{'filename': 's3://bucket/a/part-0'}])
+        with self.assertRaises(Exception) as context:
+            validate_load_commits(
+                cursor, ['s3://bucket/a/part-0', 's3://bucket/a/part-1'])
+        eq_(str(context.exception),
+            'Files not loaded by the COPY: s3://bucket/a/part-1')
+
+    @staticmethod
+    def test_header_and_compressed_input_are_not_split():
+        """Test that input loaded with unsplittable options is not split
+        """
+        input_files = [('s3://bucket/a/part-0', 10 ** 9)]
+        for command_options in ["DELIMITER ',' IGNOREHEADER 1",
+                                "DELIMITER '\t' GZIP", "FORMAT AS CSV"]:
+            cursor = FakeCursor([{'slices': 4}])
+            with patch('dataduct.steps.executors.create_load_redshift.'
+                       'split_to_gzip_parts') as split_to_gzip_parts:
+                eq_(split_input(cursor, input_files,
+                                's3://bucket/load.manifest', 1,
+                                command_options), None)
+            eq_(cursor.statements, [])
+            assert not split_to_gzip_parts.called
+
+    def test_split_keeps_escaped_records(self):
+        """Test that the default options split on escaped record boundaries
+        and that the parts replace the input in the manifest
+        """
+        conn = FakeS3Connection()
+        bucket = conn.get_bucket('bucket')
+        rows = ['%d\tfirst line\\\nsecond line %d\n' % (i, i)
+                for i in range(150000)]
+        bucket.new_key('input/data.tsv').set_contents_from_string(
+            ''.join(rows))
+        bucket.new_key('load/split/part-00009.gz').set_contents_from_string(
+            'stale part')
+        input_files = [('s3://bucket/input/data.tsv', len(''.join(rows)))]
+
+        with patch('boto.connect_s3', side_effect=conn.connect):
+            clear_s3_connections()
+            part_uris = split_input(
+                FakeCursor([{'slices': 4}]), input_files,
+                's3://bucket/load/load.manifest', 1)
+            create_copy_manifest(
+                part_uris, S3Path(uri='s3://bucket/load/load.manifest'))
+
+        eq_(part_uris, ['s3://bucket/load/split/part-%05d.gz' % i
+                        for i in range(4)])
+        eq_(sorted(name for name in bucket.keys
+                   if name.startswith('load/split/')),
+            ['load/split/part-%05d.gz' % i for i in range(4)])
+        parts = [gzip.GzipFile(fileobj=StringIO(bucket.contents[
+            'load/split/part-%05d.gz' % i])).read() for i in range(4)]
+        eq_(''.join(parts), ''.join(rows))
+        assert all(part.startswith(rows[int(part.split('\t', 1)[0])])
+                   for part in parts)
+
+        manifest = json.loads(bucket.contents['load/load.manifest'])
+        eq_(manifest['entries'], [{'url': uri, 'mandatory': True}
+                                  for uri in part_uris])
@@ -0,0 +1,87 @@
+"""Tests for the pipeline dependency executor
+"""
+import unittest
+from datetime import datetime
+from mock import patch
+from nose.tools import eq_
+from nose.tools import raises
+
+from ..dependency_check import check_dependencies_ready
+from ..dependency_check import next_refresh_rate
+
+
+def instance(day, status):
+    """Pipeline instance scheduled on a day of January 2015
+    """
+    return {
+        '@scheduledStartTime': '2015-01-%02dT01:00:00' % day,
+        '@status': status,
+    }
+
+
+class DependencyCheckTests(unittest.TestCase):
+    """Tests for the pipeline dependency executor
+    """
+
+    def setUp(self):
+        """Setup the instances of the dependencies
+        """
+        self.instances = {
+            'df-finished': [instance(2, 'FINISHED')],
+            'df-running': [instance(2, 'FINISHED'), instance(2, 'RUNNING')],
+            'df-yesterday': [instance(1, 'FINISHED')],
+            'df-failed': [instance(2, 'FAILED')],
+        }
+        self.dependencies = {
+            'df-finished': 'finished',
+            'df-running': 'running',
+            'df-yesterday': 'yesterday',
+        }
+
+    def check(self, dependencies, dependencies_to_ignore=None):
+        """Check the dependencies with the fake instances
+        """
+        def list_instances(pipeline, start_time, end_time):
+            """Instances of a pipeline scheduled between two times
+            """
+            eq_(start_time, datetime(2015, 1, 2))
+            eq_(end_time, datetime(2015, 1, 2, 23, 59, 59))
+            return iter(self.instances[pipeline])
+
+        with patch('dataduct.steps.executors.dependency_check.'
+                   'list_pipeline_instances', side_effect=list_instances):
+            return check_dependencies_ready(
+                dependencies, '2015-01-02', dependencies_to_ignore or [])
+
+    def test_only_pending_dependencies_are_returned(self):
+        """Test that completed dependencies are not polled again
+        """
+        pending, failures = self.check(self.dependencies)
+        eq_(pending, {'df-running': 'running', 'df-yesterday': 'yesterday'})
+        eq_(failures, [])
+
+    def test_ignored_failures(self):
+        """Test that failed dependencies that are ok to fail complete
+        """
+        self.dependencies['df-failed'] = 'failed'
+        pending, failures = self.check(self.dependencies, ['failed'])
+        eq_(sorted(pending), ['df-running', 'df-yesterday'])
+        eq_(failures, ['failed'])
+
+    @raises(Exception)
+    def test_failures(self):
+        """Test that failed dependencies raise an exception
+        """
+        self.check({'df-failed': 'failed'})
+
+    @staticmethod
+    def test_refresh_rate_backs_off():
+        """Test that polls back off until a dependency completes
+        """
+        rate = None
+        rates = []
+        for progress in [False, False, False, False, True, False]:
+            rate = next_refresh_rate(rate, progress, 30, 200)
+            rates.append(rate)
+        eq_(rates, [30, 60, 120, 200, 30, 60])
+        eq_(next_refresh_rate(None, False, 30, 10), 10)
@@ -5,6 +5,7 @@ from ..database import SqlScript
 from ..database import SqlStatement
 from ..database import Table
 from ..pipeline import ShellCommandActivity
+from ..s3 import S3Path
 from ..utils import constants as const
 from ..utils.helpers import parse_path
 from .etl_step import ETLStep
@@ -142,6 +143,12 @@ class LoadReloadAndPrimaryKeyStep(ETLStep):
         else:
             input_paths = [input_node.path().uri]
 
+        # The input files are listed in a manifest and loaded by one COPY
+        if self.s3_data_dir is not None:
+            script_arguments.append('--manifest_path=%s' % S3Path(
+                key=const.LOAD_MANIFEST_FILE,
+                parent_dir=self.s3_data_dir).uri)
+
         script_arguments.extend([
             '--table_definition=%s' % table.sql().sql(),
             '--s3_input_paths'
@@ -2,7 +2,10 @@
 ETL step for pipeline dependencies using transform step
 """
 from ..config import Config
+from ..pipeline import Precondition
 from ..utils import constants as const
+from ..utils.exceptions import ETLInputError
+from ..utils.helpers import get_completion_marker_dir
 from .transform import TransformStep
 
 config = Config()
@@ -24,12 +27,15 @@ class PipelineDependenciesStep(TransformStep):
                  refresh_rate=300,
                  start_date=None,
                  script_arguments=None,
+                 wait_for_markers=False,
                  **kwargs):
         """Constructor for the QATransformStep class
 
         Args:
             sns_arn(str): sns topic arn for QA steps
             script_arguments(list of str): list of arguments to the script
+            wait_for_markers(bool): wait for the S3 completion markers of the
+                pipelines with preconditions instead of polling the API
             **kwargs(optional): Keyword arguments directly passed to base class
         """
 
@@ -43,13 +49,30 @@ class PipelineDependenciesStep(TransformStep):
         prefix_func = lambda p: p if not NAME_PREFIX else NAME_PREFIX + '_' + p
         argument_func = lambda x: [prefix_func(p) for p in x]
 
+        marker_uris = []
         if DEPENDENCY_OVERRIDE:
             command = 'ls'
             script_arguments = None
+        elif wait_for_markers:
+            if dependent_pipelines_ok_to_fail:
+                raise ETLInputError(
+                    'Markers are only written for pipelines that succeeded')
+            if start_date is None:
+                start_date = const.SCHEDULED_DATE_EXPRESSION
+
+            for pipeline in argument_func(dependent_pipelines):
+                marker_dir = get_completion_marker_dir(pipeline, start_date)
+                if marker_dir is None:
+                    raise ETLInputError(
+                        'COMPLETION_MARKER_PATH is needed to wait for markers')
+                marker_uris.append(marker_dir + const.COMPLETION_MARKER_FILE)
+
+            command = 'echo Dependencies finished'
+            script_arguments = None
         else:
             command = const.DEPENDENCY_COMMAND
             if start_date is None:
-                start_date = "#{format(@scheduledStartTime,'YYYY-MM-dd')}"
+                start_date = const.SCHEDULED_DATE_EXPRESSION
 
             script_arguments.extend(
                 [
@@ -78,6 +101,15 @@ class PipelineDependenciesStep(TransformStep):
 
         self._output = None
 
+        # The activity only runs once the marker of every pipeline exists
+        for marker_uri in marker_uris:
+            precondition = self.create_pipeline_object(
+                object_class=Precondition,
+                s3_key=marker_uri,
+            )
+            for activity in self.activities:
+                activity['precondition'] = precondition
+
     @classmethod
     def arguments_processor(cls, etl, input_args):
         """Parse the step arguments according to the ETL pipeline
@@ -130,6 +130,13 @@ pipeline_run_options.add_argument(
     default=False,
     help='Destroy previous versions of this pipeline, if they exist',
 )
+pipeline_run_options.add_argument(
+    '-u',
+    '--update',
+    action='store_true',
+    default=False,
+    help='Only update pipelines that differ from the deployed version',
+)
 pipeline_run_options.add_argument(
     '-t',
     '--time_delta',
@@ -148,6 +155,13 @@ pipeline_run_options.add_argument(
     default=None,
     help='Frequency override for the pipeline',
 )
+pipeline_run_options.add_argument(
+    '-j',
+    '--jobs',
+    type=int,
+    default=1,
+    help='Number of pipeline definitions to process in parallel',
+)
 
 # Pipeline definitions parser
 pipeline_definition_help = 'Paths of the pipeline definitions'
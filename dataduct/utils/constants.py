@@ -20,6 +20,14 @@ DATA_STR = 'data'
 SRC_STR = 'src'
 QA_STR = 'qa'
 
+# Completion markers written when a pipeline finishes
+COMPLETION_MARKER_FILE = '_SUCCESS'
+LOAD_MANIFEST_FILE = 'load.manifest'
+SCHEDULED_DATE_EXPRESSION = "#{format(@scheduledStartTime,'YYYY-MM-dd')}"
+
+# Stands in for the pipeline version name when definitions are compared
+VERSION_NAME_PLACEHOLDER = '{VERSION_NAME}'
+
 # Commands
 COMMAND_TEMPLATE = 'python -c "from {file} import {func}; {func}()" "$@"'
 
@@ -5,9 +5,11 @@ import math
 import os
 import time
 
+from contextlib import contextmanager
 from sys import stderr
 
 from ..config import Config
+from . import constants as const
 
 RESOURCE_BASE_PATH = 'RESOURCE_BASE_PATH'
 CUSTOM_STEPS_PATH = 'CUSTOM_STEPS_PATH'
@@ -15,6 +17,9 @@ HOOKS_BASE_PATH = 'HOOKS_BASE_PATH'
 
 URL_TEMPLATE = 'https://console.aws.amazon.com/datapipeline/?{region}#ExecutionDetailsPlace:pipelineId={ID}&show=latest'  # noqa
 
+# Sets collecting the paths returned by parse_path, see record_parsed_paths
+_parsed_path_recorders = []
+
 
 def atmost_one(*args):
     """Asserts one of the arguments is not None
@@ -128,15 +133,40 @@ def parse_path(path, path_type=RESOURCE_BASE_PATH):
     """
     # If path is None or absolute
     if path is None or os.path.isabs(path):
-        return path
+        result = path
+    else:
+        # Try relative path to specified config
+        config = Config()
+        if path_type in config.etl:
+            result = os.path.join(
+                os.path.expanduser(config.etl[path_type]), path)
+        else:
+            # Return the path as is.
+            result = path
+
+    if result is not None:
+        for recorder in _parsed_path_recorders:
+            recorder.add(os.path.abspath(result))
+    return result
+
+
+@contextmanager
+def record_parsed_paths():
+    """Record the local paths resolved through parse_path
 
-    # Try relative path to specified config
-    config = Config()
-    if path_type in config.etl:
-        return os.path.join(os.path.expanduser(config.etl[path_type]), path)
+    Note:
+        This is used to find all the local files that a pipeline definition
+        depends on while it is being compiled.
 
-    # Return the path as is.
-    return path
+    Yields:
+        paths(set of str): absolute paths resolved inside the context
+    """
+    paths = set()
+    _parsed_path_recorders.append(paths)
+    try:
+        yield paths
+    finally:
+        _parsed_path_recorders.remove(paths)
 
 
 def get_s3_base_path():
@@ -147,6 +177,25 @@ def get_s3_base_path():
                         config.etl.get('S3_BASE_PATH', ''))
 
 
+def get_completion_marker_dir(pipeline_name,
+                              date=const.SCHEDULED_DATE_EXPRESSION):
+    """Get the S3 directory of the completion marker of a pipeline run
+
+    Args:
+        pipeline_name(str): name of the pipeline including the name prefix
+        date(str): scheduled date of the run, an expression by default
+
+    Returns:
+        uri(str): directory of the marker, None if markers are not enabled
+    """
+    config = Config()
+    marker_path = config.etl.get('COMPLETION_MARKER_PATH', None)
+    if not marker_path:
+        return None
+    return os.path.join(get_s3_base_path(), marker_path, pipeline_name,
+                        date) + '/'
+
+
 def get_modified_s3_path(path):
     """Modify the s3 path to replace S3_BASE_PATH with config parameter
     """
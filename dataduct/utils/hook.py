@@ -9,6 +9,7 @@ def function():
 import os
 import imp
 import sys
+import threading
 
 from .helpers import parse_path
 
@@ -25,6 +26,40 @@ def default_after_hook(result):
     return result
 
 
+# Hook functions of every loaded hook file keyed by its path and mtime
+_hook_cache = dict()
+_hook_cache_lock = threading.Lock()
+
+
+def load_hook_file(hook_file):
+    """Load the hook functions of a hook file, at most once per version
+
+    Note:
+        The file is only loaded again if its modification time changed
+
+    Args:
+        hook_file(str): path of the hook file
+
+    Returns:
+        before_hook, after_hook(tuple of function): hooks in the file,
+        falling back to the default hooks
+    """
+    key = (hook_file, os.path.getmtime(hook_file))
+    with _hook_cache_lock:
+        if key not in _hook_cache:
+            # Delete the previous custom hook, so the imports are not merged.
+            if 'custom_hook' in sys.modules:
+                del sys.modules['custom_hook']
+
+            # Get the hook functions, falling back to the default hooks
+            custom_hook = imp.load_source('custom_hook', hook_file)
+            _hook_cache[key] = (
+                getattr(custom_hook, 'before_hook', default_before_hook),
+                getattr(custom_hook, 'after_hook', default_after_hook),
+            )
+        return _hook_cache[key]
+
+
 def get_hooks(hook_name):
     """Returns the before hook and after hook (in a tuple) for a particular
     hook name
@@ -39,29 +74,27 @@ def get_hooks(hook_name):
     if not os.path.isfile(hook_file):
         return default_before_hook, default_after_hook
 
-    # Delete the previous custom hook, so the imports are not merged.
-    if 'custom_hook' in sys.modules:
-        del sys.modules['custom_hook']
-
-    # Get the hook functions, falling back to the default hooks
-    custom_hook = imp.load_source('custom_hook', hook_file)
-    before_hook = getattr(custom_hook, 'before_hook', default_before_hook)
-    after_hook = getattr(custom_hook, 'after_hook', default_after_hook)
-
-    return before_hook, after_hook
+    return load_hook_file(hook_file)
 
 
 def hook(hook_name):
     """The hook decorator creator
-    """
-    before_hook, after_hook = get_hooks(hook_name)
 
+    Note:
+        The hooks are looked up on the first call of the decorated function
+        and reused for the following calls
+    """
     def hook_decorator(func):
         """The hook decorator
         """
+        hooks = [None]
+
         def function_wrapper(*args, **kwargs):
             """The hook wrapper for the function
             """
+            if hooks[0] is None:
+                hooks[0] = get_hooks(hook_name)
+            before_hook, after_hook = hooks[0]
             new_args, new_kwargs = before_hook(*args, **kwargs)
             result = func(*new_args, **new_kwargs)
             new_result = after_hook(result)
@@ -0,0 +1,92 @@
+"""
+Dictionary of pipeline objects that keeps running counts per class
+"""
+from collections import defaultdict
+
+
+class ObjectRegistry(dict):
+    """Dictionary mapping ids to objects with constant time class counts
+
+    The registry behaves like a regular dict but keeps track of how many of
+    the stored values are instances of each class. Counts are maintained for
+    every class in the MRO of a value, so count(cls) returns the same result
+    as summing isinstance(value, cls) over all values, without the scan.
+    """
+    def __init__(self, *args, **kwargs):
+        """Constructor for the ObjectRegistry class
+
+        Args:
+            *args, **kwargs: Same arguments as accepted by dict
+        """
+        super(ObjectRegistry, self).__init__()
+        self._class_counts = defaultdict(int)
+        self.update(*args, **kwargs)
+
+    def __reduce__(self):
+        """Rebuild the registry item by item when copied or pickled
+
+        Note:
+            The default dict reduction restores the counts and then re-adds
+            every item, which would double count the values.
+        """
+        return (self.__class__, (), None, None, self.iteritems())
+
+    def _track(self, value, delta):
+        """Update the class counts for a value
+
+        Args:
+            value: object being added or removed
+            delta(int): +1 when adding and -1 when removing
+        """
+        for object_class in type(value).__mro__:
+            self._class_counts[object_class] += delta
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self._track(self[key], -1)
+        super(ObjectRegistry, self).__setitem__(key, value)
+        self._track(value, 1)
+
+    def __delitem__(self, key):
+        value = self[key]
+        super(ObjectRegistry, self).__delitem__(key)
+        self._track(value, -1)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = super(ObjectRegistry, self).pop(key)
+            self._track(value, -1)
+            return value
+        return super(ObjectRegistry, self).pop(key, *default)
+
+    def popitem(self):
+        key, value = super(ObjectRegistry, self).popitem()
+        self._track(value, -1)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).iteritems():
+            self[key] = value
+
+    def clear(self):
+        super(ObjectRegistry, self).clear()
+        self._class_counts.clear()
+
+    def copy(self):
+        return self.__class__(self)
+
+    def count(self, object_class):
+        """Number of values that are instances of the given class
+
+        Args:
+            object_class(class): class whose instances should be counted
+
+        Returns:
+            result(int): number of values of the class or its subclasses
+        """
+        return self._class_counts.get(object_class, 0)
@@ -6,6 +6,7 @@ from unittest import TestCase
 from ..helpers import stringify_credentials
 from ..helpers import parse_path
 from ..helpers import make_pipeline_url
+from ..helpers import record_parsed_paths
 from nose.tools import eq_
 
 
@@ -70,6 +71,20 @@ class TestHelpers(TestCase):
             os.path.expanduser('~/transform/test/path'),
         )
 
+    @staticmethod
+    def test_record_parsed_paths():
+        """Tests that the paths resolved inside the context are recorded
+        """
+        from dataduct.config import Config
+        config = Config()
+        config.etl['TEST_PATH'] = '/transform'
+        with record_parsed_paths() as paths:
+            parse_path('test/path', 'TEST_PATH')
+            parse_path('/abs/path')
+            parse_path(None)
+        parse_path('/outside/path')
+        eq_(paths, set(['/transform/test/path', '/abs/path']))
+
     @staticmethod
     def test_make_pipeline_url_no_region_correct():
         """Tests that make_pipeline_url makes a correct url without a region
@@ -1,5 +1,8 @@
 """Tests for the hooks framework
 """
+import imp
+import os
+from mock import patch
 from unittest import TestCase
 from testfixtures import TempDirectory
 from nose.tools import eq_
@@ -181,3 +184,36 @@ class TestHooks(TestCase):
             return number
 
         eq_(second_test_hook(1), 101)
+
+    def test_hook_file_is_loaded_once(self):
+        """Test that a hook file is only loaded again when it changes
+        """
+        self.temp_directory.write('test_hook.py', '\n'.join([
+            'def after_hook(result):',
+            '    return result + 2',
+        ]))
+
+        @hook('test_hook')
+        def first_hook(number):
+            return number
+
+        @hook('test_hook')
+        def second_hook(number):
+            return number
+
+        with patch('imp.load_source', wraps=imp.load_source) as load_source:
+            eq_(first_hook(1), 3)
+            eq_(second_hook(1), 3)
+            eq_(first_hook(2), 4)
+            eq_(load_source.call_count, 1)
+
+            hook_file = self.temp_directory.getpath('test_hook.py')
+            mtime = os.path.getmtime(hook_file)
+            os.utime(hook_file, (mtime + 10, mtime + 10))
+
+            @hook('test_hook')
+            def third_hook(number):
+                return number
+
+            eq_(third_hook(1), 3)
+            eq_(load_source.call_count, 2)
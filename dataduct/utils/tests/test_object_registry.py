@@ -0,0 +1,74 @@
+"""Tests for the object registry
+"""
+import unittest
+from copy import deepcopy
+from nose.tools import eq_
+
+from ..object_registry import ObjectRegistry
+
+
+class Base(object):
+    """Base class used to check the counts
+    """
+    pass
+
+
+class Child(Base):
+    """Subclass used to check the counts of base classes
+    """
+    pass
+
+
+class ObjectRegistryTests(unittest.TestCase):
+    """Tests for the object registry
+    """
+
+    def setUp(self):
+        """Setup text fixtures
+        """
+        self.registry = ObjectRegistry()
+        self.registry['base0'] = Base()
+        self.registry['child0'] = Child()
+        self.registry['child1'] = Child()
+
+    def assert_counts_match_scan(self, registry):
+        """Check the counts against a scan of all the values
+        """
+        for object_class in [object, Base, Child]:
+            expected = sum([1 for o in registry.values()
+                            if isinstance(o, object_class)])
+            eq_(registry.count(object_class), expected)
+
+    def test_count_includes_subclasses(self):
+        """Test that counts follow isinstance semantics
+        """
+        eq_(self.registry.count(Base), 3)
+        eq_(self.registry.count(Child), 2)
+        eq_(self.registry.count(str), 0)
+        self.assert_counts_match_scan(self.registry)
+
+    def test_overwrite_and_remove(self):
+        """Test that the counts stay in sync when items are replaced or removed
+        """
+        self.registry['child0'] = Base()
+        self.assert_counts_match_scan(self.registry)
+
+        self.registry.pop('child1')
+        del self.registry['base0']
+        eq_(self.registry.pop('missing', None), None)
+        eq_(self.registry.count(Child), 0)
+        self.assert_counts_match_scan(self.registry)
+
+        self.registry.clear()
+        eq_(self.registry.count(Base), 0)
+
+    def test_deepcopy(self):
+        """Test that copies of the registry are not double counted
+        """
+        result = deepcopy(self.registry)
+        eq_(len(result), 3)
+        self.assert_counts_match_scan(result)
+
+        result.pop('base0')
+        eq_(self.registry.count(Base), 3)
+        eq_(result.count(Base), 2)